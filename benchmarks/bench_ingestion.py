@@ -0,0 +1,277 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+# --- GESTION DES IMPORTS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+racine_projet = os.path.dirname(current_dir)
+sys.path.append(current_dir)
+sys.path.append(os.path.join(racine_projet, "src", "ingestion"))
+sys.path.append(os.path.join(racine_projet, "src", "processing"))
+
+import get_wikidata_data
+import get_insee_data
+import get_players
+import fusion
+from util import cache, limiteur
+from stubs import charger_fixtures, serveur_wikidata, serveur_geo, serveur_wikipedia, TITRE_PAGE
+
+BENCHMARKS = ["wikidata", "insee", "wikipedia", "fusion"]
+# Modes d'enrichissement Wikidata : une requête par joueur, ou lots VALUES
+MODES_WIKIDATA = ["individuel", "batch"]
+
+# Fichiers copiés dans le dossier de travail temporaire (le vrai data/ n'est jamais modifié)
+FICHIERS_ENTREE = [
+    os.path.join("data", "raw", "joueurs_base.csv"),
+    os.path.join("data", "processed", "joueurs_enrichis.csv"),
+    os.path.join("data", "processed", "joueurs_avec_insee.csv"),
+    os.path.join("data", "overrides", "corrections_wikidata.json"),
+]
+
+# Hôte réel dont le stub reprend les réglages de limiteur
+HOTES_REELS = {
+    "wikidata": "query.wikidata.org",
+    "geo_api": "geo.api.gouv.fr",
+    "wikipedia": "fr.wikipedia.org",
+}
+
+# Réglages "libre" : le limiteur ne freine plus, seul le service (simulé) compte
+CONFIG_LIBRE = {"debit": 1000.0, "debit_max": 1000.0, "debit_min": 1.0, "capacite": 1000}
+
+
+class Mesures:
+    """
+    Durée de chaque appel réseau logique (retries et attentes du limiteur compris)
+    """
+
+    def __init__(self):
+        self.latences = []
+        self.erreurs = 0
+
+    def envelopper(self, executer):
+        def executer_mesure(url, appel, *args, **kwargs):
+            debut = time.perf_counter()
+            try:
+                return executer(url, appel, *args, **kwargs)
+            except Exception:
+                self.erreurs += 1
+                raise
+            finally:
+                self.latences.append(time.perf_counter() - debut)
+        return executer_mesure
+
+
+def preparer_dossier():
+    """
+    Dossier de travail neuf : copie des entrées, cache HTTP vide
+    """
+    dossier = tempfile.mkdtemp(prefix="bench_ingestion_")
+    for chemin in FICHIERS_ENTREE:
+        source = os.path.join(racine_projet, chemin)
+        if os.path.exists(source):
+            os.makedirs(os.path.join(dossier, os.path.dirname(chemin)), exist_ok=True)
+            shutil.copy(source, os.path.join(dossier, chemin))
+    # fusion.py résout ses chemins depuis src/ : il doit exister dans le dossier de travail
+    os.makedirs(os.path.join(dossier, "src"), exist_ok=True)
+    return dossier
+
+
+def reinitialiser_etat():
+    """
+    Oublie les singletons d'un passage précédent (cache, limiteurs, index des joueurs)
+    """
+    if cache._cache_partage is not None:
+        cache._cache_partage.fermer()
+        cache._cache_partage = None
+    limiteur._limiteurs.clear()
+    get_wikidata_data._index_joueurs = None
+    get_wikidata_data._index_joueurs_charge = False
+
+
+def rediriger_vers_stubs(stubs, limiteur_libre=False):
+    """
+    Fait pointer les modules d'ingestion vers les serveurs locaux
+    """
+    get_wikidata_data.URL_WIKIDATA_SPARQL = f"{stubs['wikidata'].url}/sparql"
+    get_insee_data.URL_API_GEO = f"{stubs['geo_api'].url}/communes"
+    get_players.EQUIPES_WIKIPEDIA["france"] = dict(get_players.EQUIPES_WIKIPEDIA["france"],
+                                                   url=f"{stubs['wikipedia'].url}/wiki/{TITRE_PAGE}")
+    for nom, stub in stubs.items():
+        config = CONFIG_LIBRE if limiteur_libre else limiteur.CONFIG_HOTES[HOTES_REELS[nom]]
+        limiteur.CONFIG_HOTES[limiteur.hote_de(stub.url)] = dict(config)
+
+
+def bench_wikidata(fixtures):
+    get_wikidata_data.enrich_with_wikidata_individual(incremental=False)
+    return len(fixtures["joueurs"])
+
+
+def bench_wikidata_batch(fixtures):
+    get_wikidata_data.enrich_with_wikidata_batch(incremental=False)
+    return len(fixtures["joueurs"])
+
+
+def bench_insee(fixtures):
+    get_insee_data.enrich_with_insee(utiliser_index=False, incremental=False)
+    return len(fixtures["enrichis"])
+
+
+def bench_wikipedia(fixtures):
+    return len(get_players.get_current_squad_wikipedia())
+
+
+def bench_fusion(fixtures):
+    fusion.parent_dir = os.path.join(os.getcwd(), "src")
+    fusion.main(parquet=False)
+    return len(fixtures["joueurs"])
+
+
+FONCTIONS = {
+    "wikidata": bench_wikidata,
+    "wikidata/batch": bench_wikidata_batch,
+    "insee": bench_insee,
+    "wikipedia": bench_wikipedia,
+    "fusion": bench_fusion,
+}
+
+
+def noms_benchmarks(benchmarks, modes):
+    """
+    Benchmarks à exécuter : "wikidata" est décliné selon les modes demandés
+    """
+    noms = []
+    for nom in benchmarks:
+        if nom == "wikidata":
+            noms += ["wikidata" if mode == "individuel" else f"wikidata/{mode}" for mode in modes]
+        else:
+            noms.append(nom)
+    return noms
+
+
+def executer_benchmark(nom, fixtures, stubs, cache_chaud=False, verbeux=False):
+    """
+    Exécute un benchmark dans un dossier de travail neuf.
+    Avec `cache_chaud`, un premier passage remplit le cache et seul le second est mesuré.
+
+    Returns:
+        Dict: lignes, durée, lignes/s, latences p50/p95 (ms), requêtes par code HTTP
+    """
+    dossier_initial = os.getcwd()
+    dossier = preparer_dossier()
+    mesures = Mesures()
+    originaux = {module: module.executer_avec_limite for module in (get_wikidata_data, get_insee_data, get_players)}
+    sortie = contextlib.nullcontext() if verbeux else contextlib.redirect_stdout(io.StringIO())
+
+    try:
+        os.chdir(dossier)
+        reinitialiser_etat()
+        with sortie:
+            if cache_chaud:
+                FONCTIONS[nom](fixtures)
+                limiteur._limiteurs.clear()
+            for stub in stubs.values():
+                stub.reinitialiser()
+            for module, executer in originaux.items():
+                module.executer_avec_limite = mesures.envelopper(executer)
+
+            debut = time.perf_counter()
+            nb_lignes = FONCTIONS[nom](fixtures)
+            duree = time.perf_counter() - debut
+    finally:
+        for module, executer in originaux.items():
+            module.executer_avec_limite = executer
+        reinitialiser_etat()
+        os.chdir(dossier_initial)
+        shutil.rmtree(dossier, ignore_errors=True)
+
+    codes = Counter()
+    for stub in stubs.values():
+        codes.update(stub.codes)
+    latences_ms = np.array(mesures.latences) * 1000
+    return {
+        "benchmark": nom,
+        "lignes": nb_lignes,
+        "duree_s": round(duree, 3),
+        "lignes_par_s": round(nb_lignes / duree, 1) if duree else None,
+        "appels": len(latences_ms),
+        "appels_en_echec": mesures.erreurs,
+        "latence_p50_ms": round(float(np.percentile(latences_ms, 50)), 1) if len(latences_ms) else None,
+        "latence_p95_ms": round(float(np.percentile(latences_ms, 95)), 1) if len(latences_ms) else None,
+        "requetes": sum(codes.values()),
+        "requetes_par_code": {str(code): nb for code, nb in sorted(codes.items())},
+    }
+
+
+def afficher_resultats(resultats):
+    print(f"\n{'benchmark':15s} {'lignes':>7s} {'duree':>8s} {'lignes/s':>9s} {'appels':>7s} "
+          f"{'p50 ms':>8s} {'p95 ms':>8s} {'requetes':>9s}  codes")
+    for r in resultats:
+        p50 = "-" if r["latence_p50_ms"] is None else f"{r['latence_p50_ms']:.1f}"
+        p95 = "-" if r["latence_p95_ms"] is None else f"{r['latence_p95_ms']:.1f}"
+        codes = " ".join(f"{code}:{nb}" for code, nb in r["requetes_par_code"].items()) or "-"
+        print(f"{r['benchmark']:15s} {r['lignes']:7d} {r['duree_s']:7.2f}s {r['lignes_par_s']:9.1f} "
+              f"{r['appels']:7d} {p50:>8s} {p95:>8s} {r['requetes']:9d}  {codes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks des etapes d'ingestion contre des services simules")
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=BENCHMARKS,
+                        help="Benchmarks a executer (defaut: tous)")
+    parser.add_argument("--mode", nargs="+", choices=MODES_WIKIDATA, default=["individuel"],
+                        help="Mode(s) du benchmark wikidata : requete par joueur et/ou lots VALUES (defaut: individuel)")
+    parser.add_argument("--latence-ms", type=float, default=50.0, help="Latence fixe des services (defaut: 50)")
+    parser.add_argument("--gigue-ms", type=float, default=20.0, help="Latence aleatoire ajoutee (defaut: 20)")
+    parser.add_argument("--taux-erreur", type=float, default=0.0, help="Part de reponses 500 (defaut: 0)")
+    parser.add_argument("--taux-429", type=float, default=0.0, help="Part de reponses 429 (defaut: 0)")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Retry-After des 429 en secondes, fractions acceptees (defaut: 1)")
+    parser.add_argument("--repetitions", type=int, default=1, help="Executions de chaque benchmark (defaut: 1)")
+    parser.add_argument("--cache-chaud", action="store_true",
+                        help="Mesure un second passage, cache HTTP deja rempli")
+    parser.add_argument("--limiteur-libre", action="store_true",
+                        help="Sans les plafonds de debit des vrais hotes (mesure du code seul)")
+    parser.add_argument("--graine", type=int, default=0, help="Graine des tirages d'erreurs (defaut: 0)")
+    parser.add_argument("--json", help="Ecrit aussi les resultats dans ce fichier JSON")
+    parser.add_argument("--verbeux", action="store_true", help="Affiche la sortie des etapes")
+    args = parser.parse_args()
+
+    fixtures = charger_fixtures()
+    reseau = {"latence_ms": args.latence_ms, "gigue_ms": args.gigue_ms, "taux_erreur": args.taux_erreur,
+              "taux_429": args.taux_429, "retry_after": args.retry_after, "graine": args.graine}
+    stubs = {
+        "wikidata": serveur_wikidata(fixtures, **reseau).demarrer(),
+        "geo_api": serveur_geo(fixtures, **reseau).demarrer(),
+        "wikipedia": serveur_wikipedia(fixtures, **reseau).demarrer(),
+    }
+    rediriger_vers_stubs(stubs, args.limiteur_libre)
+
+    print("="*70)
+    print(f"BENCHMARKS INGESTION - latence {args.latence_ms:g}+{args.gigue_ms:g} ms, "
+          f"erreurs {args.taux_erreur:.0%}, 429 {args.taux_429:.0%}, "
+          f"limiteur {'libre' if args.limiteur_libre else 'reel'}, cache {'chaud' if args.cache_chaud else 'froid'}")
+    print("="*70)
+
+    resultats = []
+    try:
+        for nom in noms_benchmarks(args.benchmarks, args.mode):
+            for repetition in range(args.repetitions):
+                print(f"[BENCH] {nom} ({repetition + 1}/{args.repetitions})...")
+                resultats.append(executer_benchmark(nom, fixtures, stubs, args.cache_chaud, args.verbeux))
+    finally:
+        for stub in stubs.values():
+            stub.arreter()
+
+    afficher_resultats(resultats)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parametres": vars(args), "resultats": resultats}, f, ensure_ascii=False, indent=2)
+        print(f"\n[SAUVEGARDE] {args.json}")
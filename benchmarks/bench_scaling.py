@@ -0,0 +1,170 @@
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# --- GESTION DES IMPORTS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+racine_projet = os.path.dirname(current_dir)
+sys.path.append(current_dir)
+sys.path.append(os.path.join(racine_projet, "src", "ingestion"))
+sys.path.append(os.path.join(racine_projet, "src", "processing"))
+
+from generer_donnees import generer_jeu, BASE_PATH
+
+ETAPES = ["nettoyage", "insee", "fusion"]
+TAILLES_DEFAUT = [1_000, 10_000, 100_000]
+
+# Au-delà de ce rapport (temps par ligne d'une taille sur la précédente), l'étape n'est plus linéaire
+SEUIL_NON_LINEAIRE = 1.5
+
+
+def rss_max_mo():
+    """
+    Pic de mémoire résidente du processus, en Mo. Sous Linux, VmHWM repart de
+    zéro à l'exec (ru_maxrss hérite du pic du processus parent).
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for ligne in f:
+                if ligne.startswith("VmHWM:"):
+                    return int(ligne.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def etape_nettoyage():
+    """
+    Nettoyeurs de get_players sur des cellules brutes ("Nom (cap.)[1]", "25 avril 1994 (30 ans)")
+    puis dates typées et âges
+    """
+    from get_players import clean_names, clean_dates
+    from util.dates import ajouter_colonnes_dates
+    from util.get_schemas import lire_csv
+
+    df = lire_csv(BASE_PATH, usecols=["nom", "date_naissance"])
+    noms_bruts = df["nom"] + " (cap.)[1] "
+    dates_brutes = df["date_naissance"] + " (30 ans)"
+
+    debut = time.perf_counter()
+    df["nom"] = clean_names(noms_bruts)
+    df["date_naissance"] = clean_dates(dates_brutes)
+    ajouter_colonnes_dates(df)
+    return time.perf_counter() - debut
+
+
+def etape_insee():
+    """
+    Étape INSEE complète, hors ligne sur l'index des communes généré
+    """
+    import get_insee_data
+
+    debut = time.perf_counter()
+    get_insee_data.enrich_with_insee(hors_ligne=True, incremental=False)
+    return time.perf_counter() - debut
+
+
+def etape_fusion():
+    import fusion
+
+    fusion.parent_dir = os.path.join(os.getcwd(), "src")
+    os.makedirs(fusion.parent_dir, exist_ok=True)
+    debut = time.perf_counter()
+    fusion.main(parquet=False)
+    return time.perf_counter() - debut
+
+
+FONCTIONS = {
+    "nettoyage": etape_nettoyage,
+    "insee": etape_insee,
+    "fusion": etape_fusion,
+}
+
+
+def executer_etape(etape, dossier):
+    """
+    Exécuté dans un processus dédié : mesure la durée et le pic de mémoire d'une seule étape
+    """
+    os.chdir(dossier)
+    rss_avant = rss_max_mo()
+    with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+        duree = FONCTIONS[etape]()
+    print(json.dumps({"duree_s": duree, "rss_avant_mo": rss_avant, "rss_max_mo": rss_max_mo()}))
+
+
+def mesurer(etape, dossier):
+    resultat = subprocess.run([sys.executable, os.path.abspath(__file__), "--executer", etape, "--dossier", dossier],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if resultat.returncode != 0:
+        print(f"[ERREUR] Etape {etape} en echec :\n{resultat.stderr[-2000:]}")
+        return None
+    return json.loads(resultat.stdout.strip().splitlines()[-1])
+
+
+def afficher_resultats(resultats):
+    print(f"\n{'etape':10s} {'lignes':>10s} {'duree':>9s} {'us/ligne':>9s} {'facteur':>8s} "
+          f"{'RSS pic':>9s} {'RSS etape':>10s}")
+    precedents = {}
+    for r in resultats:
+        par_ligne = r["duree_s"] / r["lignes"] * 1e6
+        precedent = precedents.get(r["etape"])
+        facteur = par_ligne / precedent if precedent else None
+        precedents[r["etape"]] = par_ligne
+        alerte = " [!] non lineaire" if facteur and facteur > SEUIL_NON_LINEAIRE else ""
+        print(f"{r['etape']:10s} {r['lignes']:10d} {r['duree_s']:8.2f}s {par_ligne:9.2f} "
+              f"{'-' if facteur is None else f'{facteur:.2f}':>8s} {r['rss_max_mo']:8.0f}M "
+              f"{r['rss_max_mo'] - r['rss_avant_mo']:9.0f}M{alerte}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps et memoire des etapes pandas selon le nombre de joueurs")
+    parser.add_argument("--tailles", nargs="+", type=int, default=TAILLES_DEFAUT,
+                        help="Nombres de joueurs generes (defaut: 1000 10000 100000)")
+    parser.add_argument("--etapes", nargs="+", choices=ETAPES, default=ETAPES,
+                        help="Etapes mesurees (defaut: toutes)")
+    parser.add_argument("--graine", type=int, default=0, help="Graine du generateur (defaut: 0)")
+    parser.add_argument("--garder", action="store_true", help="Conserve les jeux generes (chemins affiches)")
+    parser.add_argument("--json", help="Ecrit aussi les resultats dans ce fichier JSON")
+    parser.add_argument("--executer", choices=ETAPES, help=argparse.SUPPRESS)
+    parser.add_argument("--dossier", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.executer:
+        executer_etape(args.executer, args.dossier)
+        sys.exit(0)
+
+    print("="*70)
+    print(f"MESURES DE PASSAGE A L'ECHELLE - {', '.join(args.etapes)}")
+    print("="*70)
+
+    resultats = []
+    for taille in sorted(args.tailles):
+        dossier = tempfile.mkdtemp(prefix=f"bench_scaling_{taille}_")
+        debut = time.perf_counter()
+        with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+            generer_jeu(dossier, taille, args.graine)
+        print(f"[GENERATION] {taille} joueurs en {time.perf_counter() - debut:.1f}s -> {dossier}")
+
+        for etape in args.etapes:
+            mesure = mesurer(etape, dossier)
+            if mesure:
+                resultats.append({"etape": etape, "lignes": taille, **mesure})
+                print(f"   [{etape}] {mesure['duree_s']:.2f}s, pic RSS {mesure['rss_max_mo']:.0f} Mo")
+
+        if not args.garder:
+            shutil.rmtree(dossier, ignore_errors=True)
+
+    afficher_resultats(sorted(resultats, key=lambda r: (ETAPES.index(r["etape"]), r["lignes"])))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parametres": vars(args), "resultats": resultats}, f, ensure_ascii=False, indent=2)
+        print(f"\n[SAUVEGARDE] {args.json}")
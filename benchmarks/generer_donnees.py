@@ -0,0 +1,245 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- GESTION DES IMPORTS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+racine_projet = os.path.dirname(current_dir)
+sys.path.append(os.path.join(racine_projet, "src", "ingestion"))
+
+from util.communes import IndexCommunes, enregistrer_index_communes
+from util.dates import formater_dates_fr, calculer_age
+from util.get_schemas import typer_dataframe
+
+# Lignes générées et écrites à la fois (borne la mémoire pour les très grands fichiers)
+TAILLE_CHUNK_DEFAUT = 1_000_000
+
+# Fichiers produits, relatifs au dossier cible (mêmes chemins que le pipeline)
+BASE_PATH = os.path.join("data", "raw", "joueurs_base.csv")
+ENRICHIS_PATH = os.path.join("data", "processed", "joueurs_enrichis.csv")
+INSEE_PATH = os.path.join("data", "processed", "joueurs_avec_insee.csv")
+INDEX_COMMUNES_PATH = os.path.join("data", "cache", "communes_index.json.gz")
+
+PRENOMS = [
+    "Kylian", "Théo", "Lucas", "Hugo", "Jules", "Ousmane", "N'Golo", "Aurélien", "Mattéo", "Rayan",
+    "Désiré", "Benjamin", "Antoine", "Olivier", "Raphaël", "Kingsley", "Adrien", "Clément", "Mathys",
+    "Warren", "Khéphren", "Maghnes", "Youssouf", "Loïc", "Noé", "Jérémy", "Ibrahima", "Dayot", "Malo",
+    "Randal", "Wissam", "Bafodé", "Léo", "Gaël", "Anthony", "Paul", "Blaise", "Hatem", "Zinédine",
+    "Éric", "Frédéric", "Rémy", "Jérôme", "Sébastien", "Thierry", "Kévin", "Moussa", "Amine", "Enzo",
+]
+NOMS = [
+    "Mbappé", "Hernández", "Kanté", "Camavinga", "Tchouaméni", "Griezmann", "Giroud", "Varane", "Koundé",
+    "Thuram", "Zaïre-Emery", "Kolo Muani", "Doué", "Ekitiké", "Guendouzi", "Fofana", "Konaté",
+    "Upamecano", "Saliba", "Digne", "Gusto", "Maignan", "Samba", "Chevalier", "Barcola", "Cherki",
+    "Mateta", "Thauvin", "Akliouche", "Koné", "Olise", "Nkunku", "Dembélé", "Pavard", "Lloris",
+    "Benzema", "Ribéry", "Pogba", "Matuidi", "Sissoko", "Évra", "Sagna", "Gignac", "Payet", "Lacazette",
+    "Rabiot", "Clauss", "Lenglet", "Mendy", "Léonard", "Lemaître", "Ménez", "Nasri", "Rémy", "Gaël",
+    "Ben Arfa", "Cissé", "Diarra", "Touré", "Bakayoko", "Jallet", "Réveillère", "Debuchy", "Trézéguet",
+]
+CLUBS = [
+    "Paris Saint-Germain", "Olympique de Marseille", "Olympique lyonnais", "AS Monaco", "LOSC Lille",
+    "Stade rennais FC", "OGC Nice", "RC Lens", "FC Nantes", "Stade de Reims", "Real Madrid",
+    "FC Barcelone", "Atlético de Madrid", "Bayern Munich", "Borussia Dortmund", "Liverpool FC",
+    "Manchester City", "Arsenal FC", "Chelsea FC", "Crystal Palace", "AC Milan", "Inter Milan",
+    "Juventus FC", "Eintracht Francfort", "Al-Nassr FC",
+]
+PAYS_ETRANGERS = [
+    "Sénégal", "Côte d'Ivoire", "Cameroun", "République démocratique du Congo", "République du Congo",
+    "Mali", "Algérie", "Maroc", "Portugal", "Espagne", "Belgique", "Allemagne", "Guinée", "Haïti", "Suisse",
+]
+
+# Communes de naissance (format API Geo, surface en hectares ; chiffres arrondis)
+COMMUNES = [
+    ("Paris", "75056", 2133111, 10540, "75", "11", ["75001"]),
+    ("Marseille", "13055", 873076, 24062, "13", "93", ["13001"]),
+    ("Lyon", "69123", 522250, 4787, "69", "84", ["69001"]),
+    ("Toulouse", "31555", 504078, 11830, "31", "76", ["31000"]),
+    ("Nice", "06088", 348085, 7192, "06", "93", ["06000"]),
+    ("Nantes", "44109", 323204, 6519, "44", "52", ["44000"]),
+    ("Bordeaux", "33063", 261804, 4936, "33", "75", ["33000"]),
+    ("Lille", "59350", 236710, 3483, "59", "32", ["59000"]),
+    ("Reims", "51454", 180318, 4706, "51", "44", ["51100"]),
+    ("Saint-Étienne", "42218", 173089, 7997, "42", "84", ["42000"]),
+    ("Le Havre", "76351", 165830, 4695, "76", "28", ["76600"]),
+    ("Villeurbanne", "69266", 156928, 1452, "69", "84", ["69100"]),
+    ("Saint-Denis", "97411", 153810, 14279, "974", "04", ["97400"]),
+    ("Saint-Denis", "93066", 113942, 1236, "93", "11", ["93200"]),
+    ("Orléans", "45234", 116344, 2748, "45", "24", ["45000"]),
+    ("Montreuil", "93048", 111367, 892, "93", "11", ["93100"]),
+    ("Rouen", "76540", 114007, 2138, "76", "28", ["76000"]),
+    ("Argenteuil", "95018", 111300, 1721, "95", "11", ["95100"]),
+    ("Créteil", "94028", 93454, 1146, "94", "11", ["94000"]),
+    ("Aubervilliers", "93001", 88948, 576, "93", "11", ["93300"]),
+    ("Colombes", "92025", 86534, 781, "92", "11", ["92700"]),
+    ("Sarcelles", "95585", 58587, 843, "95", "11", ["95200"]),
+    ("Champigny-sur-Marne", "94017", 77409, 1130, "94", "11", ["94500"]),
+    ("Cayenne", "97302", 62675, 2452, "973", "03", ["97300"]),
+    ("Les Abymes", "97101", 52859, 8130, "971", "01", ["97139"]),
+    ("Fort-de-France", "97209", 76512, 4433, "972", "02", ["97200"]),
+    ("Ajaccio", "2A004", 73722, 8203, "2A", "94", ["20000"]),
+    ("Bastia", "2B033", 48503, 1938, "2B", "94", ["20200"]),
+    ("Évreux", "27229", 46707, 2645, "27", "28", ["27000"]),
+    ("Meaux", "77284", 56659, 1484, "77", "11", ["77100"]),
+    ("Bondy", "93010", 54029, 550, "93", "11", ["93140"]),
+    ("Sevran", "93071", 51225, 731, "93", "11", ["93270"]),
+    ("Calais", "62193", 67544, 3350, "62", "32", ["62100"]),
+    ("Épinay-sur-Seine", "93031", 55593, 457, "93", "11", ["93800"]),
+    ("L'Haÿ-les-Roses", "94038", 31514, 390, "94", "11", ["94240"]),
+    ("Décines-Charpieu", "69275", 28718, 1696, "69", "84", ["69150"]),
+    ("Lagny-sur-Marne", "77243", 21928, 573, "77", "11", ["77400"]),
+    ("Tremblay-en-France", "93073", 36417, 2246, "93", "11", ["93290"]),
+    ("Besançon", "25056", 119198, 6505, "25", "27", ["25000"]),
+    ("Clichy-sous-Bois", "93014", 29348, 395, "93", "11", ["93390"]),
+]
+# Arrondissements municipaux : (ville, code INSEE du 1er, nombre, premier code postal)
+ARRONDISSEMENTS = [("Paris", 75101, 20, 75001), ("Lyon", 69381, 9, 69001), ("Marseille", 13201, 16, 13001)]
+
+# Répartition des lieux de naissance
+PART_ETRANGER = 0.2
+PART_ARRONDISSEMENT = 0.15
+PART_VILLE_INCONNUE = 0.03
+PART_SANS_WIKIDATA = 0.05
+
+
+def communes_geo():
+    """
+    Référentiel des communes et arrondissements au format de l'API Geo
+    """
+    champs = ["nom", "code", "population", "surface", "codeDepartement", "codeRegion", "codesPostaux"]
+    communes = [dict(zip(champs, c)) for c in COMMUNES]
+    arrondissements = []
+    for ville, premier_code, nombre, premier_cp in ARRONDISSEMENTS:
+        parent = next(c for c in communes if c["nom"] == ville)
+        for numero in range(1, nombre + 1):
+            arrondissements.append({
+                "nom": f"{ville} {numero}{'er' if numero == 1 else 'e'} Arrondissement",
+                "code": str(premier_code + numero - 1),
+                "population": None, "surface": None,
+                "codeDepartement": parent["codeDepartement"], "codeRegion": parent["codeRegion"],
+                "codesPostaux": [str(premier_cp + numero - 1).zfill(5)],
+                "codeParent": parent["code"],
+            })
+    return communes, arrondissements
+
+
+def lieux_de_naissance():
+    """
+    Libellés de lieux de naissance tels que Wikidata les donne, par catégorie
+    """
+    francais = sorted({c[0] for c in COMMUNES} | {"Saint-Denis (La Réunion)"})
+    arrondissements = [f"{numero}{'er' if numero == 1 else 'e'} arrondissement de {ville}"
+                       for ville, _, nombre, _ in ARRONDISSEMENTS for numero in range(1, nombre + 1)]
+    etrangers = [f"etranger ({pays})" for pays in PAYS_ETRANGERS]
+    inconnus = ["Lieu-dit Inexistant", "Village Disparu", "Ville Imaginaire"]
+    return francais, arrondissements, etrangers, inconnus
+
+
+def generer_chunk(debut, taille, hasard, table_insee):
+    """
+    Génère `taille` joueurs (numéros de ligne à partir de `debut`) avec toutes
+    les colonnes du pipeline : base, Wikidata et INSEE
+    """
+    noms = (pd.Series(np.array(PRENOMS, dtype=object)[hasard.integers(0, len(PRENOMS), taille)])
+            + " " + np.array(NOMS, dtype=object)[hasard.integers(0, len(NOMS), taille)])
+    # Un quart de noms composés ("Kylian Mbappé-Kanté") pour varier les libellés
+    composes = hasard.random(taille) < 0.25
+    noms[composes] = noms[composes] + "-" + np.array(NOMS, dtype=object)[hasard.integers(0, len(NOMS), composes.sum())]
+
+    jours = hasard.integers(0, (pd.Timestamp("2007-12-31") - pd.Timestamp("1975-01-01")).days, taille)
+    naissances = pd.Series(pd.Timestamp("1975-01-01") + pd.to_timedelta(jours, unit="D"))
+
+    francais, arrondissements, etrangers, inconnus = lieux_de_naissance()
+    tirage = hasard.random(taille)
+    villes = np.array(francais, dtype=object)[hasard.integers(0, len(francais), taille)]
+    seuils = np.cumsum([PART_ETRANGER, PART_ARRONDISSEMENT, PART_VILLE_INCONNUE])
+    for seuil_bas, seuil_haut, lieux in zip([0, *seuils[:-1]], seuils, [etrangers, arrondissements, inconnus]):
+        masque = (tirage >= seuil_bas) & (tirage < seuil_haut)
+        villes[masque] = np.array(lieux, dtype=object)[hasard.integers(0, len(lieux), masque.sum())]
+
+    sans_wikidata = hasard.random(taille) < PART_SANS_WIKIDATA
+    tailles = np.round(hasard.normal(1.81, 0.07, taille), 2)
+
+    df = pd.DataFrame({
+        "numero": hasard.integers(1, 27, taille),
+        "nom": noms,
+        "date_naissance": formater_dates_fr(naissances),
+        "date_naissance_iso": naissances,
+        "age": calculer_age(naissances),
+        "club": np.array(CLUBS, dtype=object)[hasard.integers(0, len(CLUBS), taille)],
+        "wikidata_id": pd.Series([f"Q{q}" for q in range(10_000_000 + debut, 10_000_000 + debut + taille)],
+                                 dtype="string"),
+        "taille_m": tailles,
+        "ville_naissance": villes,
+    })
+    df.loc[sans_wikidata, ["wikidata_id", "taille_m", "ville_naissance"]] = None
+
+    insee = table_insee.reindex(df["ville_naissance"])
+    insee.index = df.index
+    return pd.concat([df, insee], axis=1)
+
+
+def ecrire_chunk(df, chemin, premier):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    typer_dataframe(df).to_csv(chemin, index=False, mode="w" if premier else "a", header=premier,
+                               encoding="utf-8-sig" if premier else "utf-8")
+
+
+def generer_jeu(dossier, nb_joueurs, graine=0, taille_chunk=TAILLE_CHUNK_DEFAUT):
+    """
+    Écrit dans `dossier` un jeu synthétique complet aux chemins du pipeline :
+    joueurs_base.csv, joueurs_enrichis.csv, joueurs_avec_insee.csv et l'index
+    local des communes (pour exécuter l'étape INSEE hors ligne).
+
+    Les lieux de naissance mêlent communes (dont homonymes et DOM-TOM),
+    arrondissements de Paris, Lyon et Marseille, naissances à l'étranger et
+    lieux introuvables ; les colonnes INSEE sont celles que l'index résout.
+
+    Returns:
+        Dict: Chemins des fichiers générés
+    """
+    communes, arrondissements = communes_geo()
+    chemin_index = os.path.join(dossier, INDEX_COMMUNES_PATH)
+    enregistrer_index_communes(communes, arrondissements, chemin_index)
+
+    # Résultat INSEE de chaque lieu possible, calculé une fois par l'index du pipeline
+    index_communes = IndexCommunes(communes, arrondissements)
+    lieux = [lieu for categorie in lieux_de_naissance() for lieu in categorie]
+    table_insee = pd.DataFrame.from_dict({lieu: index_communes.rechercher(lieu) for lieu in lieux},
+                                         orient="index", dtype=object)
+
+    hasard = np.random.default_rng(graine)
+    chemins = {nom: os.path.join(dossier, chemin) for nom, chemin in
+               [("base", BASE_PATH), ("enrichis", ENRICHIS_PATH), ("insee", INSEE_PATH)]}
+    colonnes_base = ["numero", "nom", "date_naissance", "date_naissance_iso", "age", "club"]
+    colonnes_enrichis = colonnes_base + ["wikidata_id", "taille_m", "ville_naissance"]
+
+    for debut in range(0, nb_joueurs, taille_chunk):
+        df = generer_chunk(debut, min(taille_chunk, nb_joueurs - debut), hasard, table_insee)
+        premier = debut == 0
+        ecrire_chunk(df[colonnes_base], chemins["base"], premier)
+        ecrire_chunk(df[colonnes_enrichis], chemins["enrichis"], premier)
+        ecrire_chunk(df, chemins["insee"], premier)
+
+    chemins["index_communes"] = chemin_index
+    return chemins
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genere un jeu de joueurs synthetique de taille arbitraire")
+    parser.add_argument("nb_joueurs", type=int, help="Nombre de joueurs a generer")
+    parser.add_argument("--dossier", default=os.path.join("data", "synthetique"),
+                        help="Dossier cible (defaut: data/synthetique)")
+    parser.add_argument("--graine", type=int, default=0, help="Graine aleatoire (defaut: 0)")
+    parser.add_argument("--taille-chunk", type=int, default=TAILLE_CHUNK_DEFAUT,
+                        help=f"Lignes generees et ecrites a la fois (defaut: {TAILLE_CHUNK_DEFAUT})")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    chemins = generer_jeu(args.dossier, args.nb_joueurs, args.graine, args.taille_chunk)
+    print(f"[SUCCES] {args.nb_joueurs} joueurs generes en {time.perf_counter() - debut:.1f}s")
+    for chemin in chemins.values():
+        print(f"   - {chemin}")
@@ -0,0 +1,285 @@
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+# --- GESTION DES IMPORTS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+racine_projet = os.path.dirname(current_dir)
+sys.path.append(os.path.join(racine_projet, "src", "ingestion"))
+
+from util.communes import normaliser_nom
+from util.get_schemas import lire_csv
+
+# Fichiers d'une exécution réelle du pipeline, rejoués par les serveurs locaux
+BASE_PATH = os.path.join(racine_projet, "data", "raw", "joueurs_base.csv")
+ENRICHIS_PATH = os.path.join(racine_projet, "data", "processed", "joueurs_enrichis.csv")
+INSEE_PATH = os.path.join(racine_projet, "data", "processed", "joueurs_avec_insee.csv")
+
+TITRE_PAGE = "Equipe_de_France_de_football"
+REVISION_PAGE = 1000001
+
+PATTERN_VALUES = re.compile(r"VALUES\s+\?label\s*\{(.*?)\}", re.DOTALL)
+PATTERN_LIBELLE = re.compile(r'"((?:[^"\\]|\\.)*)"@(\w+)')
+PATTERN_LIBELLE_SEUL = re.compile(r'rdfs:label\s+"((?:[^"\\]|\\.)*)"@(\w+)\s*\.')
+
+
+def sans_accents(texte):
+    return "".join(c for c in unicodedata.normalize("NFD", texte) if unicodedata.category(c) != "Mn")
+
+
+def binding_wikidata(ligne):
+    """
+    Résultat SPARQL (format JSON de query.wikidata.org) d'un joueur enrichi
+    """
+    binding = {"item": {"type": "uri", "value": f"http://www.wikidata.org/entity/{ligne['wikidata_id']}"}}
+    if pd.notna(ligne["taille_m"]):
+        binding["height"] = {"type": "literal", "value": str(round(float(ligne["taille_m"]) * 100))}
+    ville = ligne["ville_naissance"]
+    if pd.notna(ville):
+        etranger = re.match(r"etranger \((.*)\)", ville)
+        pays = etranger.group(1) if etranger else "France"
+        binding["birthPlaceLabel"] = {"type": "literal", "value": pays if etranger else ville}
+        binding["countryLabel"] = {"type": "literal", "value": pays}
+    return binding
+
+
+def commune_geo(ligne):
+    """
+    Commune au format de l'API Geo (surface en hectares) à partir des colonnes commune_*
+    """
+    return {
+        "nom": ligne["commune_nom"],
+        "code": ligne["commune_code_postal"],
+        "population": int(ligne["commune_population"]),
+        "surface": round(float(ligne["commune_surface_km2"]) * 100),
+        "codeDepartement": ligne["commune_departement"],
+        "codeRegion": ligne["commune_region"],
+        "codesPostaux": [ligne["commune_code_postal"]] if pd.notna(ligne["commune_code_postal"]) else [],
+    }
+
+
+def construire_page_effectif(df_base, revision=REVISION_PAGE):
+    """
+    Page Wikipédia minimale : un tableau "toccolours" au format de l'article
+    de l'équipe de France, entouré d'un tableau de navigation à ignorer
+    """
+    lignes = "\n".join(
+        f"<tr><td>{'' if pd.isna(j.numero) else int(j.numero)}</td><td>{j.nom} (cap.)</td>"
+        f"<td>{j.date_naissance} (30 ans)</td><td>{j.club}</td><td>0</td></tr>"
+        for j in df_base.itertuples()
+    )
+    return (
+        f'<html><head><script>RLCONF={{"wgRevisionId":{revision}}};</script></head><body>'
+        '<table class="wikitable navbox"><tr><td>Navigation</td></tr></table>'
+        '<table class="toccolours" style="width:100%">'
+        "<tr><th>N°</th><th>Nom</th><th>Date de naissance</th><th>Club</th><th>Sél.</th></tr>"
+        '<tr><td colspan="5">Gardiens</td></tr>\n'
+        f"{lignes}</table></body></html>"
+    )
+
+
+def charger_fixtures(base_path=BASE_PATH, enrichis_path=ENRICHIS_PATH, insee_path=INSEE_PATH):
+    """
+    Réponses enregistrées des trois services, reconstruites depuis les
+    fichiers du dernier passage réel du pipeline :
+    libellé -> binding SPARQL, nom normalisé -> commune API Geo, HTML de la page d'effectif.
+
+    Returns:
+        Dict: {"joueurs", "enrichis", "wikidata", "communes", "html"}
+    """
+    base = lire_csv(base_path)
+    enrichis = lire_csv(enrichis_path)
+    insee = lire_csv(insee_path)
+
+    wikidata = {}
+    for ligne in enrichis.dropna(subset=["wikidata_id"]).to_dict("records"):
+        binding = binding_wikidata(ligne)
+        for libelle in (ligne["nom"], sans_accents(ligne["nom"])):
+            wikidata.setdefault(libelle.lower(), binding)
+
+    communes = {}
+    for ligne in insee.dropna(subset=["commune_nom"]).to_dict("records"):
+        communes.setdefault(normaliser_nom(ligne["commune_nom"]), commune_geo(ligne))
+
+    return {
+        "joueurs": base,
+        "enrichis": enrichis,
+        "wikidata": wikidata,
+        "communes": communes,
+        "html": construire_page_effectif(base),
+    }
+
+
+class ServeurStub:
+    """
+    Serveur HTTP local qui imite un service distant : latence simulée
+    (fixe + gigue aléatoire), réponses 500 et 429 (avec Retry-After) tirées
+    au hasard selon les taux configurés, et comptage de toutes les requêtes.
+
+    `repondre(chemin, params, entetes)` retourne (code, corps, en-têtes) ;
+    un corps dict/list est sérialisé en JSON.
+    """
+
+    def __init__(self, nom, repondre, latence_ms=50.0, gigue_ms=20.0, taux_erreur=0.0, taux_429=0.0,
+                 retry_after=1.0, graine=0):
+        self.nom = nom
+        self.repondre = repondre
+        self.latence_ms = latence_ms
+        self.gigue_ms = gigue_ms
+        self.taux_erreur = taux_erreur
+        self.taux_429 = taux_429
+        self.retry_after = retry_after
+        self.codes = Counter()
+        self._hasard = random.Random(graine)
+        self._lock = threading.Lock()
+        self._serveur = None
+
+    def _tirer(self):
+        with self._lock:
+            delai = (self.latence_ms + self._hasard.uniform(0, self.gigue_ms)) / 1000
+            tirage = self._hasard.random()
+        if tirage < self.taux_429:
+            return delai, 429
+        if tirage < self.taux_429 + self.taux_erreur:
+            return delai, 500
+        return delai, None
+
+    def _traiter(self, handler, corps_requete=""):
+        morceaux = urlparse(handler.path)
+        params = {cle: valeurs[0] for cle, valeurs in parse_qs(morceaux.query).items()}
+        params.update({cle: valeurs[0] for cle, valeurs in parse_qs(corps_requete).items()})
+
+        delai, code_force = self._tirer()
+        time.sleep(delai)
+        if code_force == 429:
+            code, corps, entetes = 429, "Too Many Requests", {"Retry-After": f"{self.retry_after:g}"}
+        elif code_force:
+            code, corps, entetes = 500, "Internal Server Error", {}
+        else:
+            code, corps, entetes = self.repondre(morceaux.path, params, handler.headers)
+
+        if isinstance(corps, (dict, list)):
+            corps, entetes = json.dumps(corps), dict(entetes, **{"Content-Type": "application/json"})
+        donnees = (corps or "").encode("utf-8")
+        with self._lock:
+            self.codes[code] += 1
+
+        handler.send_response(code)
+        for cle, valeur in entetes.items():
+            handler.send_header(cle, valeur)
+        handler.send_header("Content-Length", str(len(donnees)))
+        handler.end_headers()
+        if code != 304:
+            handler.wfile.write(donnees)
+
+    def demarrer(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub._traiter(self)
+
+            def do_POST(self):
+                longueur = int(self.headers.get("Content-Length") or 0)
+                stub._traiter(self, self.rfile.read(longueur).decode("utf-8"))
+
+            def log_message(self, *args):
+                pass
+
+        self._serveur = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._serveur.daemon_threads = True
+        threading.Thread(target=self._serveur.serve_forever, daemon=True).start()
+        return self
+
+    def arreter(self):
+        if self._serveur:
+            self._serveur.shutdown()
+            self._serveur.server_close()
+            self._serveur = None
+
+    @property
+    def url(self):
+        hote, port = self._serveur.server_address[:2]
+        return f"http://{hote}:{port}"
+
+    @property
+    def nb_requetes(self):
+        return sum(self.codes.values())
+
+    def reinitialiser(self):
+        with self._lock:
+            self.codes.clear()
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.arreter()
+
+
+def serveur_wikidata(fixtures, **reseau):
+    """
+    Point SPARQL : requêtes individuelles (rdfs:label "..."@fr) et groupées
+    (VALUES ?label { ... }) ; toute autre requête renvoie un résultat vide
+    """
+    def repondre(chemin, params, entetes):
+        requete = params.get("query", "")
+        bindings = []
+        bloc = PATTERN_VALUES.search(requete)
+        if bloc:
+            for libelle, langue in PATTERN_LIBELLE.findall(bloc.group(1)):
+                libelle = libelle.replace('\\"', '"').replace("\\\\", "\\")
+                binding = fixtures["wikidata"].get(libelle.lower())
+                if binding:
+                    bindings.append(dict(binding, label={"type": "literal", "xml:lang": langue, "value": libelle}))
+        else:
+            seul = PATTERN_LIBELLE_SEUL.search(requete)
+            binding = fixtures["wikidata"].get(seul.group(1).lower()) if seul else None
+            if binding:
+                bindings.append(binding)
+        return 200, {"head": {"vars": []}, "results": {"bindings": bindings}}, {}
+
+    return ServeurStub("wikidata", repondre, **reseau)
+
+
+def serveur_geo(fixtures, **reseau):
+    """
+    API Geo : GET /communes?nom=... (au plus une commune, comme avec limit=1)
+    """
+    def repondre(chemin, params, entetes):
+        commune = fixtures["communes"].get(normaliser_nom(params.get("nom", "")))
+        return 200, [commune] if commune else [], {}
+
+    return ServeurStub("geo_api", repondre, **reseau)
+
+
+def serveur_wikipedia(fixtures, revision=REVISION_PAGE, **reseau):
+    """
+    Wikipédia : la page d'effectif (/wiki/...) avec ETag et réponse 304
+    conditionnelle, et l'API MediaWiki (/w/api.php) pour l'identifiant de révision
+    """
+    etag = f'"{revision}"'
+
+    def repondre(chemin, params, entetes):
+        if chemin == "/w/api.php":
+            return 200, {"query": {"pages": [{"title": params.get("titles"),
+                                              "revisions": [{"revid": revision}]}]}}, {}
+        if chemin.startswith("/wiki/"):
+            if entetes.get("If-None-Match") == etag:
+                return 304, "", {"ETag": etag}
+            return 200, fixtures["html"], {"ETag": etag, "Content-Type": "text/html; charset=utf-8"}
+        return 404, "Not Found", {}
+
+    return ServeurStub("wikipedia", repondre, **reseau)
@@ -0,0 +1,286 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import argparse
+
+# --- GESTION DES IMPORTS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from util.communes import normaliser_nom
+from util.get_schemas import lire_csv, ecrire_csv
+from util.spatial import GrilleSpatiale
+
+# Export CSV du Recensement des équipements sportifs (RES, data.gouv.fr), plusieurs centaines de milliers de lignes
+SOURCE_PATH = "data/raw/equipements_sportifs.csv"
+INDEX_PATH = "data/cache/equipements_index.npz"
+INPUT_PATH = "data/processed/joueurs_avec_insee.csv"
+OUTPUT_PATH = "data/final/joueurs_complet.csv"
+
+# Noms de colonnes possibles selon les millésimes de l'export RES
+COLONNES_SOURCE = {
+    "code_commune": ["new_code", "inst_com_code", "com_code", "code_commune", "ComInsee"],
+    "nom_commune": ["new_name", "inst_com_nom", "com_nom", "nom_commune", "ComLib"],
+    "longitude": ["equip_x", "longitude", "EquGpsX"],
+    "latitude": ["equip_y", "latitude", "EquGpsY"],
+}
+
+TAILLE_CHUNK_DEFAUT = 100_000
+RAYON_KM_DEFAUT = 10.0
+
+EQUIPEMENTS_COLS = ["equipements_commune", "equipements_rayon", "equipements_par_1000_hab"]
+
+# Arrondissements municipaux rattachés à leur commune ("Paris 13e Arrondissement" -> "paris")
+PATTERN_ARRONDISSEMENT = r"^(paris|lyon|marseille) \d+.*$"
+
+
+def resoudre_colonnes(entete):
+    """
+    Associe chaque colonne utile à son nom dans le fichier source
+    """
+    trouvees = {}
+    for cible, candidats in COLONNES_SOURCE.items():
+        nom = next((c for c in candidats if c in entete), None)
+        if nom is None:
+            raise ValueError(f"Colonne '{cible}' introuvable (essaye: {candidats}) dans {entete[:10]}...")
+        trouvees[cible] = nom
+    return trouvees
+
+
+def departement_de(codes: pd.Series) -> pd.Series:
+    """
+    Code département d'un code commune INSEE ("97302" -> "973", "2A004" -> "2A")
+    """
+    codes = codes.astype("string")
+    return codes.str[:3].where(codes.str.startswith("97"), codes.str[:2])
+
+
+def construire_index_equipements(source=SOURCE_PATH, chemin=INDEX_PATH, separateur=";",
+                                 taille_chunk=TAILLE_CHUNK_DEFAUT):
+    """
+    Lit le recensement par chunks typés et enregistre un index compact :
+    coordonnées de tous les équipements (float32) et agrégats par commune
+    (nombre d'équipements, centre moyen).
+
+    Seules les quatre colonnes utiles sont lues ; les textes répétitifs sont
+    lus en catégories, si bien que le fichier complet n'est jamais chargé
+    sous forme de chaînes Python (dtype object).
+
+    Returns:
+        str: Chemin de l'index généré
+    """
+    entete = list(pd.read_csv(source, sep=separateur, nrows=0, encoding="utf-8-sig").columns)
+    colonnes = resoudre_colonnes(entete)
+    types = {
+        colonnes["code_commune"]: "category",
+        colonnes["nom_commune"]: "category",
+        colonnes["longitude"]: "float32",
+        colonnes["latitude"]: "float32",
+    }
+
+    latitudes, longitudes, agregats = [], [], []
+    nb_lignes = 0
+    print(f"[INDEX] Lecture de {source} par chunks de {taille_chunk} lignes...")
+
+    for numero, chunk in enumerate(pd.read_csv(source, sep=separateur, usecols=list(types), dtype=types,
+                                               chunksize=taille_chunk, encoding="utf-8-sig"), 1):
+        chunk = chunk.rename(columns={v: k for k, v in colonnes.items()})
+        nb_lignes += len(chunk)
+
+        avec_position = chunk["latitude"].notna() & chunk["longitude"].notna()
+        latitudes.append(chunk.loc[avec_position, "latitude"].to_numpy(np.float32))
+        longitudes.append(chunk.loc[avec_position, "longitude"].to_numpy(np.float32))
+
+        # Pré-agrégation par commune : sommes décomposables d'un chunk à l'autre
+        chunk["lat_pos"] = chunk["latitude"].where(avec_position)
+        chunk["lon_pos"] = chunk["longitude"].where(avec_position)
+        agregats.append(chunk.groupby(["code_commune", "nom_commune"], observed=True).agg(
+            nb=("code_commune", "size"),
+            nb_pos=("lat_pos", "count"),
+            somme_lat=("lat_pos", "sum"),
+            somme_lon=("lon_pos", "sum"),
+        ))
+        print(f"   [CHUNK {numero}] {nb_lignes} lignes")
+
+    communes = pd.concat(agregats).astype({"somme_lat": "float64", "somme_lon": "float64"})
+    communes = communes.groupby(level=[0, 1], observed=True).sum().reset_index()
+    # Un code peut apparaître sous deux libellés selon les lignes : on garde le plus fréquent
+    communes = (communes.sort_values("nb", ascending=False)
+                .groupby("code_commune", observed=True)
+                .agg(nom_commune=("nom_commune", "first"), nb=("nb", "sum"), nb_pos=("nb_pos", "sum"),
+                     somme_lat=("somme_lat", "sum"), somme_lon=("somme_lon", "sum"))
+                .reset_index())
+
+    centre_lat = (communes["somme_lat"] / communes["nb_pos"].replace(0, np.nan)).to_numpy(np.float32)
+    centre_lon = (communes["somme_lon"] / communes["nb_pos"].replace(0, np.nan)).to_numpy(np.float32)
+
+    dossier = os.path.dirname(chemin)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    np.savez_compressed(
+        chemin,
+        latitudes=np.concatenate(latitudes), longitudes=np.concatenate(longitudes),
+        code_commune=communes["code_commune"].astype(str).to_numpy(dtype="U5"),
+        nom_commune=communes["nom_commune"].astype(str).to_numpy(dtype="U"),
+        nb=communes["nb"].to_numpy(np.int32),
+        centre_lat=centre_lat, centre_lon=centre_lon,
+        source=np.array([signature_source(source)]),
+    )
+    print(f"[INDEX] {nb_lignes} equipements, {len(communes)} communes -> {chemin}")
+    return chemin
+
+
+def signature_source(source):
+    """
+    Taille et date de modification du fichier source (pour savoir si l'index est périmé)
+    """
+    infos = os.stat(source)
+    return f"{infos.st_size}:{int(infos.st_mtime)}"
+
+
+def charger_index_equipements(chemin=INDEX_PATH):
+    """
+    Charge l'index : (positions des équipements, DataFrame des communes)
+    """
+    with np.load(chemin) as donnees:
+        positions = (donnees["latitudes"], donnees["longitudes"])
+        communes = pd.DataFrame({
+            "code_commune": donnees["code_commune"],
+            "nom_commune": donnees["nom_commune"],
+            "nb": donnees["nb"],
+            "centre_lat": donnees["centre_lat"],
+            "centre_lon": donnees["centre_lon"],
+        })
+        source = str(donnees["source"][0])
+    communes["departement"] = departement_de(communes["code_commune"])
+    communes["nom_normalise"] = (communes["nom_commune"].map(normaliser_nom)
+                                 .str.replace(PATTERN_ARRONDISSEMENT, r"\1", regex=True))
+    return positions, communes, source
+
+
+def agreger_par_commune(communes):
+    """
+    Regroupe les arrondissements avec leur commune : une ligne par (département, nom normalisé)
+    """
+    communes = communes.assign(
+        somme_lat=communes["centre_lat"].astype("float64") * communes["nb"],
+        somme_lon=communes["centre_lon"].astype("float64") * communes["nb"],
+        nb_pos=communes["nb"].where(communes["centre_lat"].notna(), 0),
+    )
+    groupes = communes.groupby(["departement", "nom_normalise"]).agg(
+        nb=("nb", "sum"), nb_pos=("nb_pos", "sum"),
+        somme_lat=("somme_lat", "sum"), somme_lon=("somme_lon", "sum"),
+    )
+    groupes["centre_lat"] = groupes["somme_lat"] / groupes["nb_pos"].replace(0, np.nan)
+    groupes["centre_lon"] = groupes["somme_lon"] / groupes["nb_pos"].replace(0, np.nan)
+    return groupes[["nb", "centre_lat", "centre_lon"]]
+
+
+def enrichir_equipements(df, positions, communes, rayon_km=RAYON_KM_DEFAUT):
+    """
+    Ajoute les colonnes equipements_* à tous les joueurs en une passe :
+    jointure sur (département, commune de naissance) pour le nombre
+    d'équipements et le centre de la commune, puis comptage dans le rayon
+    via la grille spatiale pour tous les centres d'un coup.
+    """
+    par_commune = agreger_par_commune(communes)
+    cles = pd.MultiIndex.from_arrays([
+        df["commune_departement"].astype("string").fillna(""),
+        df["commune_nom"].astype("string").fillna("").map(normaliser_nom),
+    ])
+    valeurs = par_commune.reindex(cles)
+
+    grille = GrilleSpatiale(positions[0], positions[1], rayon_km)
+    dans_rayon = grille.compter_dans_rayon(valeurs["centre_lat"].to_numpy(), valeurs["centre_lon"].to_numpy())
+
+    trouve = valeurs["nb"].notna().to_numpy()
+    df["equipements_commune"] = pd.array(np.where(trouve, valeurs["nb"].fillna(0), 0), dtype="Int32")
+    df.loc[~trouve, "equipements_commune"] = pd.NA
+    df["equipements_rayon"] = pd.array(dans_rayon, dtype="Int32")
+    df.loc[valeurs["centre_lat"].isna().to_numpy(), "equipements_rayon"] = pd.NA
+
+    population = pd.to_numeric(df["commune_population"], errors="coerce").astype("float64")
+    df["equipements_par_1000_hab"] = (df["equipements_commune"].astype("float64") / population * 1000).round(2)
+    return df
+
+
+def index_a_jour(source, chemin=INDEX_PATH):
+    if not os.path.exists(chemin):
+        return False
+    with np.load(chemin) as donnees:
+        return str(donnees["source"][0]) == signature_source(source)
+
+
+def enrich_with_equipements(source=SOURCE_PATH, rayon_km=RAYON_KM_DEFAUT, separateur=";",
+                            taille_chunk=TAILLE_CHUNK_DEFAUT, reconstruire=False):
+    """
+    Enrichit le dataset avec les équipements sportifs autour du lieu de naissance
+
+    Returns:
+        bool: False si une entrée manque (rien n'est écrit)
+    """
+    print("="*70)
+    print("ENRICHISSEMENT EQUIPEMENTS SPORTIFS - Recensement national")
+    print("="*70)
+
+    if not os.path.exists(source):
+        print(f"\n[ATTENTION] Fichier source '{source}' introuvable.")
+        print("   -> Exporter le CSV du Recensement des equipements sportifs (data.gouv.fr) a cet emplacement")
+        return False
+    if not os.path.exists(INPUT_PATH):
+        print(f"\nERREUR: Fichier '{INPUT_PATH}' introuvable.")
+        print("Veuillez d'abord executer 'get_insee_data.py'")
+        return False
+
+    if reconstruire or not index_a_jour(source):
+        construire_index_equipements(source, separateur=separateur, taille_chunk=taille_chunk)
+    positions, communes, _ = charger_index_equipements()
+    print(f"[INDEX] {len(positions[0])} equipements geolocalises, {len(communes)} communes")
+
+    df = lire_csv(INPUT_PATH)
+    print(f"[CHARGEMENT] {len(df)} joueurs charges depuis {INPUT_PATH}")
+
+    df = enrichir_equipements(df, positions, communes, rayon_km)
+
+    nb_trouves = df["equipements_commune"].notna().sum()
+    print(f"\n[RESULTAT] {nb_trouves}/{len(df)} joueurs avec une commune de naissance recensee")
+    print(f"   Rayon: {rayon_km:g} km autour du centre de la commune")
+
+    ecrire_csv(df, OUTPUT_PATH, encoding="utf-8-sig")
+    print(f"\n[SAUVEGARDE] Fichier genere: {OUTPUT_PATH}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enrichissement des joueurs avec les equipements sportifs")
+    parser.add_argument("--source", default=SOURCE_PATH,
+                        help=f"CSV du recensement des equipements sportifs (defaut: {SOURCE_PATH})")
+    parser.add_argument("--separateur", default=";", help="Separateur du CSV source (defaut: ';')")
+    parser.add_argument("--rayon", type=float, default=RAYON_KM_DEFAUT,
+                        help=f"Rayon en km autour de la commune de naissance (defaut: {RAYON_KM_DEFAUT:g})")
+    parser.add_argument("--taille-chunk", type=int, default=TAILLE_CHUNK_DEFAUT,
+                        help=f"Lignes lues par chunk (defaut: {TAILLE_CHUNK_DEFAUT})")
+    parser.add_argument("--reconstruire-index", action="store_true",
+                        help="Relit le fichier source meme si l'index est a jour")
+    parser.add_argument("--index-seulement", action="store_true",
+                        help="Construit uniquement l'index (sans joueurs)")
+    args = parser.parse_args()
+    if args.rayon <= 0:
+        parser.error(f"--rayon doit etre strictement positif ({args.rayon:g})")
+
+    succes = True
+    if args.index_seulement:
+        if not os.path.exists(args.source):
+            print(f"[ATTENTION] Fichier source '{args.source}' introuvable : index non construit")
+            succes = False
+        elif args.reconstruire_index or not index_a_jour(args.source):
+            construire_index_equipements(args.source, separateur=args.separateur, taille_chunk=args.taille_chunk)
+        else:
+            # Index vérifié : daté de cette exécution pour le pipeline
+            os.utime(INDEX_PATH)
+            print(f"[INDEX] Deja a jour : {INDEX_PATH}")
+    else:
+        succes = enrich_with_equipements(args.source, args.rayon, args.separateur, args.taille_chunk,
+                                         args.reconstruire_index)
+    sys.exit(0 if succes else 1)
@@ -1,8 +1,45 @@
 import pandas as pd
 import requests
 import os
-import time
-from typing import Dict
+import sys
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
+from requests.adapters import HTTPAdapter
+
+# --- GESTION DES IMPORTS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from util.cache import get_cache
+from util.limiteur import executer_avec_limite, configurer_hote
+from util.incremental import reprendre_lignes_inchangees
+from util.get_schemas import lire_csv, ecrire_csv, typer_dataframe
+from util.metriques import (get_metriques, mesurer_etape, enregistrer_completude, ajouter_options_metriques,
+                             ecrire_rapport)
+from util.profilage import profiler, ajouter_options_profilage
+from util.communes import (IndexCommunes, charger_index_communes, construire_index_communes,
+                           formater_donnees_commune, CHEMIN_INDEX_DEFAUT)
+
+URL_API_GEO = "https://geo.api.gouv.fr/communes"
+
+# Parallélisme par défaut du client API Geo
+NB_WORKERS_DEFAUT = 8
+REQUETES_PAR_SECONDE_DEFAUT = 50.0  # Plafond du limiteur adaptatif (l'API Geo tolère ~50 req/s par IP)
+
+
+def creer_session(taille_pool: int = NB_WORKERS_DEFAUT) -> requests.Session:
+    """
+    Crée une session HTTP avec un pool de connexions keep-alive
+    dimensionné pour le nombre de requêtes simultanées
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=taille_pool)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": "Projet-Etudiant-Polytech/1.0"})
+    return session
 
 
 def nettoyer_ville(ville: str) -> str:
@@ -68,13 +105,15 @@ def extraire_arrondissement_paris(ville_originale: str) -> str:
     return None
 
 
-def get_commune_data_insee(ville: str, ville_originale: str = None) -> Dict:
+def get_commune_data_insee(ville: str, ville_originale: str = None,
+                           session: requests.Session = None) -> Dict:
     """
     Recupere les donnees geographiques et demographiques INSEE via l'API Geo.  
     
     Args:
         ville (str): Nom de la commune nettoyé
         ville_originale (str): Nom de la ville original (pour extraire l'arrondissement)
+        session (requests.Session): Session à connexions partagées (optionnelle)
     
     Returns:
         Dict: Dictionnaire avec donnees INSEE ou {} si erreur
@@ -88,30 +127,32 @@ def get_commune_data_insee(ville: str, ville_originale: str = None) -> Dict:
         return {}
     
     try: 
-        url = "https://geo.api.gouv.fr/communes"
+        url = URL_API_GEO
         params = {
             "nom": ville_clean,
             "fields": "nom,code,population,surface,codeDepartement,codeRegion,codesPostaux",
             "limit": 1
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
+        cache = get_cache()
+        data = cache.get("geo_api", url, params)
+        if data is None:
+            def appel():
+                response = (session or requests).get(url, params=params, timeout=10)
+                response.raise_for_status()
+                return response.json()
+            
+            # Débit, Retry-After, backoff et disjoncteur gérés par le limiteur de l'hôte
+            data = executer_avec_limite(url, appel)
+            cache.set("geo_api", url, data, params)
         
         if not data:
             print(f"      ATTENTION: Commune '{ville}' (nettoyee: '{ville_clean}') non trouvee")
+            cache.marquer_echec("geo_api", ville)
             return {}
         
         commune = data[0]
         
-        # Calculs
-        surface_hectares = commune.get('surface', 0)
-        surface_km2 = surface_hectares / 100
-        population = commune.get('population', 0)
-        densite = round(population / surface_km2, 2) if surface_km2 > 0 else 0
-        
         # ✅ CORRECTION MAJEURE : Gestion spéciale pour Paris
         codes_postaux = commune.get('codesPostaux', [])
         
@@ -127,15 +168,7 @@ def get_commune_data_insee(ville: str, ville_originale: str = None) -> Dict:
             # Pour les autres villes : un seul code postal
             code_postal = codes_postaux[0] if codes_postaux else None
         
-        return {
-            "commune_nom": commune.get('nom'),
-            "commune_population": population,
-            "commune_surface_km2": round(surface_km2, 2),
-            "commune_densite": densite,
-            "commune_departement": commune.get('codeDepartement'),
-            "commune_region": commune.get('codeRegion'),
-            "commune_code_postal": code_postal
-        }
+        return formater_donnees_commune(commune, code_postal)
     
     except requests.exceptions.Timeout: 
         print(f"      TIMEOUT API Geo pour '{ville}'")
@@ -148,9 +181,111 @@ def get_commune_data_insee(ville: str, ville_originale: str = None) -> Dict:
         return {}
 
 
-def enrich_with_insee():
+def resoudre_communes(villes: List[str], nb_workers: int = NB_WORKERS_DEFAUT,
+                      requetes_par_seconde: float = REQUETES_PAR_SECONDE_DEFAUT,
+                      index: IndexCommunes = None, hors_ligne: bool = False) -> Dict[str, Dict]:
+    """
+    Résout plusieurs communes, d'abord dans l'index local puis en parallèle via l'API Geo.
+
+    Si un index des communes est fourni, chaque ville est cherchée en mémoire ;
+    seules les villes introuvables localement partent vers l'API (sauf en mode
+    `hors_ligne`). Côté API, `nb_workers` requêtes au plus sont en vol en même
+    temps sur une seule session (connexions réutilisées), et le limiteur
+    adaptatif de l'hôte ne dépasse jamais `requetes_par_seconde`. Les réponses
+    déjà en cache ne consomment pas de jeton, et les villes déjà introuvables
+    (cache négatif) ne sont pas redemandées.
+
+    Returns:
+        Dict: {ville: donnees INSEE (ou {} si introuvable)}
+    """
+    resultats = {}
+    villes = list(dict.fromkeys(villes))
+
+    if index is not None:
+        for ville in villes:
+            donnees = index.rechercher(ville)
+            if donnees:
+                resultats[ville] = donnees
+        villes = [v for v in villes if v not in resultats]
+        get_metriques().incrementer("resolution_commune", len(resultats), source="index")
+        print(f"   [INDEX] {len(resultats)} communes resolues localement, {len(villes)} restantes")
+
+    cache = get_cache()
+    echecs_connus = [v for v in villes if cache.echec_connu("geo_api", v)]
+    if echecs_connus:
+        for ville in echecs_connus:
+            resultats[ville] = {}
+        villes = [v for v in villes if v not in resultats]
+        get_metriques().incrementer("resolution_commune", len(echecs_connus), source="cache negatif")
+        print(f"   [CACHE NEGATIF] {len(echecs_connus)} communes introuvables lors d'une execution precedente")
+
+    if hors_ligne:
+        get_metriques().incrementer("resolution_commune", len(villes), source="hors ligne")
+        for ville in villes:
+            print(f"   [HORS LIGNE] '{ville}' introuvable dans l'index local")
+            resultats[ville] = {}
+        return resultats
+
+    if not villes:
+        return resultats
+
+    session = creer_session(nb_workers)
+    configurer_hote(URL_API_GEO, debit_max=requetes_par_seconde)
+    lock_affichage = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=nb_workers) as executor:
+        futures = {
+            # Passer la ville originale pour extraire l'arrondissement
+            executor.submit(get_commune_data_insee, ville, ville, session): ville
+            for ville in villes
+        }
+        for idx, future in enumerate(as_completed(futures), 1):
+            ville = futures[future]
+            resultats[ville] = future.result()
+            get_metriques().incrementer("resolution_commune", source="api" if resultats[ville] else "introuvable")
+            with lock_affichage:
+                print(f"   [{idx}/{len(villes)}] '{ville}' -> '{nettoyer_ville(ville)}'")
+
+    session.close()
+    return resultats
+
+
+def appliquer_donnees_insee(df: pd.DataFrame, masque: pd.Series, cache_insee: Dict[str, Dict],
+                            insee_cols: List[str]) -> None:
+    """
+    Applique le cache {ville: donnees} aux lignes sélectionnées via une seule
+    jointure sur ville_naissance (au lieu d'un df.at par ligne et par colonne)
+    """
+    trouvees = {ville: donnees for ville, donnees in cache_insee.items() if donnees}
+    if not trouvees or not masque.any():
+        return
+
+    # dtype=object : les codes ("03") et entiers restent tels quels malgré les trous
+    table = pd.DataFrame.from_dict(trouvees, orient="index", columns=insee_cols, dtype=object)
+    valeurs = table.reindex(df.loc[masque, "ville_naissance"])
+    trouve = valeurs["commune_nom"].notna().to_numpy()
+
+    lignes = df.index[masque.to_numpy()][trouve]
+    df.loc[lignes, insee_cols] = valeurs.to_numpy()[trouve]
+
+
+@mesurer_etape("insee")
+def enrich_with_insee(nb_workers: int = NB_WORKERS_DEFAUT,
+                      requetes_par_seconde: float = REQUETES_PAR_SECONDE_DEFAUT,
+                      utiliser_index: bool = True, hors_ligne: bool = False,
+                      incremental: bool = True):
     """
     Enrichit le dataset avec les donnees INSEE (demographie, geographie)
+
+    Args:
+        nb_workers (int): Nombre de requêtes API Geo simultanées
+        requetes_par_seconde (float): Plafond global de débit vers l'API Geo
+        utiliser_index (bool): Résoudre d'abord via l'index local des communes s'il existe
+        hors_ligne (bool): Aucun appel réseau, uniquement l'index local
+        incremental (bool): Réutiliser les joueurs inchangés depuis le dernier joueurs_avec_insee.csv
+
+    Returns:
+        bool: False si le fichier d'entrée manque (rien n'est écrit)
     """
     print("="*70)
     print("ENRICHISSEMENT INSEE - Donnees demographiques et geographiques")
@@ -162,9 +297,9 @@ def enrich_with_insee():
     if not os.path.exists(input_path):
         print(f"\nERREUR: Fichier '{input_path}' introuvable.")
         print("Veuillez d'abord executer 'get_wikidata_data.py'")
-        return
+        return False
     
-    df = pd.read_csv(input_path)
+    df = lire_csv(input_path)
     print(f"\n[CHARGEMENT] {len(df)} joueurs charges depuis {input_path}")
     
     # 2. Initialiser les colonnes INSEE (SANS commune_code)
@@ -178,11 +313,17 @@ def enrich_with_insee():
         "commune_code_postal"
     ]
     
-    for col in insee_cols:
-        df[col] = None
+    output_path = "data/processed/joueurs_avec_insee.csv"
+    
+    if incremental:
+        df, a_traiter = reprendre_lignes_inchangees(df, output_path, insee_cols)
+    else:
+        for col in insee_cols:
+            df[col] = None
+        a_traiter = pd.Series(True, index=df.index)
     
     # 3. Récupérer les villes uniques (en filtrant les étrangers)
-    villes_uniques = df['ville_naissance'].dropna().unique()
+    villes_uniques = df.loc[a_traiter, 'ville_naissance'].dropna().unique()
     villes_francaises = [v for v in villes_uniques if "etranger" not in str(v).lower()]
     villes_etrangeres = [v for v in villes_uniques if "etranger" in str(v).lower()]
     
@@ -199,32 +340,30 @@ def enrich_with_insee():
     print(f"\n[ENRICHISSEMENT] Interrogation de l'API Geo INSEE...")
     print("-" * 70)
     
-    cache_insee = {}
+    index_communes = charger_index_communes() if utiliser_index else None
+    if index_communes is not None:
+        print(f"   [INDEX] Index local charge : {len(index_communes)} communes ({CHEMIN_INDEX_DEFAUT})")
+    elif hors_ligne:
+        print(f"   [ATTENTION] Mode hors ligne sans index local ({CHEMIN_INDEX_DEFAUT})")
+        print("   -> Lance 'python src/ingestion/get_insee_data.py --construire-index'")
     
-    for idx, ville in enumerate(villes_francaises, 1):
-        ville_clean = nettoyer_ville(ville)
-        print(f"   [{idx}/{len(villes_francaises)}] '{ville}' -> '{ville_clean}'")
-        
-        if ville not in cache_insee:
-            # Passer la ville originale pour extraire l'arrondissement
-            cache_insee[ville] = get_commune_data_insee(ville, ville_originale=ville)
-            time.sleep(0.5)
+    cache_insee = resoudre_communes(villes_francaises, nb_workers=nb_workers,
+                                    requetes_par_seconde=requetes_par_seconde,
+                                    index=index_communes, hors_ligne=hors_ligne)
     
     # Ajouter les villes étrangères au cache avec des valeurs vides
+    # (jamais envoyées à l'API : rien à consigner dans le cache négatif)
+    get_metriques().incrementer("resolution_commune", len(villes_etrangeres), source="etranger")
     for ville in villes_etrangeres:
         cache_insee[ville] = {}
     
     print("-" * 70)
+    get_cache().afficher_stats()
     
     # 5. Appliquer les données au DataFrame
     print(f"\n[FUSION] Application des donnees INSEE au dataset...")
     
-    for index, row in df.iterrows():
-        ville = row['ville_naissance']
-        if pd.notna(ville) and ville in cache_insee: 
-            insee_data = cache_insee[ville]
-            for key, value in insee_data.items():
-                df.at[index, key] = value
+    appliquer_donnees_insee(df, a_traiter, cache_insee, insee_cols)
     
     # 6. Statistiques
     nb_enrichis = df['commune_code_postal'].notna().sum()
@@ -234,11 +373,10 @@ def enrich_with_insee():
     print(f"   SUCCES: {nb_enrichis}/{len(df)} joueurs enrichis ({taux_succes:.1f}%)")
     print(f"   IGNORE: {nb_etrangers} joueurs nes a l'etranger")
     
-    # 7. Sauvegarde
-    os.makedirs("data/processed", exist_ok=True)
-    output_path = "data/processed/joueurs_avec_insee.csv"
-    
-    df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    # 7. Sauvegarde (colonnes typées selon le schéma : codes en texte, population en entier)
+    df = typer_dataframe(df)
+    ecrire_csv(df, output_path, encoding='utf-8-sig')
+    enregistrer_completude(df, "insee", insee_cols)
     
     print(f"\n[SAUVEGARDE] Fichier genere: {output_path}")
     
@@ -279,7 +417,39 @@ def enrich_with_insee():
     print("\n" + "="*70)
     print("ENRICHISSEMENT INSEE TERMINE")
     print("="*70)
+    return True
 
 
 if __name__ == "__main__":
-    enrich_with_insee()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Enrichissement des joueurs via l'API Geo INSEE")
+    parser.add_argument("--workers", type=int, default=NB_WORKERS_DEFAUT,
+                        help=f"Nombre de requetes simultanees (defaut: {NB_WORKERS_DEFAUT})")
+    parser.add_argument("--rps", type=float, default=REQUETES_PAR_SECONDE_DEFAUT,
+                        help=f"Plafond de requetes par seconde (defaut: {REQUETES_PAR_SECONDE_DEFAUT})")
+    parser.add_argument("--complet", action="store_true",
+                        help="Re-enrichit tous les joueurs au lieu de reutiliser les lignes inchangees")
+    parser.add_argument("--construire-index", action="store_true",
+                        help="Telecharge toutes les communes pour construire l'index local avant l'enrichissement")
+    parser.add_argument("--sans-index", action="store_true",
+                        help="Ignore l'index local et interroge uniquement l'API Geo")
+    parser.add_argument("--hors-ligne", action="store_true",
+                        help="Aucun appel reseau : resolution uniquement via l'index local")
+    parser.add_argument("--reessayer-introuvables", action="store_true",
+                        help="Oublier le cache negatif et rechercher a nouveau les communes introuvables")
+    ajouter_options_metriques(parser)
+    ajouter_options_profilage(parser)
+    args = parser.parse_args()
+
+    if args.reessayer_introuvables:
+        get_cache().vider_echecs("geo_api")
+
+    if args.construire_index:
+        construire_index_communes()
+
+    with profiler("insee", args.profile, args.profile_dossier):
+        succes = enrich_with_insee(nb_workers=args.workers, requetes_par_seconde=args.rps,
+                                   utiliser_index=not args.sans_index, hors_ligne=args.hors_ligne,
+                                   incremental=not args.complet)
+
+    ecrire_rapport("insee", args.metriques, args.prometheus)
+    sys.exit(0 if succes else 1)
\ No newline at end of file
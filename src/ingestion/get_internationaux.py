@@ -0,0 +1,179 @@
+import pandas as pd
+import os
+import sys
+import argparse
+
+# --- GESTION DES IMPORTS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from get_wikidata_data import (executer_requete, extraire_infos_binding, creer_client_sparql,
+                               INPUT_PATH, OUTPUT_PATH, WIKIDATA_COLS)
+from util.dates import calculer_age, formater_dates_fr
+from util.get_schemas import ecrire_csv
+from util.joueur import Joueur
+
+# Sélections nationales disponibles (QID Wikidata de l'équipe A)
+EQUIPES_NATIONALES = {
+    "france": "Q47774",
+}
+
+# Joueurs distincts demandés par page
+TAILLE_PAGE_DEFAUT = 500
+
+COLONNES_BASE = ["numero", "nom", "date_naissance", "date_naissance_iso", "age", "club"]
+
+
+def construire_requete_page(qid_equipe, apres=None, taille_page=TAILLE_PAGE_DEFAUT):
+    """
+    Requête d'une page de joueurs ayant porté le maillot de `qid_equipe`.
+
+    Pagination par curseur sur l'IRI du joueur : la sous-requête ne garde
+    que les joueurs dont l'IRI suit (ordre des chaînes) la dernière de la
+    page précédente, triés sur ?item lui-même. Le tri et le filtre portent
+    sur la valeur stockée, pas sur un numéro calculé par BIND pour chaque
+    ligne. Le GROUP BY ramène une ligne par joueur, avec les champs de base
+    et d'enrichissement dans la même passe.
+    """
+    curseur = ""
+    if apres:
+        echappe = apres.replace("\\", "\\\\").replace('"', '\\"')
+        curseur = f'FILTER(STR(?item) > "{echappe}")'
+    return f"""
+    SELECT ?item (SAMPLE(?labelFr) AS ?nomFr) (SAMPLE(?labelEn) AS ?nomEn)
+           (SAMPLE(?dateNaissance) AS ?dateNaissance) (SAMPLE(?height) AS ?height)
+           (SAMPLE(?birthPlaceLabel) AS ?birthPlaceLabel) (SAMPLE(?countryLabel) AS ?countryLabel)
+           (SAMPLE(?clubLabel) AS ?clubLabel)
+    WHERE {{
+      {{
+        SELECT DISTINCT ?item WHERE {{
+          ?item wdt:P54 wd:{qid_equipe} .
+          ?item wdt:P106 wd:Q937857 .
+          {curseur}
+        }}
+        ORDER BY ?item
+        LIMIT {int(taille_page)}
+      }}
+      OPTIONAL {{ ?item rdfs:label ?labelFr . FILTER(LANG(?labelFr) = "fr") }}
+      OPTIONAL {{ ?item rdfs:label ?labelEn . FILTER(LANG(?labelEn) = "en") }}
+      OPTIONAL {{ ?item wdt:P569 ?dateNaissance . }}
+      OPTIONAL {{ ?item wdt:P2048 ?height . }}
+      OPTIONAL {{
+        ?item wdt:P19 ?birthPlace .
+        ?birthPlace wdt:P17 ?country .
+        OPTIONAL {{ ?birthPlace rdfs:label ?birthPlaceLabel . FILTER(LANG(?birthPlaceLabel) = "fr") }}
+        OPTIONAL {{ ?country rdfs:label ?countryLabel . FILTER(LANG(?countryLabel) = "fr") }}
+      }}
+      OPTIONAL {{
+        # Club actuel : appartenance sans date de fin, hors sélections
+        ?item p:P54 ?appartenance .
+        ?appartenance ps:P54 ?club .
+        ?club wdt:P31 wd:Q476028 .
+        FILTER NOT EXISTS {{ ?appartenance pq:P582 ?fin . }}
+        OPTIONAL {{ ?club rdfs:label ?clubLabel . FILTER(LANG(?clubLabel) = "fr") }}
+      }}
+    }}
+    GROUP BY ?item
+    """
+
+
+def iter_pages_internationaux(sparql, equipe="france", taille_page=TAILLE_PAGE_DEFAUT):
+    """
+    Générateur de pages de joueurs (une liste de dicts par page), jusqu'à
+    épuisement de la sélection. Chaque page passe par le limiteur mais pas
+    par le cache disque : des pages relues du cache pourraient dater de
+    remplissages différents et sauter ou dupliquer des joueurs ajoutés depuis.
+    """
+    qid_equipe = EQUIPES_NATIONALES[equipe]
+    apres = None
+    numero_page = 1
+
+    while True:
+        results = executer_requete(sparql, construire_requete_page(qid_equipe, apres, taille_page),
+                                   avec_cache=False)
+        bindings = results["results"]["bindings"]
+        if not bindings:
+            return
+
+        page = []
+        for res in bindings:
+            infos = extraire_infos_binding(res)
+            page.append({
+                "nom": (res.get("nomFr") or res.get("nomEn") or {}).get("value"),
+                "date_naissance_iso": res.get("dateNaissance", {}).get("value", "")[:10] or None,
+                "club": res.get("clubLabel", {}).get("value"),
+                **infos,
+            })
+            apres = max(apres or "", res["item"]["value"])
+
+        print(f"   [PAGE {numero_page}] {len(page)} joueurs (dernier: {apres.rsplit('/', 1)[-1]})")
+        yield page
+
+        if len(bindings) < taille_page:
+            return
+        numero_page += 1
+
+
+def mettre_en_forme(page):
+    """
+    Convertit une page en DataFrame au format des fichiers du pipeline
+    (date en toutes lettres comme sur Wikipédia, date ISO typée, âge)
+    """
+    df = pd.DataFrame(page, columns=["nom", "date_naissance_iso", "club"] + WIKIDATA_COLS)
+    df["numero"] = pd.NA
+    df["date_naissance_iso"] = pd.to_datetime(df["date_naissance_iso"], errors="coerce")
+    df["date_naissance"] = formater_dates_fr(df["date_naissance_iso"])
+    df["age"] = calculer_age(df["date_naissance_iso"])
+    return df[COLONNES_BASE + WIKIDATA_COLS]
+
+
+def get_internationaux_wikidata(equipe="france", taille_page=TAILLE_PAGE_DEFAUT):
+    """
+    Récupère tous les joueurs passés par la sélection, page par page.
+
+    Returns:
+        pd.DataFrame: Colonnes de base (joueurs_base.csv) et colonnes Wikidata
+    """
+    sparql = creer_client_sparql()
+    pages = [mettre_en_forme(page) for page in iter_pages_internationaux(sparql, equipe, taille_page)]
+    if not pages:
+        return pd.DataFrame(columns=COLONNES_BASE + WIKIDATA_COLS)
+    return pd.concat(pages, ignore_index=True).dropna(subset=["nom"])
+
+
+def iter_internationaux_wikidata(equipe="france", taille_page=TAILLE_PAGE_DEFAUT):
+    """
+    Version générateur pour le pipeline en streaming : chaque Joueur arrive
+    déjà enrichi (wikidata_id, taille, lieu de naissance) dès que sa page est lue
+    """
+    sparql = creer_client_sparql()
+    for page in iter_pages_internationaux(sparql, equipe, taille_page):
+        for ligne in mettre_en_forme(page).dropna(subset=["nom"]).to_dict("records"):
+            yield Joueur(**{col: (None if pd.isna(v) else v) for col, v in ligne.items()})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestion en masse des internationaux via Wikidata")
+    parser.add_argument("--equipe", choices=sorted(EQUIPES_NATIONALES), default="france",
+                        help="Selection nationale a parcourir (defaut: france)")
+    parser.add_argument("--taille-page", type=int, default=TAILLE_PAGE_DEFAUT,
+                        help=f"Joueurs par requete (defaut: {TAILLE_PAGE_DEFAUT})")
+    args = parser.parse_args()
+
+    print("="*70)
+    print(f"INGESTION EN MASSE - Internationaux ({args.equipe}) via Wikidata")
+    print("="*70)
+
+    df = get_internationaux_wikidata(args.equipe, args.taille_page)
+    if df.empty:
+        print("[ATTENTION] Aucun joueur recupere.")
+        sys.exit(1)
+
+    # Les deux fichiers sont écrits d'un coup : l'étape Wikidata par joueur n'a plus rien à faire
+    os.makedirs(os.path.dirname(INPUT_PATH), exist_ok=True)
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    ecrire_csv(df[COLONNES_BASE], INPUT_PATH)
+    ecrire_csv(df, OUTPUT_PATH)
+
+    print(f"[SUCCES] {len(df)} joueurs recuperes ({df['wikidata_id'].notna().sum()} avec QID)")
+    print(f"[SUCCES] Sauvegarde : {INPUT_PATH} et {OUTPUT_PATH}")
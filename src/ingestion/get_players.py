@@ -1,131 +1,483 @@
 import pandas as pd
+import numpy as np
 import requests
 import os
+import sys
 import re
+import json
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import StringIO
+from typing import Dict
+from urllib.parse import urlparse, unquote
 
-def get_current_squad_wikipedia():
-    print("Recuperation des donnees...")
-    
-    url = "https://fr.wikipedia.org/wiki/%C3%89quipe_de_France_de_football"
-    headers = { "User-Agent": "Projet-Etudiant-Polytech/1.0" }
+# --- GESTION DES IMPORTS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from util.cache import get_cache
+from util.dates import ajouter_colonnes_dates
+from util.get_schemas import ecrire_csv
+from util.joueur import joueurs_depuis_dataframe
+from util.limiteur import executer_avec_limite
+from util.metriques import (get_metriques, mesurer_etape, enregistrer_completude, ajouter_options_metriques,
+                             ecrire_rapport)
+from util.profilage import profiler, ajouter_options_profilage
+
+# Motifs précompilés pour le nettoyage vectorisé des colonnes
+PATTERN_NOTES = re.compile(r"\[.*?\]")        # Renvois de notes : "[1]", "[a]"
+PATTERN_CAPITAINE = re.compile(r"\(cap\.\)")
+PATTERN_DATE_TEXTE = re.compile(r"(\d{1,2}(?:er)?\s+[^\W\d_]+\s+\d{4})")  # "25 avril 1994", "20 December 1998"
+
+PATTERN_BALISE_TABLE = re.compile(r"<(/?)table\b[^>]*>", re.IGNORECASE)
+PATTERN_CLASSE = re.compile(r"""class\s*=\s*["']([^"']*)["']""", re.IGNORECASE)
+PATTERN_REVISION = re.compile(r'"wgRevisionId"\s*:\s*(\d+)')
+
+HEADERS = {"User-Agent": "Projet-Etudiant-Polytech/1.0"}
+
+# Colonnes extraites du tableau (avant ajout des colonnes dérivées)
+COLONNES_PAGE = ["numero", "nom", "date_naissance", "club"]
+
+# Dernière version HTML de chaque page téléchargée
+DOSSIER_PAGES = os.path.join("data", "cache", "pages")
+
+# Pages des sélections : URL, langue de la page (mots-clés d'entête) et classe CSS du tableau
+EQUIPES_WIKIPEDIA = {
+    "france": {
+        "url": "https://fr.wikipedia.org/wiki/%C3%89quipe_de_France_de_football",
+        "langue": "fr",
+        "classe": "toccolours",
+    },
+    "angleterre": {
+        "url": "https://en.wikipedia.org/wiki/England_national_football_team",
+        "langue": "en",
+        "classe": "wikitable",
+    },
+}
+
+# Mots-clés reconnaissant chaque colonne dans l'entête du tableau, par langue
+COLONNES_PAR_LANGUE = {
+    "fr": {
+        "entete": ("nom", "club"),
+        "nom": ("nom", "joueur"),
+        "date_naissance": ("naissance",),
+        "club": ("club",),
+        "numero": ("n°", "num"),
+    },
+    "en": {
+        "entete": ("player", "club"),
+        "nom": ("player", "name"),
+        "date_naissance": ("birth",),
+        "club": ("club",),
+        "numero": ("no.", "no"),
+    },
+}
+
+# Pages téléchargées et parsées simultanément
+NB_WORKERS_DEFAUT = 8
+
+
+def clean_names(noms: pd.Series) -> pd.Series:
+    """
+    Nettoie toute la colonne des noms en une passe (notes, mention capitaine, espaces insécables)
+    """
+    noms = noms.astype("string")
+    return (noms.str.replace(PATTERN_NOTES, "", regex=True)
+                .str.replace(PATTERN_CAPITAINE, "", regex=True)
+                .str.replace("\u00a0", " ", regex=False)
+                .str.strip())
+
+
+def clean_dates(dates: pd.Series) -> pd.Series:
+    """
+    Garde la date en toutes lettres de toute la colonne : supprime l'âge entre
+    parenthèses ("25 avril 1994 (30 ans)") et la date ISO cachée des pages
+    anglaises ("(1998-12-20) 20 December 1998 (age 26)")
+    """
+    dates = dates.astype("string")
+    texte = dates.str.extract(PATTERN_DATE_TEXTE, expand=False)
+    return texte.fillna(dates.str.split("(", n=1).str[0]).str.strip()
+
+
+def telecharger_page(url: str, entetes: Dict = None) -> requests.Response:
+    """
+    Télécharge une page Wikipédia (débit, backoff et disjoncteur gérés par le limiteur de l'hôte).
+    Avec des en-têtes conditionnels, la réponse peut être un 304 sans contenu.
+    """
+    def telecharger():
+        reponse = requests.get(url, headers=dict(HEADERS, **(entetes or {})), timeout=30)
+        reponse.raise_for_status()
+        return reponse
     
+    return executer_avec_limite(url, telecharger)
+
+
+def revision_actuelle(url: str):
+    """
+    Identifiant de la dernière révision d'un article via l'API MediaWiki
+    (quelques octets au lieu de la page complète), ou None si indisponible
+    """
+    morceaux = urlparse(url)
+    if "/wiki/" not in morceaux.path:
+        return None
+    api = f"{morceaux.scheme}://{morceaux.netloc}/w/api.php"
+    params = {
+        "action": "query", "prop": "revisions", "rvprop": "ids", "format": "json",
+        "formatversion": 2, "titles": unquote(morceaux.path.split("/wiki/", 1)[1]),
+    }
+
+    def appel():
+        reponse = requests.get(api, params=params, headers=HEADERS, timeout=10)
+        reponse.raise_for_status()
+        return reponse.json()
+
     try:
-        response = requests.get(url, headers=headers)
-        html_content = StringIO(response.text)
-        
-        # 1. EXTRACTION DES TABLEAUX
-        dfs = pd.read_html(html_content, attrs={"class": "toccolours"}, header=None)
-        
-        if not dfs:
-            print("[ERREUR] Aucun tableau trouve.")
-            return pd.DataFrame()
+        pages = executer_avec_limite(api, appel)["query"]["pages"]
+        return pages[0]["revisions"][0]["revid"]
+    except Exception:
+        return None
 
-        df_brut = dfs[0]
-        
-        # 2. SCANNER POUR TROUVER LA BONNE LIGNE D'ENTÊTE DU TABLEAU
-        header_index = -1
+
+def extraire_tableaux_html(html: str, classe: str):
+    """
+    Générateur des tableaux <table> de premier niveau dont l'attribut class
+    contient `classe`, découpés directement dans le texte HTML : seuls ces
+    fragments sont ensuite confiés à read_html, pas la page entière.
+
+    Produit des couples (fragment, attribut class complet du tableau).
+    """
+    profondeur = 0
+    debut = None
+    attribut = None
+    for balise in PATTERN_BALISE_TABLE.finditer(html):
+        if balise.group(1):  # </table>
+            if profondeur == 0:
+                continue
+            profondeur -= 1
+            if profondeur == 0 and debut is not None:
+                yield html[debut:balise.end()], attribut
+                debut = None
+        else:
+            if profondeur == 0:
+                classes = PATTERN_CLASSE.search(balise.group(0))
+                if classes and classe in classes.group(1).split():
+                    debut, attribut = balise.start(), classes.group(1)
+            profondeur += 1
+
+
+def trouver_ligne_entete(df_brut: pd.DataFrame, mots_entete) -> int:
+    """
+    Retourne l'index de la vraie ligne d'entête du tableau, ou -1
+    """
+    # On examine les 10 premières lignes d'un coup
+    debut = df_brut.head(10)
+    
+    # CRITÈRE 1 : Les mots-clés d'entête ("nom" et "club" en français) doivent être présents
+    textes = debut.fillna('').astype(str).agg(" ".join, axis=1).str.lower()
+    has_keywords = pd.Series(True, index=debut.index)
+    for mot in mots_entete:
+        has_keywords &= textes.str.contains(mot, regex=False)
+    
+    # CRITÈRE 2 : La ligne doit avoir au moins 4 cellules non-vides
+    # Cela élimine les lignes fusionnées qui mettent tout le texte dans la 1ère colonne
+    non_empty_cells = debut.count(axis=1)
+    
+    candidates = np.flatnonzero((has_keywords & (non_empty_cells >= 4)).to_numpy())
+    if not len(candidates):
+        return -1
+    i = int(candidates[0])
+    print(f"[OK] Vraie ligne d'entete trouvee a l'index {i} (avec {non_empty_cells.iloc[i]} colonnes valides)")
+    return i
+
+
+def parser_effectif(html: str, langue: str = "fr", classe: str = "toccolours") -> pd.DataFrame:
+    """
+    Extrait l'effectif d'une page Wikipédia : premier tableau de classe `classe`
+    dont l'entête contient les mots-clés de la langue (voir COLONNES_PAR_LANGUE).
+
+    Retourne les colonnes nettoyées numero, nom, date_naissance, club
+    (les colonnes dérivées sont ajoutées par `finaliser_effectif`).
+    """
+    colonnes = COLONNES_PAR_LANGUE[langue]
+    
+    # 1. EXTRACTION DES TABLEAUX (uniquement les fragments de la bonne classe)
+    # 2. SCANNER POUR TROUVER LE TABLEAU ET SA LIGNE D'ENTÊTE
+    header_index = -1
+    nb_tableaux = 0
+    for fragment, attribut in extraire_tableaux_html(html, classe):
+        nb_tableaux += 1
+        # Filtre sur la classe : les tableaux imbriqués (drapeaux, notes) ne sont pas convertis
+        df_brut = pd.read_html(StringIO(fragment), attrs={"class": attribut}, header=None)[0]
+        if not isinstance(df_brut.columns, pd.RangeIndex):
+            # Entête en <th> déjà interprétée par read_html : on la remet en première ligne
+            df_brut = pd.DataFrame([list(df_brut.columns)] + df_brut.values.tolist())
+        header_index = trouver_ligne_entete(df_brut, colonnes["entete"])
+        if header_index != -1:
+            break
+    
+    if not nb_tableaux:
+        print("[ERREUR] Aucun tableau trouve.")
+        return pd.DataFrame()
+    
+    if header_index == -1:
+        print("[ERREUR] Impossible de trouver une ligne d'entete valide (colonnes separees).")
+        # Debug :
+        print(df_brut.head(5))
+        return pd.DataFrame()
+
+    # Application de l'entête
+    df_brut.columns = df_brut.iloc[header_index]
+    df = df_brut[header_index + 1:].copy()
+    
+    # Nettoyage des noms de colonnes
+    df.columns = [str(c).strip() for c in df.columns]
+
+    # 3. MAPPING
+    new_columns = {}
+    for col in df.columns:
+        col_clean = str(col).lower().strip()
         
-        # On scanne les 10 premières lignes
-        for i in range(10):
-            row = df_brut.iloc[i]
-            
-            # CRITÈRE 1 : Le texte "nom" et "club" doit être présent
-            # ✅ CORRECTION : Utiliser fillna('') pour remplacer les NaN par des strings vides
-            row_text = " ".join(row.fillna('').astype(str).values).lower()
-            has_keywords = "nom" in row_text and "club" in row_text
-            
-            # CRITÈRE 2 : La ligne doit avoir au moins 3 cellules non-vides
-            # Cela élimine les lignes fusionnées qui mettent tout le texte dans la 1ère colonne
-            non_empty_cells = row.count() # Compte les valeurs qui ne sont pas NaN
-            
-            if has_keywords and non_empty_cells >= 4:
-                print(f"[OK] Vraie ligne d'entete trouvee a l'index {i} (avec {non_empty_cells} colonnes valides)")
-                header_index = i
+        for cible in ("nom", "date_naissance", "club", "numero"):
+            if any(mot in col_clean for mot in colonnes[cible]):
+                new_columns[col] = cible
                 break
-        
-        if header_index == -1:
-            print("[ERREUR] Impossible de trouver une ligne d'entete valide (colonnes separees).")
-            # Debug :
-            print(df_brut.head(5))
-            return pd.DataFrame()
-
-        # Application de l'entête
-        df_brut.columns = df_brut.iloc[header_index]
-        df = df_brut[header_index + 1:].copy()
-        
-        # Nettoyage des noms de colonnes
-        df.columns = [str(c).strip() for c in df.columns]
-
-        # 3. MAPPING
-        new_columns = {}
-        for col in df.columns:
-            col_clean = str(col).lower().strip()
-            
-            if "nom" in col_clean or "joueur" in col_clean:
-                new_columns[col] = "nom"
-            elif "naissance" in col_clean:
-                new_columns[col] = "date_naissance"
-            elif "club" in col_clean:
-                new_columns[col] = "club"
-            elif "n°" in col_clean or "num" in col_clean:
-                new_columns[col] = "numero"
-
-        df = df.rename(columns=new_columns)
-
-        # Vérification
-        required = ["nom", "date_naissance", "club"]
-        missing = [c for c in required if c not in df.columns]
-        if missing:
-            print(f"[ERREUR] Colonnes manquantes : {missing}")
-            print(f"Colonnes actuelles : {list(df.columns)}")
-            return pd.DataFrame()
-
-        # 4. FILTRAGE ET NETTOYAGE
-        
-        # Filtre sur le numéro (garde seulement les joueurs, vire les titres "Attaquants")
-        if 'numero' in df.columns:
-            df = df[pd.to_numeric(df['numero'], errors='coerce').notnull()]
-            df['numero'] = df['numero'].astype(float).astype(int)
-
-        def clean_name(val):
-            if pd.isna(val): return val
-            val = str(val)
-            val = re.sub(r"\[.*?\]", "", val)
-            val = val.replace("(cap.)", "")
-            return val.replace("\u00a0", " ").strip()
-
-        def clean_date(val):
-            if pd.isna(val): return val
-            return str(val).split("(")[0].strip()
-
-        df['nom'] = df['nom'].apply(clean_name)
-        df['date_naissance'] = df['date_naissance'].apply(clean_date)
-        
-        # Réorganisation propre
-        cols_final = ['numero', 'nom', 'date_naissance', 'club']
-        # On ne garde que les colonnes qui existent
-        cols_final = [c for c in cols_final if c in df.columns]
-        df = df[cols_final]
 
+    df = df.rename(columns=new_columns)
+
+    # Vérification
+    required = ["nom", "date_naissance", "club"]
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        print(f"[ERREUR] Colonnes manquantes : {missing}")
+        print(f"Colonnes actuelles : {list(df.columns)}")
+        return pd.DataFrame()
+
+    # 4. FILTRAGE ET NETTOYAGE
+    
+    # Filtre sur le numéro (garde seulement les joueurs, vire les titres "Attaquants")
+    if 'numero' in df.columns:
+        df = df[pd.to_numeric(df['numero'], errors='coerce').notnull()]
+        df['numero'] = df['numero'].astype(float).astype(int)
+
+    df['nom'] = clean_names(df['nom'])
+    df['date_naissance'] = clean_dates(df['date_naissance'])
+    
+    return df[[c for c in COLONNES_PAGE if c in df.columns]]
+
+
+def finaliser_effectif(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ajoute la date typée et l'âge, puis réorganise les colonnes
+    """
+    if df.empty:
         return df
+    
+    # Date typée (datetime64) et âge calculés une fois pour toute la colonne
+    df = ajouter_colonnes_dates(df)
+    
+    # Réorganisation propre
+    cols_final = ['numero', 'nom', 'date_naissance', 'date_naissance_iso', 'age', 'club']
+    # On ne garde que les colonnes qui existent
+    cols_final = [c for c in cols_final if c in df.columns]
+    return df[cols_final]
+
+
+def recuperer_effectif(url: str, langue: str = "fr", classe: str = "toccolours") -> pd.DataFrame:
+    """
+    Effectif d'une page, sans retélécharger ni reparser une page inchangée.
+
+    Le cache garde, pour chaque page, l'effectif déjà extrait avec ses
+    validateurs (révision MediaWiki, ETag, Last-Modified) :
+      1. même révision que celle en cache -> aucun téléchargement ;
+      2. sinon GET conditionnel (If-None-Match / If-Modified-Since) : un 304
+         réutilise l'effectif en cache ;
+      3. sinon la page est téléchargée, enregistrée dans DOSSIER_PAGES
+         (copie locale réutilisable avec --html) et seul le tableau visé est parsé.
+    """
+    cache = get_cache()
+    params = {"langue": langue, "classe": classe}
+    entree = cache.get("wikipedia", url, params)
+    
+    entetes = {}
+    if entree:
+        revid = revision_actuelle(url)
+        if revid is not None and revid == entree.get("revid"):
+            print(f"[CACHE] Page inchangee (revision {revid}) : {url}")
+            get_metriques().incrementer("page_wikipedia", resultat="revision inchangee")
+            return pd.DataFrame(entree["lignes"])
+        if entree.get("etag"):
+            entetes["If-None-Match"] = entree["etag"]
+        if entree.get("last_modified"):
+            entetes["If-Modified-Since"] = entree["last_modified"]
+    
+    reponse = telecharger_page(url, entetes)
+    if reponse.status_code == 304 and entree:
+        print(f"[CACHE] Page non modifiee (304) : {url}")
+        get_metriques().incrementer("page_wikipedia", resultat="304")
+        return pd.DataFrame(entree["lignes"])
+    
+    html = reponse.text
+    sauvegarder_page(url, html)
+    df = parser_effectif(html, langue, classe)
+    get_metriques().incrementer("page_wikipedia", resultat="telechargee")
+    
+    if not df.empty:
+        revid = PATTERN_REVISION.search(html)
+        cache.set("wikipedia", url, {
+            "revid": int(revid.group(1)) if revid else None,
+            "etag": reponse.headers.get("ETag"),
+            "last_modified": reponse.headers.get("Last-Modified"),
+            "lignes": df.astype(object).where(df.notna(), None).to_dict("records"),
+        }, params)
+    return df
+
 
+def signature_effectif(url: str, classe: str = "toccolours") -> str:
+    """
+    Signature légère de la source, pour savoir si l'effectif a pu changer :
+    l'identifiant de révision de l'article (une petite requête à l'API),
+    ou à défaut une empreinte SHA-256 des tableaux visés de la page
+    """
+    revid = revision_actuelle(url)
+    if revid is not None:
+        return f"revision:{revid}"
+    html = telecharger_page(url).text
+    empreinte = hashlib.sha256()
+    for fragment, _ in extraire_tableaux_html(html, classe):
+        empreinte.update(fragment.encode("utf-8"))
+    return f"sha256:{empreinte.hexdigest()}"
+
+
+def sauvegarder_page(url: str, html: str) -> None:
+    """
+    Conserve le HTML brut de la dernière version téléchargée (fixture locale)
+    """
+    os.makedirs(DOSSIER_PAGES, exist_ok=True)
+    nom = re.sub(r"[^\w.-]+", "_", unquote(urlparse(url).netloc + urlparse(url).path)).strip("_")
+    with open(os.path.join(DOSSIER_PAGES, f"{nom}.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+def get_squad_wikipedia(url: str, langue: str = "fr", classe: str = "toccolours") -> pd.DataFrame:
+    """
+    Récupère (via le cache de pages) et parse l'effectif d'une sélection
+    (DataFrame vide en cas d'erreur)
+    """
+    try:
+        df = finaliser_effectif(recuperer_effectif(url, langue, classe))
+        get_metriques().incrementer("joueurs_extraits", len(df))
+        return df
     except Exception as e:
-        print(f"[ERREUR] Erreur : {e}")
+        print(f"[ERREUR] Erreur ({url}) : {e}")
         import traceback
         traceback.print_exc()
         return pd.DataFrame()
 
+
+@mesurer_etape("wikipedia")
+def get_current_squad_wikipedia():
+    print("Recuperation des donnees...")
+    return get_squad_wikipedia(**EQUIPES_WIKIPEDIA["france"])
+
+
+@mesurer_etape("wikipedia")
+def get_squads_wikipedia(equipes: Dict[str, Dict], nb_workers: int = NB_WORKERS_DEFAUT) -> pd.DataFrame:
+    """
+    Récupère plusieurs effectifs en parallèle et les fusionne en un seul DataFrame.
+
+    Chaque sélection (téléchargement + parsing HTML) est traitée par un thread
+    du pool : le thread principal ne fait qu'assembler les résultats, et la
+    durée totale est proche de celle de la page la plus lente.
+
+    Args:
+        equipes (dict): {equipe: {"url": ..., "langue": "fr"|"en", "classe": ...}}
+        nb_workers (int): Nombre de pages traitées simultanément
+
+    Returns:
+        pd.DataFrame: Effectifs concaténés, avec une colonne `equipe`
+    """
+    print(f"Recuperation de {len(equipes)} effectifs ({nb_workers} workers)...")
+    effectifs = {}
+
+    with ThreadPoolExecutor(max_workers=nb_workers) as executor:
+        futures = {executor.submit(get_squad_wikipedia, **config): equipe for equipe, config in equipes.items()}
+        for idx, future in enumerate(as_completed(futures), 1):
+            equipe = futures[future]
+            effectifs[equipe] = future.result()
+            print(f"   [{idx}/{len(equipes)}] {equipe} : {len(effectifs[equipe])} joueurs")
+
+    # Ordre de la configuration, quel que soit l'ordre d'arrivée
+    morceaux = [df.assign(equipe=equipe) for equipe, df in
+                ((e, effectifs[e]) for e in equipes) if not df.empty]
+    if not morceaux:
+        return pd.DataFrame()
+    return pd.concat(morceaux, ignore_index=True)
+
+
+def charger_config_equipes(chemin: str) -> Dict[str, Dict]:
+    """
+    Charge une liste de sélections au format {equipe: {"url", "langue", "classe"}}
+    """
+    with open(chemin, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_current_squad_wikipedia():
+    """
+    Version générateur de `get_current_squad_wikipedia` : produit des
+    enregistrements Joueur compacts pour le pipeline en streaming.
+
+    Source matérialisée : l'effectif tient dans un seul tableau d'une seule
+    page, qu'il faut télécharger (ou relire du cache) en entier avant de
+    pouvoir en extraire la première ligne. Le DataFrame (quelques dizaines
+    de joueurs) est donc construit d'un bloc, puis converti ligne à ligne.
+    """
+    df = get_current_squad_wikipedia()
+    yield from joueurs_depuis_dataframe(df)
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recuperation des effectifs depuis Wikipedia")
+    parser.add_argument("--equipes", nargs="+", default=["france"],
+                        help=f"Selections a recuperer (defaut: france ; disponibles: {', '.join(EQUIPES_WIKIPEDIA)})")
+    parser.add_argument("--config", default=None,
+                        help="Fichier JSON {equipe: {url, langue, classe}} remplacant la liste integree")
+    parser.add_argument("--workers", type=int, default=NB_WORKERS_DEFAUT,
+                        help=f"Pages traitees simultanement (defaut: {NB_WORKERS_DEFAUT})")
+    parser.add_argument("--html", default=None,
+                        help=f"Parse une copie locale de la page (ex: {DOSSIER_PAGES}/...) au lieu de la telecharger")
+    ajouter_options_metriques(parser)
+    ajouter_options_profilage(parser)
+    args = parser.parse_args()
+
+    inconnues = [e for e in args.equipes if e not in EQUIPES_WIKIPEDIA]
+    if inconnues and not args.config:
+        parser.error(f"Selections inconnues : {inconnues}")
+
     os.makedirs(os.path.join("data", "raw"), exist_ok=True)
-    df = get_current_squad_wikipedia()
+    with profiler("wikipedia", args.profile, args.profile_dossier):
+        if args.html:
+            config = EQUIPES_WIKIPEDIA[args.equipes[0]]
+            with open(args.html, encoding="utf-8") as f:
+                df = finaliser_effectif(parser_effectif(f.read(), config["langue"], config["classe"]))
+        elif args.config:
+            df = get_squads_wikipedia(charger_config_equipes(args.config), nb_workers=args.workers)
+        elif args.equipes == ["france"]:
+            df = get_current_squad_wikipedia()
+        else:
+            df = get_squads_wikipedia({e: EQUIPES_WIKIPEDIA[e] for e in args.equipes}, nb_workers=args.workers)
     
     if not df.empty:
         print(f"[SUCCES] {len(df)} joueurs recuperes.")
         print(df.head())
         
         path = os.path.join("data", "raw", "joueurs_base.csv")
-        df.to_csv(path, index=False)
+        ecrire_csv(df, path)
         print(f"[SUCCES] Sauvegarde : {path}")
     else:
-        print("[ATTENTION] Toujours vide.")
\ No newline at end of file
+        print("[ATTENTION] Toujours vide.")
+
+    enregistrer_completude(df, "wikipedia")
+    ecrire_rapport("wikipedia", args.metriques, args.prometheus)
+    sys.exit(0 if not df.empty else 1)
@@ -1,8 +1,83 @@
 import pandas as pd
 from SPARQLWrapper import SPARQLWrapper, JSON
 import os
-import time
+import sys
+import json
 import unicodedata
+import argparse
+
+# --- GESTION DES IMPORTS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from util.cache import get_cache
+from util.incremental import reprendre_lignes_inchangees, cle_joueur
+from util.journal import JournalProgression
+from util.get_schemas import lire_csv, ecrire_csv
+from util.limiteur import executer_avec_limite
+from util.index_joueurs import charger_index_joueurs, enregistrer_index_joueurs, CHEMIN_INDEX_DEFAUT
+from util.metriques import (get_metriques, mesurer_etape, enregistrer_completude, ajouter_options_metriques,
+                             ecrire_rapport)
+from util.profilage import profiler, ajouter_options_profilage
+
+URL_WIKIDATA_SPARQL = "https://query.wikidata.org/sparql"
+
+# Nombre de libellés envoyés par requête SPARQL en mode batch
+TAILLE_CHUNK_DEFAUT = 50
+# Au-delà, l'URL de la requête (GET) dépasse la limite du point d'accès (414 URI Too Long)
+TAILLE_CHUNK_MAX = 100
+
+# Colonnes ajoutées par cette étape
+WIKIDATA_COLS = ["wikidata_id", "taille_m", "ville_naissance"]
+
+INPUT_PATH = "data/raw/joueurs_base.csv"
+OUTPUT_PATH = "data/processed/joueurs_enrichis.csv"
+JOURNAL_PATH = "data/processed/joueurs_enrichis.journal.jsonl"
+
+# Corrections maintenues à la main (joueurs que les requêtes ne trouvent pas correctement)
+CORRECTIONS_PATH = "data/overrides/corrections_wikidata.json"
+
+
+def charger_corrections(chemin=CORRECTIONS_PATH):
+    """
+    Charge le fichier de corrections manuelles {nom: {wikidata_id, taille_m, ville_naissance}}.
+    Les champs hors WIKIDATA_COLS (ex: "note") sont ignorés.
+    """
+    if not os.path.exists(chemin):
+        return {}
+    with open(chemin, encoding="utf-8") as f:
+        corrections = json.load(f)
+    return {
+        nom: {col: infos.get(col) for col in WIKIDATA_COLS}
+        for nom, infos in corrections.items()
+    }
+
+
+# Chargées une seule fois, à l'import du module
+CORRECTIONS_MANUELLES = charger_corrections()
+
+# Équipe de France de football (P54 = membre de l'équipe sportive)
+QID_EQUIPE_DE_FRANCE = "Q47774"
+
+REQUETE_INTERNATIONAUX = f"""
+SELECT ?item ?label ?dateNaissance ?height ?birthPlaceLabel ?countryLabel
+WHERE {{
+  ?item wdt:P54 wd:{QID_EQUIPE_DE_FRANCE} .
+  ?item wdt:P106 wd:Q937857 .
+  {{ ?item rdfs:label ?label . }} UNION {{ ?item skos:altLabel ?label . }}
+  FILTER(LANG(?label) IN ("fr", "en"))
+  OPTIONAL {{ ?item wdt:P569 ?dateNaissance . }}
+  OPTIONAL {{ ?item wdt:P2048 ?height . }}
+  OPTIONAL {{
+    ?item wdt:P19 ?birthPlace .
+    ?birthPlace wdt:P17 ?country .
+  }}
+  SERVICE wikibase:label {{ bd:serviceParam wikibase:language "fr,en". }}
+}}
+"""
+
+_index_joueurs = None
+_index_joueurs_charge = False
 
 def remove_accents(text):
     """
@@ -13,30 +88,123 @@ def remove_accents(text):
     nfd = unicodedata.normalize('NFD', text)
     return ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
 
-def get_wikidata_info(nom_joueur, sparql):
+def executer_requete(sparql, query, avec_cache=True):
+    """
+    Exécute une requête SPARQL en passant par le cache disque partagé
+    (sauf `avec_cache=False`, pour les lectures qui doivent être fraîches)
+    """
+    cache = get_cache()
+    params = {"endpoint": getattr(sparql, "endpoint", None)}
+    if avec_cache:
+        results = cache.get("wikidata", query, params)
+        if results is not None:
+            return results
+
+    sparql.setQuery(query)
+    # Débit adaptatif, Retry-After, backoff et disjoncteur gérés par le limiteur de l'hôte
+    results = executer_avec_limite(sparql.endpoint, lambda: sparql.query().convert())
+    if avec_cache:
+        cache.set("wikidata", query, results, params)
+    return results
+
+def extraire_infos_binding(res):
+    """
+    Convertit un résultat SPARQL (binding) en dictionnaire joueur
+    (wikidata_id, taille_m, ville_naissance)
+    """
+    # Extraction sécurisée
+    w_id = res["item"]["value"].split("/")[-1]
+    raw_taille = res.get("height", {}).get("value", None)
+    ville = res.get("birthPlaceLabel", {}).get("value", None)
+    pays = res.get("countryLabel", {}).get("value", None)
+
+    taille_en_m = None
+    if raw_taille:
+        try:
+            val = float(raw_taille)
+            # Logique : Si > 3, c'est des cm (ex: 185), on convertit en m (1.85)
+            if val > 3:
+                taille_en_m = val / 100
+            else:
+                taille_en_m = val
+            taille_en_m = round(taille_en_m, 2)
+        except ValueError:
+            taille_en_m = None
+
+    # Si le joueur est né à l'étranger, mettre "etranger (Pays)"
+    if ville and pays and pays.lower() != "france":
+        ville = f"etranger ({pays})"
+
+    return {
+        "wikidata_id": w_id,
+        "taille_m": taille_en_m,
+        "ville_naissance": ville
+    }
+
+def construire_index_internationaux(sparql, chemin=CHEMIN_INDEX_DEFAUT):
+    """
+    Télécharge en une seule requête tous les internationaux français
+    (libellés FR/EN, alias, date de naissance, taille, lieu de naissance)
+    et les enregistre dans l'index local des joueurs.
+
+    Returns:
+        str: Chemin du fichier d'index généré
+    """
+    print("[INDEX] Telechargement des internationaux francais depuis Wikidata...")
+    sparql.setQuery(REQUETE_INTERNATIONAUX)
+    # Pas de cache disque ici : reconstruire l'index doit redemander des données fraîches
+    results = executer_avec_limite(sparql.endpoint, lambda: sparql.query().convert())
+
+    joueurs = {}
+    for res in results["results"]["bindings"]:
+        infos = extraire_infos_binding(res)
+        joueur = joueurs.setdefault(infos["wikidata_id"], dict(infos, libelles=[], date_naissance=None))
+        joueur["libelles"].append(res["label"]["value"])
+        if "dateNaissance" in res and not joueur["date_naissance"]:
+            joueur["date_naissance"] = res["dateNaissance"]["value"][:10]
+
+    for joueur in joueurs.values():
+        joueur["libelles"] = list(dict.fromkeys(joueur["libelles"]))
+    return enregistrer_index_joueurs(list(joueurs.values()), chemin)
+
+
+def get_index_joueurs():
+    """
+    Index local des internationaux, chargé une seule fois (None s'il n'existe pas)
+    """
+    global _index_joueurs, _index_joueurs_charge
+    if not _index_joueurs_charge:
+        _index_joueurs = charger_index_joueurs()
+        _index_joueurs_charge = True
+    return _index_joueurs
+
+
+def get_wikidata_info(nom_joueur, sparql, date_naissance=None):
     """
     Récupère les informations Wikidata pour un joueur spécifique
-    Essaie plusieurs variantes du nom pour augmenter les chances de succès
+    Essaie plusieurs variantes du nom pour augmenter les chances de succès,
+    puis une correspondance approchée dans l'index local des internationaux
+    (confirmée par `date_naissance` si elle est fournie)
     """
     # Créer une version sans accents du nom
     nom_sans_accents = remove_accents(nom_joueur)
-    
-    # ✅ CORRECTION SPÉCIALE : Hugo Ekitiké existe sur Wikidata mais sans accent !
-    # ID Wikidata confirmé : Q111269183
-    corrections_manuelles = {
-        "Hugo Ekitiké": {
-            "wikidata_id": "Q111269183",
-            "taille_m": 1.90,
-            "ville_naissance": "Reims"
-        }
-    }
+    # Niveau qui a résolu (ou non) chaque joueur : "Exact FR", "index local", "introuvable"...
+    metriques = get_metriques()
     
     # Si le joueur a une correction manuelle, la retourner directement
-    if nom_joueur in corrections_manuelles:
+    if nom_joueur in CORRECTIONS_MANUELLES:
+        metriques.incrementer("resolution_wikidata", niveau="correction manuelle")
         print(f"      [OK] Correction manuelle appliquee")
-        data = corrections_manuelles[nom_joueur]
+        data = CORRECTIONS_MANUELLES[nom_joueur]
         print(f"| {data['wikidata_id']} | Taille: {data['taille_m']}m | Ville: {data['ville_naissance']}")
         return data
+
+    # Joueur déjà cherché sans succès : aucune requête avant la date de nouvelle tentative
+    cache = get_cache()
+    if cache.echec_connu("wikidata", nom_joueur):
+        metriques.incrementer("resolution_wikidata", niveau="cache negatif")
+        print(f"      [SKIP] Introuvable lors d'une execution precedente (cache negatif)")
+        return None
     
     # Essayer différentes variantes du nom
     noms_a_tester = [
@@ -81,120 +249,345 @@ def get_wikidata_info(nom_joueur, sparql):
         LIMIT 1
         """))
     
-    # Ajouter une recherche CONTAINS en dernier recours (plus lente)
-    nom_recherche = nom_sans_accents.split()[-1]  # Utiliser le nom de famille
-    queries_to_try.append((f"CONTAINS", f"""
-    SELECT DISTINCT ?item ?height ?birthPlaceLabel ?countryLabel
-    WHERE {{
-      ?item rdfs:label ?label .
-      FILTER(CONTAINS(LCASE(?label), LCASE("{nom_recherche}")))
-      ?item wdt:P31 wd:Q5 .
-      ?item wdt:P106 wd:Q937857 .
-      OPTIONAL {{ ?item wdt:P2048 ?height . }}
-      OPTIONAL {{ 
-        ?item wdt:P19 ?birthPlace .
-        ?birthPlace wdt:P17 ?country .
-      }}
-      SERVICE wikibase:label {{ bd:serviceParam wikibase:language "fr,en". }}
-    }}
-    LIMIT 1
-    """))
-    
+    erreurs = 0
     for attempt, (desc, query) in enumerate(queries_to_try, 1):
         try:
-            sparql.setQuery(query)
-            results = sparql.query().convert()
+            results = executer_requete(sparql, query)
             bindings = results["results"]["bindings"]
             
             if bindings:
+                metriques.incrementer("resolution_wikidata", niveau=desc)
                 print(f"      [OK] Trouve via {desc}", end=" ")
-                res = bindings[0]
-                
-                # Extraction sécurisée
-                w_id = res["item"]["value"].split("/")[-1]
-                raw_taille = res.get("height", {}).get("value", None)
-                ville = res.get("birthPlaceLabel", {}).get("value", None)
-                pays = res.get("countryLabel", {}).get("value", None)
-                
-                taille_en_m = None
-                if raw_taille:
-                    try:
-                        val = float(raw_taille)
-                        # Logique : Si > 3, c'est des cm (ex: 185), on convertit en m (1.85)
-                        if val > 3:
-                            taille_en_m = val / 100
-                        else:
-                            taille_en_m = val
-                        taille_en_m = round(taille_en_m, 2)
-                    except ValueError:
-                        taille_en_m = None
-                
-                # Si le joueur est né à l'étranger, mettre "etranger (Pays)"
-                if ville and pays and pays.lower() != "france":
-                    ville = f"etranger ({pays})"
-                
-                print(f"| {w_id} | Taille: {taille_en_m}m | Ville: {ville}")
-                
-                return {
-                    "wikidata_id": w_id,
-                    "taille_m": taille_en_m,
-                    "ville_naissance": ville
-                }
+                data = extraire_infos_binding(bindings[0])
+                print(f"| {data['wikidata_id']} | Taille: {data['taille_m']}m | Ville: {data['ville_naissance']}")
+                return data
             
-            # Si pas de résultat, essayer la prochaine requête avec une pause
-            if attempt < len(queries_to_try):
-                time.sleep(1.0)
+            # Si pas de résultat, essayer la prochaine requête
+            # (l'espacement des appels est géré par le limiteur de l'hôte)
                 
         except Exception as e:
             print(f"      [WARN] Erreur tentative {attempt}: {str(e)[:50]}")
-            if attempt < len(queries_to_try):
-                # Augmenter la pause après un timeout
-                time.sleep(2.0)
-                continue
+            erreurs += 1
+            continue
     
+    # Dernier recours : correspondance approchée locale (remplace l'ancien CONTAINS sur tout Wikidata)
+    index = get_index_joueurs()
+    if index is None:
+        print(f"      [INFO] Pas d'index local des joueurs ({CHEMIN_INDEX_DEFAUT}), "
+              f"lancer avec --construire-index")
+    else:
+        data = index.rechercher(nom_joueur, date_naissance)
+        if data:
+            metriques.incrementer("resolution_wikidata", niveau="index local")
+            print(f"      [OK] Trouve via index local", end=" ")
+            print(f"| {data['wikidata_id']} | Taille: {data['taille_m']}m | Ville: {data['ville_naissance']}")
+            return data
+
+    metriques.incrementer("resolution_wikidata", niveau="introuvable")
     print(f"      [ERREUR] Aucun resultat trouve apres {len(queries_to_try)} tentatives")
+    # Échec mémorisé seulement si toutes les étapes ont répondu (pas d'erreur passagère, index consulté)
+    if not erreurs and index is not None:
+        cache.marquer_echec("wikidata", nom_joueur)
     return None
 
 
-def enrich_with_wikidata_individual():
-    print("="*70)
-    print("> Demarrage de l'enrichissement (Traitement individuel ameliore)...")
-    print("="*70)
+def construire_requete_batch(labels, langue):
+    """
+    Construit une requête SPARQL qui résout plusieurs libellés d'un coup
+    via un bloc VALUES (un seul aller-retour pour tout le chunk)
+    """
+    # Echapper les guillemets et antislashs pour rester une chaîne SPARQL valide
+    valeurs = " ".join(
+        '"{}"@{}'.format(label.replace("\\", "\\\\").replace('"', '\\"'), langue)
+        for label in labels
+    )
+    langues_label = "fr" if langue == "fr" else f"{langue},fr"
+    return f"""
+    SELECT ?label ?item ?height ?birthPlaceLabel ?countryLabel
+    WHERE {{
+      VALUES ?label {{ {valeurs} }}
+      ?item rdfs:label ?label .
+      ?item wdt:P31 wd:Q5 .
+      ?item wdt:P106 wd:Q937857 .
+      OPTIONAL {{ ?item wdt:P2048 ?height . }}
+      OPTIONAL {{ 
+        ?item wdt:P19 ?birthPlace .
+        ?birthPlace wdt:P17 ?country .
+      }}
+      SERVICE wikibase:label {{ bd:serviceParam wikibase:language "{langues_label}". }}
+    }}
+    """
 
-    input_path = "data/raw/joueurs_base.csv"
-    if not os.path.exists(input_path):
-        print(" Erreur : Fichier d'entree introuvable.")
-        return
 
-    df = pd.read_csv(input_path)
-    print(f"\n[INFO] {len(df)} joueurs a traiter individuellement.\n")
+def taille_chunk(valeur) -> int:
+    """
+    Type argparse de --chunk-size : entier >= 1, ramené à TAILLE_CHUNK_MAX au-delà
+    """
+    taille = int(valeur)
+    if taille < 1:
+        raise argparse.ArgumentTypeError(f"doit etre >= 1 (recu {valeur})")
+    if taille > TAILLE_CHUNK_MAX:
+        print(f"[ATTENTION] --chunk-size {taille} ramene a {TAILLE_CHUNK_MAX} (taille maximale d'un bloc VALUES)")
+    return min(taille, TAILLE_CHUNK_MAX)
 
-    # Configuration Wikidata avec timeout augmente
-    sparql = SPARQLWrapper("https://query.wikidata.org/sparql")
+
+def get_wikidata_info_batch(joueurs, sparql, chunk_size=TAILLE_CHUNK_DEFAUT, journal=None):
+    """
+    Résout une liste de joueurs en quelques requêtes SPARQL groupées.
+
+    Les libellés candidats (nom exact + nom sans accents) sont envoyés par
+    chunks de `chunk_size` dans des blocs VALUES, d'abord en FR puis en EN
+    pour les joueurs restants. Seuls les joueurs encore introuvables passent
+    ensuite par les requêtes individuelles de `get_wikidata_info`
+    (puis par l'index local des internationaux, avec leur date de naissance).
+
+    Args:
+        joueurs (dict): {cle: (nom, date_naissance)} ; la clé (voir `cles_joueurs`)
+                        distingue les homonymes
+        sparql (SPARQLWrapper): Client SPARQL configuré
+        chunk_size (int): Nombre maximal de libellés par requête (1 à TAILLE_CHUNK_MAX)
+        journal (JournalProgression): Journal où consigner chaque chunk résolu, par clé (optionnel)
+
+    Returns:
+        Dict: {cle: infos} pour chaque joueur trouvé
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size doit etre >= 1 (recu {chunk_size})")
+    chunk_size = min(chunk_size, TAILLE_CHUNK_MAX)
+
+    # Les requêtes groupées portent sur les noms : homonymes résolus ensemble
+    cles_par_nom = {}
+    for cle, (nom, _) in joueurs.items():
+        cles_par_nom.setdefault(nom, []).append(cle)
+
+    resultats = {}
+    restants = []
+    echecs_connus = []
+    cache = get_cache()
+    metriques = get_metriques()
+
+    for nom, cles in cles_par_nom.items():
+        if nom in CORRECTIONS_MANUELLES:
+            resultats.update(dict.fromkeys(cles, CORRECTIONS_MANUELLES[nom]))
+            metriques.incrementer("resolution_wikidata", len(cles), niveau="correction manuelle")
+        elif cache.echec_connu("wikidata", nom):
+            echecs_connus.extend(cles)
+        else:
+            restants.append(nom)
+
+    if echecs_connus:
+        metriques.incrementer("resolution_wikidata", len(echecs_connus), niveau="cache negatif")
+        print(f"[BATCH] {len(echecs_connus)} joueurs introuvables lors d'une execution precedente (cache negatif)")
+        if journal is not None:
+            journal.enregistrer_lot(dict.fromkeys(echecs_connus))
+
+    for langue in ["fr", "en"]:
+        if not restants:
+            break
+
+        # Libellé candidat -> noms d'origine (un libellé peut servir à plusieurs joueurs)
+        candidats = {}
+        for nom in restants:
+            for variante in dict.fromkeys([nom, remove_accents(nom)]):
+                candidats.setdefault(variante, []).append(nom)
+
+        labels = list(candidats)
+        nb_chunks = (len(labels) + chunk_size - 1) // chunk_size
+        print(f"[BATCH] Exact {langue.upper()} : {len(restants)} joueurs, {len(labels)} libelles, {nb_chunks} requete(s)")
+
+        resolus = set()
+        for i in range(0, len(labels), chunk_size):
+            chunk = labels[i:i + chunk_size]
+            try:
+                results = executer_requete(sparql, construire_requete_batch(chunk, langue))
+                bindings = results["results"]["bindings"]
+            except Exception as e:
+                print(f"      [WARN] Erreur chunk {i // chunk_size + 1}/{nb_chunks}: {str(e)[:50]}")
+                continue
+
+            resolus_chunk = {}
+            for res in bindings:
+                label = res["label"]["value"]
+                for nom in candidats.get(label, []):
+                    # Premier résultat retenu, comme le LIMIT 1 des requêtes individuelles
+                    if nom not in resolus:
+                        resolus.add(nom)
+                        info = extraire_infos_binding(res)
+                        resolus_chunk.update(dict.fromkeys(cles_par_nom[nom], info))
+                        metriques.incrementer("resolution_wikidata", len(cles_par_nom[nom]),
+                                              niveau=f"Batch {langue.upper()}")
+            resultats.update(resolus_chunk)
+            if journal is not None and resolus_chunk:
+                journal.enregistrer_lot(resolus_chunk)
+
+        restants = [nom for nom in restants if nom not in resolus]
+
+    a_chercher = [cle for nom in restants for cle in cles_par_nom[nom]]
+    print(f"[BATCH] {len(resultats)} joueurs resolus, {len(a_chercher)} envoyes aux requetes individuelles")
+
+    for cle in a_chercher:
+        nom, date_naissance = joueurs[cle]
+        print(f"   [FALLBACK] {nom}")
+        info = get_wikidata_info(nom, sparql, date_naissance)
+        if info:
+            resultats[cle] = info
+        if journal is not None:
+            journal.enregistrer(cle, info)
+
+    return resultats
+
+
+def creer_client_sparql():
+    """
+    Configuration Wikidata avec timeout augmente
+    """
+    sparql = SPARQLWrapper(URL_WIKIDATA_SPARQL)
     sparql.addCustomHttpHeader("User-Agent", "Projet-Etudiant-Polytech/1.0")
     sparql.setReturnFormat(JSON)
     sparql.setTimeout(90)  # Augmente de 60 a 90 secondes
+    return sparql
+
+
+def charger_entree(incremental=True):
+    """
+    Charge la liste des joueurs et initialise les colonnes Wikidata.
+    En mode incrémental, les joueurs inchangés depuis la dernière exécution
+    récupèrent leurs valeurs de joueurs_enrichis.csv.
+
+    Returns:
+        Tuple: (DataFrame, masque des lignes à enrichir) ou (None, None)
+    """
+    if not os.path.exists(INPUT_PATH):
+        print(" Erreur : Fichier d'entree introuvable.")
+        return None, None
+
+    df = lire_csv(INPUT_PATH)
+
+    if incremental:
+        return reprendre_lignes_inchangees(df, OUTPUT_PATH, WIKIDATA_COLS)
 
     # Initialiser les colonnes
-    df["wikidata_id"] = None
-    df["taille_m"] = None
-    df["ville_naissance"] = None
+    for col in WIKIDATA_COLS:
+        df[col] = None
+    return df, pd.Series(True, index=df.index)
+
+
+def cles_joueurs(df):
+    """
+    Clé de chaque joueur : nom + date de naissance (voir `cle_joueur`), comme
+    le diff incrémental et la fusion, pour que deux homonymes ne partagent ni
+    leur entrée du journal ni leurs résultats
+    """
+    return cle_joueur(df[["nom", "date_naissance"]])
+
+
+def appliquer_resultats(df, masque, resultats):
+    """
+    Recopie les infos Wikidata ({cle: infos}, voir `cles_joueurs`) dans les lignes
+    sélectionnées, en une seule jointure sur la clé plutôt qu'une écriture par cellule
+    """
+    trouves = {cle: info for cle, info in resultats.items() if info}
+    if not trouves or not masque.any():
+        return
+
+    # dtype=object : garder les valeurs telles quelles (pas de conversion en float avec les trous)
+    table = pd.DataFrame.from_dict(trouves, orient="index", columns=WIKIDATA_COLS, dtype=object)
+    valeurs = table.reindex(cles_joueurs(df.loc[masque]))
+    trouve = valeurs["wikidata_id"].notna().to_numpy()
+
+    lignes = df.index[masque.to_numpy()][trouve]
+    df.loc[lignes, WIKIDATA_COLS] = valeurs.to_numpy()[trouve]
+
+
+def ouvrir_journal(df, a_traiter, reprendre):
+    """
+    Ouvre le journal de progression. En reprise, les joueurs déjà consignés
+    sont recopiés depuis le journal et retirés des lignes à traiter.
+
+    Returns:
+        Tuple: (journal, nouveau masque des lignes à traiter)
+    """
+    journal = JournalProgression(JOURNAL_PATH, reprendre=reprendre)
+    if reprendre:
+        deja_faits = a_traiter & cles_joueurs(df).isin(list(journal.entrees))
+        appliquer_resultats(df, deja_faits, journal.entrees)
+        a_traiter = a_traiter & ~deja_faits
+        print(f"[REPRISE] {int(deja_faits.sum())} joueurs repris du journal ({JOURNAL_PATH})")
+    return journal, a_traiter
+
+
+@mesurer_etape("wikidata")
+def enrich_with_wikidata_individual(incremental=True, reprendre=False):
+    """
+    Enrichissement joueur par joueur (une requête par joueur)
+
+    Returns:
+        bool: False si le fichier d'entrée manque (rien n'est écrit)
+    """
+    print("="*70)
+    print("> Demarrage de l'enrichissement (Traitement individuel ameliore)...")
+    print("="*70)
+
+    df, a_traiter = charger_entree(incremental)
+    if df is None:
+        return False
+    journal, a_traiter = ouvrir_journal(df, a_traiter, reprendre)
+    print(f"\n[INFO] {a_traiter.sum()} joueurs a traiter individuellement.\n")
+
+    sparql = creer_client_sparql()
+
+    resultats = {}
 
     # Traiter chaque joueur individuellement
-    for index, row in df.iterrows():
-        nom = row['nom']
-        print(f"[{index+1}/{len(df)}] Traitement de: {nom}")
-        
-        info = get_wikidata_info(nom, sparql)
+    lignes = df.loc[a_traiter, ["nom", "date_naissance"]]
+    for numero, (cle, nom, date_naissance) in enumerate(
+            zip(cles_joueurs(lignes), lignes["nom"], lignes["date_naissance"]), 1):
+        print(f"[{numero}/{len(lignes)}] Traitement de: {nom}")
         
-        if info:
-            df.at[index, "wikidata_id"] = info["wikidata_id"]
-            df.at[index, "taille_m"] = info["taille_m"]
-            df.at[index, "ville_naissance"] = info["ville_naissance"]
-        
-        # Pause entre chaque joueur pour respecter les limites de l'API
-        time.sleep(2.0)  # Augmente de 1.5 a 2.0 secondes
+        info = get_wikidata_info(nom, sparql, date_naissance)
+        journal.enregistrer(cle, info)
+        resultats[cle] = info
     
+    appliquer_resultats(df, a_traiter, resultats)
+    sauvegarder_resultats(df)
+    journal.terminer()
+    return True
+
+
+@mesurer_etape("wikidata")
+def enrich_with_wikidata_batch(chunk_size=TAILLE_CHUNK_DEFAUT, incremental=True, reprendre=False):
+    """
+    Enrichissement groupé : toute la liste est résolue en quelques requêtes
+    VALUES, seuls les joueurs introuvables passent par le traitement individuel
+
+    Returns:
+        bool: False si le fichier d'entrée manque (rien n'est écrit)
+    """
+    print("="*70)
+    print("> Demarrage de l'enrichissement (Traitement groupe par chunks)...")
+    print("="*70)
+
+    df, a_traiter = charger_entree(incremental)
+    if df is None:
+        return False
+    journal, a_traiter = ouvrir_journal(df, a_traiter, reprendre)
+    print(f"\n[INFO] {a_traiter.sum()} joueurs a traiter par chunks de {chunk_size}.\n")
+
+    sparql = creer_client_sparql()
+    lignes = df.loc[a_traiter & df["nom"].notna(), ["nom", "date_naissance"]]
+    joueurs = dict(zip(cles_joueurs(lignes), zip(lignes["nom"], lignes["date_naissance"])))
+    resultats = get_wikidata_info_batch(joueurs, sparql, chunk_size=chunk_size, journal=journal)
+    appliquer_resultats(df, a_traiter, resultats)
+
+    sauvegarder_resultats(df)
+    journal.terminer()
+    return True
+
+
+def sauvegarder_resultats(df):
+    """
+    Affiche les statistiques d'enrichissement et sauvegarde le fichier
+    """
     print("\n" + "="*70)
 
     # Statistiques
@@ -212,12 +605,44 @@ def enrich_with_wikidata_individual():
         print(f"\n[SUCCES] Tous les joueurs ont ete trouves sur Wikidata !")
 
     # Sauvegarde
-    os.makedirs("data/processed", exist_ok=True)
-    output_path = "data/processed/joueurs_enrichis.csv"
-    df.to_csv(output_path, index=False)
+    ecrire_csv(df, OUTPUT_PATH)
+    enregistrer_completude(df, "wikidata", WIKIDATA_COLS)
     
-    print(f"\n[SUCCES] Fichier sauvegarde : {output_path}")
+    print(f"\n[SUCCES] Fichier sauvegarde : {OUTPUT_PATH}")
+    get_cache().afficher_stats()
     print("="*70)
 
 if __name__ == "__main__":
-    enrich_with_wikidata_individual()
+    parser = argparse.ArgumentParser(description="Enrichissement des joueurs via Wikidata")
+    parser.add_argument("--mode", choices=["batch", "individuel"], default="batch",
+                        help="batch : requetes VALUES groupees (defaut), individuel : une requete par joueur")
+    parser.add_argument("--chunk-size", type=taille_chunk, default=TAILLE_CHUNK_DEFAUT,
+                        help=f"Nombre de libelles par requete en mode batch "
+                             f"(defaut: {TAILLE_CHUNK_DEFAUT}, max: {TAILLE_CHUNK_MAX})")
+    parser.add_argument("--complet", action="store_true",
+                        help="Re-enrichit tous les joueurs au lieu de reutiliser les lignes inchangees")
+    parser.add_argument("--reessayer-introuvables", action="store_true",
+                        help="Oublier le cache negatif et rechercher a nouveau les joueurs introuvables")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reprend une execution interrompue en sautant les joueurs deja dans le journal")
+    parser.add_argument("--construire-index", action="store_true",
+                        help="Telecharge tous les internationaux francais pour construire l'index local des joueurs")
+    ajouter_options_metriques(parser)
+    ajouter_options_profilage(parser)
+    args = parser.parse_args()
+
+    if args.construire_index:
+        construire_index_internationaux(creer_client_sparql())
+
+    if args.reessayer_introuvables:
+        get_cache().vider_echecs("wikidata")
+
+    with profiler("wikidata", args.profile, args.profile_dossier):
+        if args.mode == "batch":
+            succes = enrich_with_wikidata_batch(chunk_size=args.chunk_size, incremental=not args.complet,
+                                                reprendre=args.resume)
+        else:
+            succes = enrich_with_wikidata_individual(incremental=not args.complet, reprendre=args.resume)
+
+    ecrire_rapport("wikidata", args.metriques, args.prometheus)
+    sys.exit(0 if succes else 1)
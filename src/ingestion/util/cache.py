@@ -0,0 +1,281 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from util.metriques import get_metriques
+
+# Emplacement par défaut de la base de cache (relatif à la racine du projet)
+CHEMIN_CACHE_DEFAUT = os.path.join("data", "cache", "http_cache.sqlite")
+
+# Durée de vie des réponses par source, en secondes
+TTL_PAR_SOURCE = {
+    "wikidata": 30 * 24 * 3600,   # Les fiches joueurs bougent peu
+    "geo_api": 90 * 24 * 3600,    # Le référentiel des communes encore moins
+    "wikipedia": 30 * 24 * 3600,  # Effectifs extraits, revalidés par révision / ETag à chaque lecture
+}
+TTL_DEFAUT = 7 * 24 * 3600
+
+# Horizon de nouvelle tentative des échecs connus ("introuvable"), en secondes
+DUREE_ECHEC_PAR_SOURCE = {
+    "wikidata": 14 * 24 * 3600,   # Une fiche peut être créée entre deux exécutions
+    "geo_api": 90 * 24 * 3600,
+}
+DUREE_ECHEC_DEFAUT = 7 * 24 * 3600
+
+# Nombre maximal d'entrées conservées avant éviction LRU
+MAX_ENTREES_DEFAUT = 50000
+
+# Dates d'accès (LRU) gardées en mémoire avant d'être écrites en une transaction
+MAX_ACCES_EN_ATTENTE = 1000
+
+
+def normaliser_requete(requete: str) -> str:
+    """
+    Normalise une requête (SPARQL ou URL) : espaces multiples réduits,
+    indentation supprimée, pour que deux requêtes équivalentes partagent la même clé
+    """
+    return re.sub(r"\s+", " ", str(requete)).strip()
+
+
+def construire_cle(source: str, requete: str, params: Optional[Dict] = None) -> str:
+    """
+    Construit la clé de cache à partir de la source, de la requête normalisée
+    et des paramètres triés
+    """
+    contenu = json.dumps(
+        [source, normaliser_requete(requete), sorted((params or {}).items())],
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+
+
+class CacheHTTP:
+    """
+    Cache persistant des réponses HTTP (SPARQL Wikidata, API Geo) stocké dans SQLite.
+
+    - TTL par source (voir TTL_PAR_SOURCE)
+    - Éviction LRU quand le nombre d'entrées dépasse `max_entrees` ; les dates
+      d'accès des hits sont écrites par lots (au prochain `set`, ou toutes les
+      MAX_ACCES_EN_ATTENTE lectures) : une lecture n'ouvre pas de transaction
+    - Compteurs de hits / misses pour le rapport de fin d'exécution
+    - Cache négatif : les résultats "introuvable" sont mémorisés avec une date
+      de nouvelle tentative, pour ne plus rien envoyer sur le réseau d'ici là
+
+    Les valeurs stockées doivent être sérialisables en JSON. `get` retourne None
+    en cas d'absence ou d'expiration : on ne met donc jamais None en cache.
+    """
+
+    def __init__(self, chemin: str = CHEMIN_CACHE_DEFAUT, max_entrees: int = MAX_ENTREES_DEFAUT,
+                 ttl_par_source: Optional[Dict[str, int]] = None):
+        self.chemin = chemin
+        self.max_entrees = max_entrees
+        self.ttl_par_source = dict(TTL_PAR_SOURCE, **(ttl_par_source or {}))
+        self.hits = 0
+        self.misses = 0
+        self.echecs_connus = 0
+        self._lock = threading.Lock()
+        self._acces_en_attente = {}
+
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+
+        self._conn = sqlite3.connect(chemin, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS reponses (
+                cle TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                valeur TEXT NOT NULL,
+                cree_le REAL NOT NULL,
+                dernier_acces REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_dernier_acces ON reponses(dernier_acces)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS echecs (
+                cle TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                requete TEXT NOT NULL,
+                raison TEXT NOT NULL,
+                cree_le REAL NOT NULL,
+                reessayer_apres REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def ttl(self, source: str) -> int:
+        return self.ttl_par_source.get(source, TTL_DEFAUT)
+
+    def get(self, source: str, requete: str, params: Optional[Dict] = None) -> Any:
+        """
+        Retourne la réponse en cache, ou None si absente ou expirée
+        """
+        cle = construire_cle(source, requete, params)
+        maintenant = time.time()
+
+        with self._lock:
+            ligne = self._conn.execute(
+                "SELECT valeur, cree_le FROM reponses WHERE cle = ?", (cle,)
+            ).fetchone()
+
+            if ligne is None or maintenant - ligne[1] > self.ttl(source):
+                if ligne is not None:
+                    self._conn.execute("DELETE FROM reponses WHERE cle = ?", (cle,))
+                    self._conn.commit()
+                self.misses += 1
+                get_metriques().incrementer("cache_http", source=source, resultat="miss")
+                return None
+
+            self._acces_en_attente[cle] = maintenant
+            if len(self._acces_en_attente) >= MAX_ACCES_EN_ATTENTE:
+                self._ecrire_acces()
+                self._conn.commit()
+            self.hits += 1
+            get_metriques().incrementer("cache_http", source=source, resultat="hit")
+            return json.loads(ligne[0])
+
+    def set(self, source: str, requete: str, valeur: Any, params: Optional[Dict] = None) -> None:
+        """
+        Enregistre une réponse puis évince les entrées les moins récemment utilisées si besoin
+        """
+        if valeur is None:
+            return
+
+        cle = construire_cle(source, requete, params)
+        maintenant = time.time()
+
+        with self._lock:
+            # Dates d'accès en attente écrites dans la même transaction, avant l'éviction
+            self._ecrire_acces()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reponses (cle, source, valeur, cree_le, dernier_acces) VALUES (?, ?, ?, ?, ?)",
+                (cle, source, json.dumps(valeur, ensure_ascii=False), maintenant, maintenant),
+            )
+
+            nb_entrees = self._conn.execute("SELECT COUNT(*) FROM reponses").fetchone()[0]
+            if nb_entrees > self.max_entrees:
+                self._conn.execute(
+                    "DELETE FROM reponses WHERE cle IN "
+                    "(SELECT cle FROM reponses ORDER BY dernier_acces ASC LIMIT ?)",
+                    (nb_entrees - self.max_entrees,),
+                )
+            self._conn.commit()
+
+    def _ecrire_acces(self) -> None:
+        """
+        Reporte les dates d'accès des hits en attente (sans commit : appelé sous le verrou)
+        """
+        if self._acces_en_attente:
+            self._conn.executemany("UPDATE reponses SET dernier_acces = ? WHERE cle = ?",
+                                   [(date, cle) for cle, date in self._acces_en_attente.items()])
+            self._acces_en_attente.clear()
+
+    def enregistrer_acces(self) -> None:
+        """
+        Écrit les dates d'accès en attente (fin d'exécution sans nouveau `set`)
+        """
+        with self._lock:
+            if self._conn is not None and self._acces_en_attente:
+                self._ecrire_acces()
+                self._conn.commit()
+
+    def echec_connu(self, source: str, requete: str, params: Optional[Dict] = None) -> Optional[str]:
+        """
+        Retourne la raison d'un échec déjà constaté (ex: "introuvable"), ou None
+        si aucun échec n'est connu ou si sa date de nouvelle tentative est passée
+        """
+        cle = construire_cle(source, requete, params)
+        maintenant = time.time()
+
+        with self._lock:
+            ligne = self._conn.execute(
+                "SELECT raison, reessayer_apres FROM echecs WHERE cle = ?", (cle,)
+            ).fetchone()
+            if ligne is None:
+                return None
+            if maintenant >= ligne[1]:
+                self._conn.execute("DELETE FROM echecs WHERE cle = ?", (cle,))
+                self._conn.commit()
+                return None
+            self.echecs_connus += 1
+            get_metriques().incrementer("cache_negatif", source=source, raison=ligne[0])
+            return ligne[0]
+
+    def marquer_echec(self, source: str, requete: str, raison: str = "introuvable",
+                      duree: Optional[int] = None, params: Optional[Dict] = None) -> None:
+        """
+        Mémorise un échec définitif (pas une erreur réseau passagère) jusqu'à
+        maintenant + `duree` secondes (DUREE_ECHEC_PAR_SOURCE par défaut)
+        """
+        cle = construire_cle(source, requete, params)
+        maintenant = time.time()
+        duree = duree if duree is not None else DUREE_ECHEC_PAR_SOURCE.get(source, DUREE_ECHEC_DEFAUT)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO echecs (cle, source, requete, raison, cree_le, reessayer_apres) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cle, source, normaliser_requete(requete), raison, maintenant, maintenant + duree),
+            )
+            self._conn.commit()
+
+    def vider(self, source: Optional[str] = None) -> None:
+        """
+        Supprime toutes les entrées et tous les échecs connus (ou ceux d'une seule source)
+        """
+        with self._lock:
+            for table in ("reponses", "echecs"):
+                if source:
+                    self._conn.execute(f"DELETE FROM {table} WHERE source = ?", (source,))
+                else:
+                    self._conn.execute(f"DELETE FROM {table}")
+            self._conn.commit()
+
+    def vider_echecs(self, source: Optional[str] = None) -> None:
+        """
+        Oublie les échecs connus (ou ceux d'une seule source) pour tout retenter
+        """
+        with self._lock:
+            if source:
+                self._conn.execute("DELETE FROM echecs WHERE source = ?", (source,))
+            else:
+                self._conn.execute("DELETE FROM echecs")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "echecs_connus": self.echecs_connus}
+
+    def afficher_stats(self) -> None:
+        total = self.hits + self.misses
+        taux = (self.hits / total) * 100 if total else 0
+        print(f"[CACHE] {self.hits} hits / {self.misses} misses ({taux:.1f}% de hits), "
+              f"{self.echecs_connus} echecs connus evites")
+
+    def fermer(self) -> None:
+        self.enregistrer_acces()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache_partage = None
+
+
+def get_cache(chemin: str = CHEMIN_CACHE_DEFAUT) -> CacheHTTP:
+    """
+    Retourne l'instance de cache partagée par les modules d'ingestion
+    """
+    global _cache_partage
+    if _cache_partage is None or _cache_partage.chemin != chemin:
+        _cache_partage = CacheHTTP(chemin)
+        atexit.register(_cache_partage.enregistrer_acces)
+    return _cache_partage
@@ -0,0 +1,239 @@
+import gzip
+import json
+import os
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+import requests
+
+from util.limiteur import executer_avec_limite
+
+# Index local des communes (téléchargé une seule fois, format compact gzip)
+CHEMIN_INDEX_DEFAUT = os.path.join("data", "cache", "communes_index.json.gz")
+
+URL_COMMUNES = "https://geo.api.gouv.fr/communes"
+CHAMPS_COMMUNES = "nom,code,population,surface,codeDepartement,codeRegion,codesPostaux"
+
+# Colonnes du format compact (une liste par commune plutôt qu'un dict)
+COLONNES_INDEX = ["nom", "code", "population", "surface", "codeDepartement", "codeRegion", "codesPostaux"]
+
+# Code INSEE de la commune parente des arrondissements municipaux
+COMMUNES_A_ARRONDISSEMENTS = {
+    "paris": "75056",
+    "lyon": "69123",
+    "marseille": "13055",
+}
+
+PATTERN_ARRONDISSEMENT = re.compile(
+    r"(\d+)\s*(?:er|e|ème|eme)?\s*arrondissement\s+(?:de\s+|d')?(paris|lyon|marseille)",
+    re.IGNORECASE,
+)
+PATTERN_VILLE_NUMERO = re.compile(r"^(paris|lyon|marseille)\s+(\d+)\s*(?:er|e|ème|eme)?$", re.IGNORECASE)
+PATTERN_PARENTHESES = re.compile(r"\((.*?)\)")
+PATTERN_CODE_POSTAL = re.compile(r"^\d{5}$")
+
+
+def normaliser_nom(nom: str) -> str:
+    """
+    Normalise un nom de commune pour l'indexation : sans accents, en minuscules,
+    tirets et apostrophes remplacés par des espaces
+    """
+    if not nom:
+        return ""
+    nfd = unicodedata.normalize("NFD", str(nom))
+    sans_accents = "".join(c for c in nfd if unicodedata.category(c) != "Mn")
+    sans_accents = re.sub(r"[-'’]", " ", sans_accents.lower())
+    return re.sub(r"\s+", " ", sans_accents).strip()
+
+
+def formater_donnees_commune(commune: Dict, code_postal: Optional[str]) -> Dict:
+    """
+    Convertit une commune (format API Geo) en colonnes commune_* du dataset
+    """
+    surface_hectares = commune.get('surface') or 0
+    surface_km2 = surface_hectares / 100
+    population = commune.get('population') or 0
+    densite = round(population / surface_km2, 2) if surface_km2 > 0 else 0
+
+    return {
+        "commune_nom": commune.get('nom'),
+        "commune_population": population,
+        "commune_surface_km2": round(surface_km2, 2),
+        "commune_densite": densite,
+        "commune_departement": commune.get('codeDepartement'),
+        "commune_region": commune.get('codeRegion'),
+        "commune_code_postal": code_postal
+    }
+
+
+def _telecharger_communes(params: Dict, timeout: int) -> List[Dict]:
+    """
+    Une requête du référentiel, via le limiteur de l'hôte (débit, Retry-After,
+    backoff). Une erreur HTTP ou une réponse vide lève une exception : rien
+    n'est enregistré plutôt qu'un index tronqué.
+    """
+    def appel():
+        response = requests.get(URL_COMMUNES, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    donnees = executer_avec_limite(URL_COMMUNES, appel)
+    if not isinstance(donnees, list) or not donnees:
+        raise ValueError(f"Reponse inattendue de {URL_COMMUNES} ({params}) : index non enregistre")
+    return donnees
+
+
+def construire_index_communes(chemin: str = CHEMIN_INDEX_DEFAUT, timeout: int = 120) -> str:
+    """
+    Télécharge en une fois toutes les communes et les arrondissements municipaux
+    (Paris, Lyon, Marseille) puis les enregistre au format compact.
+
+    Returns:
+        str: Chemin du fichier d'index généré
+    """
+    print("[INDEX] Telechargement du referentiel complet des communes...")
+    communes = _telecharger_communes({"fields": CHAMPS_COMMUNES}, timeout)
+    arrondissements = _telecharger_communes(
+        {"type": "arrondissement-municipal", "fields": CHAMPS_COMMUNES + ",codeParent"}, timeout)
+    return enregistrer_index_communes(communes, arrondissements, chemin)
+
+
+def enregistrer_index_communes(communes: List[Dict], arrondissements: List[Dict],
+                               chemin: str = CHEMIN_INDEX_DEFAUT) -> str:
+    """
+    Enregistre des communes et arrondissements (format API Geo) au format compact gzip
+
+    Returns:
+        str: Chemin du fichier d'index généré
+    """
+    contenu = {
+        "colonnes": COLONNES_INDEX,
+        "communes": [[c.get(col) for col in COLONNES_INDEX] for c in communes],
+        "arrondissements": [[a.get(col) for col in COLONNES_INDEX] + [a.get("codeParent")] for a in arrondissements],
+    }
+
+    dossier = os.path.dirname(chemin)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    with gzip.open(chemin, "wt", encoding="utf-8") as f:
+        json.dump(contenu, f, ensure_ascii=False, separators=(",", ":"))
+
+    print(f"[INDEX] {len(communes)} communes et {len(arrondissements)} arrondissements -> {chemin}")
+    return chemin
+
+
+class IndexCommunes:
+    """
+    Index en mémoire des communes françaises.
+
+    Clé principale : nom normalisé (accents et casse ignorés), avec les homonymes.
+    Clés secondaires : code postal et département (pour départager les
+    homonymes), et (ville, numéro) pour les arrondissements de Paris, Lyon
+    et Marseille.
+    """
+
+    def __init__(self, communes: List[Dict], arrondissements: List[Dict]):
+        self.par_nom = {}
+        self.par_code_postal = {}
+        self.par_code = {}
+        self.par_departement = {}
+        self.arrondissements = {}
+
+        for commune in communes:
+            self.par_code[commune["code"]] = commune
+            self.par_nom.setdefault(normaliser_nom(commune["nom"]), []).append(commune)
+            self.par_departement.setdefault(commune.get("codeDepartement"), []).append(commune)
+            for cp in commune.get("codesPostaux") or []:
+                self.par_code_postal.setdefault(cp, []).append(commune)
+
+        for arr in arrondissements:
+            # "Paris 13e Arrondissement" -> ("paris", 13)
+            match = re.match(r"^(\D+?)\s+(\d+)", arr["nom"])
+            if match:
+                cle = (normaliser_nom(match.group(1)), int(match.group(2)))
+                self.arrondissements[cle] = arr
+
+        # Les homonymes les plus peuplés d'abord (choix par défaut le plus probable)
+        for homonymes in self.par_nom.values():
+            homonymes.sort(key=lambda c: c.get("population") or 0, reverse=True)
+
+    def __len__(self):
+        return len(self.par_code)
+
+    def rechercher(self, ville: str, departement: str = None, code_postal: str = None) -> Dict:
+        """
+        Résout un lieu de naissance en données commune_*.
+
+        Args:
+            ville (str): Lieu tel que fourni par Wikidata (ex: "13e arrondissement de Paris")
+            departement (str): Code département pour départager les homonymes (optionnel)
+            code_postal (str): Code postal pour départager les homonymes (optionnel)
+
+        Returns:
+            Dict: Données commune_* ou {} si introuvable / étranger
+        """
+        if not ville or "etranger" in str(ville).lower():
+            return {}
+        ville = str(ville)
+
+        # 1. Arrondissements municipaux : "13e arrondissement de Paris", "Marseille 8e"
+        match = PATTERN_ARRONDISSEMENT.search(ville)
+        if match:
+            nom_ville, numero = normaliser_nom(match.group(2)), int(match.group(1))
+        else:
+            match = PATTERN_VILLE_NUMERO.match(ville.strip())
+            nom_ville, numero = (normaliser_nom(match.group(1)), int(match.group(2))) if match else (None, None)
+
+        if nom_ville:
+            parent = self.par_code.get(COMMUNES_A_ARRONDISSEMENTS[nom_ville])
+            arr = self.arrondissements.get((nom_ville, numero))
+            if parent:
+                code_postal = (arr.get("codesPostaux") or [None])[0] if arr else None
+                return formater_donnees_commune(parent, code_postal or self._premier_code_postal(parent))
+
+        # 2. Indication entre parenthèses : "Saint-Denis (93)", "Saint-Denis (93200)"
+        #    ou "Saint-Denis (La Réunion)"
+        indication = PATTERN_PARENTHESES.search(ville)
+        if indication:
+            valeur = indication.group(1).strip().upper()
+            if not code_postal and PATTERN_CODE_POSTAL.match(valeur):
+                code_postal = valeur
+            elif not departement and valeur in self.par_departement:
+                departement = valeur
+        nom = normaliser_nom(ville.split("(")[0])
+
+        homonymes = self.par_nom.get(nom, [])
+        if code_postal:
+            codes = {c["code"] for c in self.par_code_postal.get(code_postal, [])}
+            homonymes = [c for c in homonymes if c["code"] in codes] or homonymes
+        if departement:
+            homonymes = [c for c in homonymes if c.get("codeDepartement") == departement] or homonymes
+        if not homonymes:
+            return {}
+
+        commune = homonymes[0]
+        if code_postal not in (commune.get("codesPostaux") or []):
+            code_postal = self._premier_code_postal(commune)
+        return formater_donnees_commune(commune, code_postal)
+
+    @staticmethod
+    def _premier_code_postal(commune: Dict) -> Optional[str]:
+        codes = sorted(commune.get("codesPostaux") or [])
+        return codes[0] if codes else None
+
+
+def charger_index_communes(chemin: str = CHEMIN_INDEX_DEFAUT) -> Optional[IndexCommunes]:
+    """
+    Charge l'index local des communes, ou None s'il n'a pas encore été construit
+    """
+    if not os.path.exists(chemin):
+        return None
+
+    with gzip.open(chemin, "rt", encoding="utf-8") as f:
+        contenu = json.load(f)
+
+    colonnes = contenu["colonnes"]
+    communes = [dict(zip(colonnes, ligne)) for ligne in contenu["communes"]]
+    arrondissements = [dict(zip(colonnes + ["codeParent"], ligne)) for ligne in contenu["arrondissements"]]
+    return IndexCommunes(communes, arrondissements)
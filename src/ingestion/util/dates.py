@@ -0,0 +1,76 @@
+import re
+from typing import Optional
+
+import pandas as pd
+
+# Table des mois français (avec et sans accents)
+MOIS_FR = {
+    "janvier": 1, "fevrier": 2, "février": 2, "mars": 3, "avril": 4,
+    "mai": 5, "juin": 6, "juillet": 7, "aout": 8, "août": 8,
+    "septembre": 9, "octobre": 10, "novembre": 11, "decembre": 12, "décembre": 12,
+}
+
+# Mois anglais, pour les effectifs scrapés sur les Wikipédia anglophones ("20 December 1998")
+MOIS_EN = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+}
+MOIS_TOUTES_LANGUES = {**MOIS_FR, **MOIS_EN}
+
+# Nom de chaque mois (sens inverse de MOIS_FR, pour l'affichage)
+NOMS_MOIS_FR = {
+    1: "janvier", 2: "février", 3: "mars", 4: "avril", 5: "mai", 6: "juin",
+    7: "juillet", 8: "août", 9: "septembre", 10: "octobre", 11: "novembre", 12: "décembre",
+}
+
+# "25 avril 1994", "1er juin 2001", "3 juillet 1995 (30 ans)"
+PATTERN_DATE_FR = re.compile(r"(?P<jour>\d{1,2})(?:er)?\s+(?P<mois>[^\W\d_]+)\s+(?P<annee>\d{4})")
+
+
+def parser_dates_fr(dates: pd.Series) -> pd.Series:
+    """
+    Convertit une colonne de dates françaises en toutes lettres en datetime64,
+    en une seule passe vectorisée (extraction regex + table des mois).
+    Les mois anglais sont aussi reconnus. Les valeurs non reconnues deviennent NaT.
+    """
+    morceaux = dates.astype("string").str.lower().str.extract(PATTERN_DATE_FR)
+    # float64 : les valeurs manquantes restent NaN (to_datetime refuse les NA des entiers nullables)
+    composantes = pd.DataFrame({
+        "year": pd.to_numeric(morceaux["annee"], errors="coerce").astype("float64"),
+        "month": morceaux["mois"].map(MOIS_TOUTES_LANGUES).astype("float64"),
+        "day": pd.to_numeric(morceaux["jour"], errors="coerce").astype("float64"),
+    }, index=dates.index)
+    return pd.to_datetime(composantes, errors="coerce")
+
+
+def formater_dates_fr(dates: pd.Series) -> pd.Series:
+    """
+    Inverse de `parser_dates_fr` : datetime64 -> "25 avril 1994" / "1er juin 2001",
+    le format des dates scrapées sur Wikipédia. NaT devient <NA>.
+    """
+    jours = dates.dt.day.astype("Int64").astype("string")
+    jours = jours.where(jours != "1", "1er")
+    mois = dates.dt.month.map(NOMS_MOIS_FR).astype("string")
+    annees = dates.dt.year.astype("Int64").astype("string")
+    return jours + " " + mois + " " + annees
+
+
+def calculer_age(naissances: pd.Series, date_reference: Optional[pd.Timestamp] = None) -> pd.Series:
+    """
+    Âge révolu (en années) à la date de référence, calculé sur toute la colonne
+    """
+    reference = pd.Timestamp(date_reference) if date_reference is not None else pd.Timestamp.today().normalize()
+    age = reference.year - naissances.dt.year
+    # Anniversaire pas encore passé dans l'année de référence
+    pas_encore = (naissances.dt.month > reference.month) | \
+        ((naissances.dt.month == reference.month) & (naissances.dt.day > reference.day))
+    return (age - pas_encore.astype(int)).astype("Int64")
+
+
+def ajouter_colonnes_dates(df: pd.DataFrame, date_reference: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Ajoute `date_naissance_iso` (datetime64) et `age` à partir de la colonne texte `date_naissance`
+    """
+    df["date_naissance_iso"] = parser_dates_fr(df["date_naissance"])
+    df["age"] = calculer_age(df["date_naissance_iso"], date_reference)
+    return df
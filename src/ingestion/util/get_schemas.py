@@ -1,6 +1,135 @@
 import json
+import os
+from typing import Dict, List
+
 import pandas as pd
 
+# Description de toutes les colonnes produites par le pipeline (format Table Schema).
+# "dtype" est une propriété propre au projet : le type pandas utilisé à la lecture / écriture.
+CHAMPS_JOUEURS = [
+    {
+        "name": "numero",
+        "type": "integer",
+        "dtype": "Int16",
+        "description": "Numéro de maillot dans la liste des convoqués."
+    },
+    {
+        "name": "nom",
+        "type": "string",
+        "dtype": "string",
+        "description": "Nom complet du joueur tel qu'affiché sur Wikipédia."
+    },
+    {
+        "name": "date_naissance",
+        "type": "string",
+        "dtype": "string",
+        "description": "Date de naissance en toutes lettres (ex: 25 avril 1994)."
+    },
+    {
+        "name": "date_naissance_iso",
+        "type": "date",
+        "format": "%Y-%m-%d",
+        "dtype": "datetime64[ns]",
+        "description": "Date de naissance au format ISO 8601."
+    },
+    {
+        "name": "age",
+        "type": "integer",
+        "dtype": "Int16",
+        "description": "Âge révolu à la date de récupération de la liste."
+    },
+    {
+        "name": "club",
+        "type": "string",
+        "dtype": "category",
+        "description": "Club actuel du joueur."
+    },
+    {
+        "name": "equipe",
+        "type": "string",
+        "dtype": "category",
+        "description": "Sélection nationale de l'effectif (récupération multi-équipes uniquement)."
+    },
+    {
+        "name": "wikidata_id",
+        "type": "string",
+        "dtype": "string",
+        "description": "Identifiant unique du joueur sur Wikidata (ex: Q1065406)."
+    },
+    {
+        "name": "taille_m",
+        "type": "number",
+        "dtype": "float32",
+        "description": "Taille du joueur en mètres."
+    },
+    {
+        "name": "ville_naissance",
+        "type": "string",
+        "dtype": "string",
+        "description": "Lieu de naissance, ou 'etranger (Pays)' pour une naissance hors de France."
+    },
+    {
+        "name": "commune_nom",
+        "type": "string",
+        "dtype": "string",
+        "description": "Nom officiel de la commune de naissance (API Geo)."
+    },
+    {
+        "name": "commune_population",
+        "type": "integer",
+        "dtype": "Int32",
+        "description": "Population municipale de la commune de naissance."
+    },
+    {
+        "name": "commune_surface_km2",
+        "type": "number",
+        "dtype": "float32",
+        "description": "Surface de la commune en km²."
+    },
+    {
+        "name": "commune_densite",
+        "type": "number",
+        "dtype": "float32",
+        "description": "Densité de population (habitants / km²)."
+    },
+    {
+        "name": "commune_departement",
+        "type": "string",
+        "dtype": "category",
+        "description": "Code du département (ex: 973, 2A)."
+    },
+    {
+        "name": "commune_region",
+        "type": "string",
+        "dtype": "category",
+        "description": "Code de la région (ex: 03, 11)."
+    },
+    {
+        "name": "commune_code_postal",
+        "type": "string",
+        "dtype": "string",
+        "description": "Code postal (arrondissement pour Paris, ex: 75013)."
+    },
+    {
+        "name": "equipements_commune",
+        "type": "integer",
+        "dtype": "Int32",
+        "description": "Nombre d'équipements sportifs recensés dans la commune de naissance."
+    },
+    {
+        "name": "equipements_rayon",
+        "type": "integer",
+        "dtype": "Int32",
+        "description": "Nombre d'équipements sportifs à moins de 10 km du centre de la commune de naissance."
+    },
+    {
+        "name": "equipements_par_1000_hab",
+        "type": "number",
+        "dtype": "float32",
+        "description": "Équipements sportifs de la commune pour 1 000 habitants."
+    },
+]
+
 def generate_schema(df: pd.DataFrame, output_path: str = "data/schema.json") -> None:
     """
     Génère un fichier de métadonnées au format JSON (Table Schema) décrivant le DataFrame.
@@ -10,8 +139,8 @@ def generate_schema(df: pd.DataFrame, output_path: str = "data/schema.json") ->
 
     Args:
         df (pd.DataFrame): Le DataFrame contenant les données des joueurs nettoyées.
-                           Il doit contenir au minimum les colonnes 'wikidata_id', 'nom', 
-                           'date_naissance', 'poste'.
+                           Seules ses colonnes décrites dans CHAMPS_JOUEURS
+                           figurent dans le schéma généré.
         output_path (str, optional): Le chemin relatif où sauvegarder le fichier JSON. 
                                      Par défaut "data/schema.json".
 
@@ -32,50 +161,179 @@ def generate_schema(df: pd.DataFrame, output_path: str = "data/schema.json") ->
         "title": "Joueurs de l'Equipe de France de Football",
         "description": "Liste consolidée des joueurs ayant joué en équipe de France masculine, identifiés via Wikidata.",
         "homepage": "https://github.com/yr16000/Mini-Projet-Ingenierie-des-donnees",
-        "version": "1.0.0",
+        "version": "1.1.0",
         "licence": "CC0-1.0",
         "resources": [
             {
                 "name": "joueurs_edf",
-                "path": "data/processed/joueurs_complet.csv",
+                "path": "data/final/dataset_final.csv",
                 "format": "csv",
                 "schema": {
-                    "fields": [
-                        {
-                            "name": "wikidata_id",
-                            "type": "string",
-                            "description": "Identifiant unique du joueur sur Wikidata (ex: Q1065406)."
-                        },
-                        {
-                            "name": "nom",
-                            "type": "string",
-                            "description": "Nom complet du joueur tel qu'enregistré sur Wikidata."
-                        },
-                        {
-                            "name": "date_naissance",
-                            "type": "date",
-                            "format": "%Y-%m-%d",
-                            "description": "Date de naissance au format ISO 8601."
-                        },
-                        {
-                            "name": "poste",
-                            "type": "string",
-                            "description": "Position principale du joueur sur le terrain."
-                        },
-                        {
-                            "name": "ville_naissance",
-                            "type": "string",
-                            "description": "Lieu de naissance."
-                        }
-                        # TODO : Ajouter les autres colonnes ici plus tard (Vitesse Valeur, etc.)
-                    ]
+                    "fields": [champ for champ in CHAMPS_JOUEURS if champ["name"] in set(df.columns)]
                 }
             }
         ]
     }
 
     # Sauvegarde du fichier JSON
-    with open("data/schema.json", "w", encoding='utf-8') as f:
+    dossier = os.path.dirname(output_path)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    with open(output_path, "w", encoding='utf-8') as f:
         json.dump(schema, f, indent=4, ensure_ascii=False)
     
-    print("> Fichier 'data/schema.json' généré avec succès.")
\ No newline at end of file
+    print(f"> Fichier '{output_path}' généré avec succès.")
+
+
+def dtypes_pandas(colonnes: List[str]) -> Dict[str, str]:
+    """
+    Retourne les dtypes pandas déclarés dans le schéma pour les colonnes données
+    (hors colonnes de type date, gérées par `colonnes_dates`).
+    """
+    return {
+        champ["name"]: champ["dtype"]
+        for champ in CHAMPS_JOUEURS
+        if champ["name"] in colonnes and champ["type"] != "date"
+    }
+
+
+def colonnes_dates(colonnes: List[str]) -> List[str]:
+    """
+    Retourne les colonnes de type date du schéma présentes dans `colonnes`.
+    """
+    return [champ["name"] for champ in CHAMPS_JOUEURS if champ["name"] in colonnes and champ["type"] == "date"]
+
+
+def lire_entete(path: str, encoding: str = "utf-8-sig", usecols: List[str] = None) -> List[str]:
+    """
+    Retourne les noms de colonnes d'un CSV sans lire les données.
+    """
+    return list(pd.read_csv(path, nrows=0, encoding=encoding, usecols=usecols).columns)
+
+
+def lire_csv(path: str, encoding: str = "utf-8-sig", **kwargs) -> pd.DataFrame:
+    """
+    Lit un CSV du pipeline avec les types déclarés dans le schéma.
+
+    Les codes (département, région, code postal) restent des chaînes ("2A", "03"),
+    les entiers à trous deviennent des entiers nullables au lieu de float,
+    et les colonnes répétitives (club, département, région) sont catégorielles.
+
+    Args:
+        path (str): Chemin du fichier CSV.
+        encoding (str, optional): Encodage ("utf-8-sig" lit aussi les fichiers sans BOM).
+        **kwargs: Arguments supplémentaires passés à `pd.read_csv`.
+
+    Returns:
+        pd.DataFrame: Les données typées.
+    """
+    colonnes = lire_entete(path, encoding, usecols=kwargs.get("usecols"))
+    return pd.read_csv(
+        path,
+        encoding=encoding,
+        dtype=dtypes_pandas(colonnes),
+        parse_dates=colonnes_dates(colonnes),
+        **kwargs,
+    )
+
+
+def typer_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convertit les colonnes connues du schéma vers leur dtype déclaré.
+    Les colonnes absentes du schéma sont laissées telles quelles.
+    """
+    df = df.copy()
+    for col, dtype in dtypes_pandas(list(df.columns)).items():
+        if str(df[col].dtype) == dtype:
+            continue  # Déjà au bon type (ex: lu via lire_csv)
+        if dtype in ("string", "category"):
+            # Les entiers stockés en objet (ex: 97300) doivent devenir "97300", pas "97300.0"
+            valeurs = df[col].astype(object).where(df[col].notna(), None)
+            valeurs = valeurs.map(lambda v: str(int(v)) if isinstance(v, float) and v.is_integer() else v)
+            df[col] = valeurs.astype("string").astype(dtype)
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+    for col in colonnes_dates(list(df.columns)):
+        df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+def ecrire_csv(df: pd.DataFrame, path: str, encoding: str = "utf-8") -> None:
+    """
+    Écrit un CSV du pipeline après typage selon le schéma (pas de "973.0" ni de "97300.0").
+    """
+    dossier = os.path.dirname(path)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    typer_dataframe(df).to_csv(path, index=False, encoding=encoding)
+
+
+def ecrire_parquet(df: pd.DataFrame, path: str, partition: List[str] = None,
+                   compression: str = "zstd") -> bool:
+    """
+    Écrit le dataset au format Parquet (colonnes typées, compressé), avec la
+    description de chaque colonne du schéma dans les métadonnées Arrow.
+
+    Args:
+        df (pd.DataFrame): Données à écrire (typées via `typer_dataframe`).
+        path (str): Fichier .parquet, ou dossier racine si `partition` est donné.
+        partition (list, optional): Colonnes de partitionnement (ex: ["commune_region"]).
+        compression (str, optional): Codec Parquet. Par défaut "zstd".
+
+    Returns:
+        bool: False si pyarrow n'est pas installé (rien n'est écrit).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("[ATTENTION] pyarrow non installe : export Parquet ignore (pip install pyarrow)")
+        return False
+
+    df = typer_dataframe(df)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Métadonnées de colonnes issues du schéma (type Table Schema + description)
+    champs = {champ["name"]: champ for champ in CHAMPS_JOUEURS}
+    fields = []
+    for field in table.schema:
+        champ = champs.get(field.name)
+        if champ:
+            field = field.with_metadata({
+                "type": champ["type"],
+                "description": champ["description"],
+            })
+        fields.append(field)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b"table_schema"] = json.dumps(
+        [champs[f.name] for f in fields if f.name in champs], ensure_ascii=False
+    ).encode("utf-8")
+    table = table.cast(pa.schema(fields, metadata=metadata))
+
+    if partition:
+        os.makedirs(path, exist_ok=True)
+        pq.write_to_dataset(table, root_path=path, partition_cols=partition, compression=compression)
+    else:
+        dossier = os.path.dirname(path)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        pq.write_table(table, path, compression=compression)
+    return True
+
+
+def lire_parquet(path: str, colonnes: List[str] = None) -> pd.DataFrame:
+    """
+    Lit le dataset Parquet (fichier ou dossier partitionné), éventuellement
+    en ne chargeant que certaines colonnes.
+    """
+    if not os.path.isdir(path):
+        return pd.read_parquet(path, columns=colonnes)
+
+    # Dossier partitionné ("commune_region=03/...") : la colonne de partition est
+    # relue en texte, sinon pyarrow l'inférerait en entier ("03" -> 3)
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    colonnes_partition = sorted({nom.split("=")[0] for nom in os.listdir(path) if "=" in nom})
+    partitioning = ds.partitioning(pa.schema([(col, pa.string()) for col in colonnes_partition]), flavor="hive")
+    dataset = ds.dataset(path, format="parquet", partitioning=partitioning)
+    return dataset.to_table(columns=colonnes).to_pandas()
@@ -0,0 +1,91 @@
+import os
+from typing import List, Tuple
+
+import pandas as pd
+
+from util.get_schemas import lire_csv
+
+
+def cle_joueur(df: pd.DataFrame) -> pd.Series:
+    """
+    Identité stable d'un joueur : wikidata_id quand il est connu,
+    sinon nom + date de naissance
+    """
+    cle = df["nom"].fillna("").astype(str).str.strip() + "|" + \
+        df.get("date_naissance", pd.Series("", index=df.index)).fillna("").astype(str).str.strip()
+    if "wikidata_id" in df.columns:
+        cle = df["wikidata_id"].where(df["wikidata_id"].notna(), cle).astype(str)
+    return cle
+
+
+def empreinte_lignes(df: pd.DataFrame, colonnes: List[str]) -> pd.Series:
+    """
+    Empreinte (hash) du contenu de chaque ligne sur les colonnes données
+    """
+    valeurs = df[colonnes].astype(object).where(df[colonnes].notna(), "").astype(str)
+    return pd.util.hash_pandas_object(valeurs, index=False)
+
+
+def reprendre_lignes_inchangees(df: pd.DataFrame, chemin_precedent: str,
+                                colonnes_sortie: List[str],
+                                retenter_vides: bool = True) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Compare l'entrée au fichier produit lors de l'exécution précédente et
+    recopie les colonnes enrichies des joueurs inchangés.
+
+    Un joueur est réutilisé si sa clé (voir `cle_joueur`) existe dans le fichier
+    précédent et que ses colonnes d'entrée sont identiques.
+
+    Args:
+        df (pd.DataFrame): Données d'entrée de l'étape
+        chemin_precedent (str): Fichier de sortie de la dernière exécution
+        colonnes_sortie (list): Colonnes ajoutées par l'étape
+        retenter_vides (bool): Ré-enrichir les joueurs dont toutes les colonnes
+                               de sortie étaient vides (non trouvés la dernière fois)
+
+    Returns:
+        Tuple: (DataFrame avec les colonnes de sortie pré-remplies,
+                masque booléen des lignes à enrichir)
+    """
+    df = df.copy()
+    colonnes_entree = [c for c in df.columns if c not in colonnes_sortie]
+    for col in colonnes_sortie:
+        df[col] = None
+
+    a_traiter = pd.Series(True, index=df.index)
+    if not os.path.exists(chemin_precedent):
+        print(f"[INCREMENTAL] Aucun fichier precedent ({chemin_precedent}) : traitement complet")
+        return df, a_traiter
+
+    # Lecture typée selon le schéma : pas de conversion 973 -> 973.0 sur les colonnes à trous
+    precedent = lire_csv(chemin_precedent)
+    manquantes = [c for c in colonnes_entree + colonnes_sortie if c not in precedent.columns]
+    if manquantes:
+        print(f"[INCREMENTAL] Fichier precedent incompatible (colonnes manquantes: {manquantes}) : traitement complet")
+        return df, a_traiter
+
+    # Les deux côtés sont comparés sur les mêmes colonnes d'entrée
+    # (wikidata_id ne sert de clé que s'il fait partie de l'entrée)
+    cles = pd.DataFrame({
+        "_cle": cle_joueur(df[colonnes_entree]).values,
+        "_empreinte": empreinte_lignes(df, colonnes_entree).values,
+    }, index=df.index)
+    anciens = precedent[colonnes_sortie].copy()
+    anciens["_cle"] = cle_joueur(precedent[colonnes_entree]).values
+    anciens["_empreinte"] = empreinte_lignes(precedent, colonnes_entree).values
+    anciens = anciens.drop_duplicates(subset=["_cle", "_empreinte"])
+
+    if retenter_vides:
+        anciens = anciens[anciens[colonnes_sortie].notna().any(axis=1)]
+
+    fusion = cles.merge(anciens, on=["_cle", "_empreinte"], how="left", indicator=True)
+    fusion.index = df.index
+    reutilises = fusion["_merge"] == "both"
+
+    for col in colonnes_sortie:
+        # dtype=object : les colonnes restent modifiables par l'étape, le typage se fait à l'écriture
+        df[col] = fusion[col].astype(object).where(reutilises, None)
+    a_traiter = ~reutilises
+
+    print(f"[INCREMENTAL] {int(reutilises.sum())}/{len(df)} lignes reutilisees, {int(a_traiter.sum())} a enrichir")
+    return df, a_traiter
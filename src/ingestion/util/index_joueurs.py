@@ -0,0 +1,168 @@
+import gzip
+import json
+import os
+from collections import Counter
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from util.communes import normaliser_nom
+from util.dates import parser_dates_fr
+
+# Index local des internationaux français (téléchargé une seule fois, format compact gzip)
+CHEMIN_INDEX_DEFAUT = os.path.join("data", "cache", "joueurs_index.json.gz")
+
+# Colonnes du format compact (une liste par joueur plutôt qu'un dict)
+COLONNES_INDEX = ["wikidata_id", "libelles", "date_naissance", "taille_m", "ville_naissance"]
+
+# Score de similarité (Dice sur trigrammes) minimal pour accepter un candidat
+SEUIL_AVEC_DATE = 0.45   # La date de naissance concorde : un nom approchant suffit
+SEUIL_SANS_DATE = 0.8    # Pas de date pour confirmer : il faut un nom quasi identique
+ECART_MIN = 0.1          # Sans date, le meilleur candidat doit nettement devancer le second
+
+
+def trigrammes(texte: str) -> List[str]:
+    """
+    Trigrammes d'un nom normalisé, bornés par des espaces ("mbappe" -> " mb", "mba", ...)
+    """
+    texte = f"  {normaliser_nom(texte)} "
+    return [texte[i:i + 3] for i in range(len(texte) - 2)]
+
+
+def date_iso(valeur) -> Optional[str]:
+    """
+    Date de naissance au format "AAAA-MM-JJ", qu'elle soit en toutes lettres
+    ("3 juillet 1995"), ISO ("1995-07-03T00:00:00Z") ou déjà en Timestamp
+    """
+    if valeur is None or (not isinstance(valeur, str) and pd.isna(valeur)):
+        return None
+    if isinstance(valeur, str):
+        date = parser_dates_fr(pd.Series([valeur])).iloc[0]
+        if pd.isna(date):
+            date = pd.to_datetime(valeur[:10], errors="coerce")
+    else:
+        date = pd.Timestamp(valeur)
+    return None if pd.isna(date) else date.strftime("%Y-%m-%d")
+
+
+def enregistrer_index_joueurs(joueurs: List[Dict], chemin: str = CHEMIN_INDEX_DEFAUT) -> str:
+    """
+    Enregistre les joueurs ({wikidata_id, libelles, date_naissance, taille_m, ville_naissance})
+    au format compact gzip
+
+    Returns:
+        str: Chemin du fichier d'index généré
+    """
+    contenu = {
+        "colonnes": COLONNES_INDEX,
+        "joueurs": [[j.get(col) for col in COLONNES_INDEX] for j in joueurs],
+    }
+
+    dossier = os.path.dirname(chemin)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    with gzip.open(chemin, "wt", encoding="utf-8") as f:
+        json.dump(contenu, f, ensure_ascii=False, separators=(",", ":"))
+
+    print(f"[INDEX] {len(joueurs)} joueurs -> {chemin}")
+    return chemin
+
+
+class IndexJoueurs:
+    """
+    Index en mémoire des internationaux français pour la correspondance approchée des noms.
+
+    Chaque libellé (FR, EN, alias) est découpé en trigrammes ; un index inversé
+    trigramme -> joueurs permet de ne scorer que les candidats qui partagent au
+    moins un trigramme avec le nom cherché. La date de naissance, quand elle est
+    connue, départage les homonymes et écarte les faux positifs.
+    """
+
+    def __init__(self, joueurs: List[Dict]):
+        self.joueurs = joueurs
+        self.libelles = []      # (position du joueur, nombre de trigrammes)
+        self.par_trigramme = {}
+
+        for position, joueur in enumerate(joueurs):
+            for libelle in dict.fromkeys(normaliser_nom(l) for l in joueur["libelles"] if l):
+                grammes = set(trigrammes(libelle))
+                id_libelle = len(self.libelles)
+                self.libelles.append((position, len(grammes)))
+                for gramme in grammes:
+                    self.par_trigramme.setdefault(gramme, []).append(id_libelle)
+
+    def __len__(self):
+        return len(self.joueurs)
+
+    def candidats(self, nom: str, limite: int = 5, date: str = None) -> List[tuple]:
+        """
+        Meilleurs joueurs pour un nom, triés par score décroissant : [(score, joueur), ...]
+
+        Avec `date` ("AAAA-MM-JJ"), les joueurs nés un autre jour sont écartés
+        avant de garder les `limite` meilleurs : un homonyme proche ne peut pas
+        évincer le joueur dont la date concorde.
+        """
+        grammes = set(trigrammes(nom))
+        communs = Counter()
+        for gramme in grammes:
+            communs.update(self.par_trigramme.get(gramme, ()))
+
+        meilleurs = {}
+        for id_libelle, nb_communs in communs.items():
+            position, nb_grammes = self.libelles[id_libelle]
+            score = 2 * nb_communs / (len(grammes) + nb_grammes)
+            if date and self.joueurs[position].get("date_naissance") not in (None, date):
+                continue
+            if score > meilleurs.get(position, 0):
+                meilleurs[position] = score
+
+        classement = sorted(meilleurs.items(), key=lambda x: x[1], reverse=True)[:limite]
+        return [(score, self.joueurs[position]) for position, score in classement]
+
+    def rechercher(self, nom: str, date_naissance=None) -> Optional[Dict]:
+        """
+        Résout un nom (éventuellement mal orthographié ou sans accents) en infos Wikidata.
+
+        Args:
+            nom (str): Nom du joueur tel que scrapé
+            date_naissance: Date de naissance (texte français, ISO ou Timestamp), optionnelle
+
+        Returns:
+            Dict: {wikidata_id, taille_m, ville_naissance} ou None si aucun candidat sûr
+        """
+        date = date_iso(date_naissance)
+        # Une date différente élimine le candidat, une date identique le confirme
+        candidats = self.candidats(nom, date=date)
+
+        if date:
+            for score, joueur in candidats:
+                if joueur.get("date_naissance") == date and score >= SEUIL_AVEC_DATE:
+                    return self._infos(joueur)
+
+        if not candidats or candidats[0][0] < SEUIL_SANS_DATE:
+            return None
+        if len(candidats) > 1 and candidats[0][0] - candidats[1][0] < ECART_MIN:
+            return None
+        return self._infos(candidats[0][1])
+
+    @staticmethod
+    def _infos(joueur: Dict) -> Dict:
+        return {
+            "wikidata_id": joueur["wikidata_id"],
+            "taille_m": joueur.get("taille_m"),
+            "ville_naissance": joueur.get("ville_naissance"),
+        }
+
+
+def charger_index_joueurs(chemin: str = CHEMIN_INDEX_DEFAUT) -> Optional[IndexJoueurs]:
+    """
+    Charge l'index local des joueurs, ou None s'il n'a pas encore été construit
+    """
+    if not os.path.exists(chemin):
+        return None
+
+    with gzip.open(chemin, "rt", encoding="utf-8") as f:
+        contenu = json.load(f)
+
+    colonnes = contenu["colonnes"]
+    return IndexJoueurs([dict(zip(colonnes, ligne)) for ligne in contenu["joueurs"]])
@@ -0,0 +1,45 @@
+from typing import Dict
+
+import pandas as pd
+
+from util.get_schemas import CHAMPS_JOUEURS
+
+# Tous les champs du dataset, dans l'ordre du schéma
+CHAMPS = tuple(champ["name"] for champ in CHAMPS_JOUEURS)
+
+
+class Joueur:
+    """
+    Enregistrement joueur compact (__slots__, pas de __dict__ par instance)
+    qui circule d'une étape à l'autre du pipeline en streaming.
+    Les champs non encore renseignés valent None.
+    """
+
+    __slots__ = CHAMPS
+
+    def __init__(self, **valeurs):
+        for champ in CHAMPS:
+            setattr(self, champ, valeurs.get(champ))
+
+    def maj(self, valeurs: Dict) -> None:
+        """
+        Met à jour les champs connus à partir d'un dict (ex: résultat Wikidata ou INSEE)
+        """
+        for champ, valeur in valeurs.items():
+            if champ in CHAMPS:
+                setattr(self, champ, valeur)
+
+    def en_dict(self) -> Dict:
+        return {champ: getattr(self, champ) for champ in CHAMPS}
+
+    def __repr__(self):
+        return f"Joueur(nom={self.nom!r}, date_naissance={self.date_naissance!r})"
+
+
+def joueurs_depuis_dataframe(df: pd.DataFrame):
+    """
+    Générateur de Joueur à partir des lignes d'un DataFrame (valeurs manquantes -> None)
+    """
+    colonnes = [c for c in df.columns if c in CHAMPS]
+    for valeurs in df[colonnes].itertuples(index=False, name=None):
+        yield Joueur(**{col: (None if pd.isna(v) else v) for col, v in zip(colonnes, valeurs)})
@@ -0,0 +1,97 @@
+import json
+import os
+from typing import Dict, Optional
+
+
+class JournalProgression:
+    """
+    Journal de progression en ajout seul (une ligne JSON par joueur traité,
+    indexée par la clé du joueur : nom + date de naissance, pour que deux
+    homonymes aient chacun leur entrée).
+
+    Chaque résultat est écrit et synchronisé sur disque dès qu'il est connu :
+    après un crash ou un Ctrl-C, une relance avec reprise ne refait que les
+    joueurs absents du journal. Le journal est supprimé une fois le fichier
+    de sortie écrit.
+    """
+
+    def __init__(self, chemin: str, reprendre: bool = False):
+        self.chemin = chemin
+        self.entrees = {}
+
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+
+        if reprendre and os.path.exists(chemin):
+            self._tronquer_ligne_incomplete()
+            self.entrees = self._charger()
+        elif os.path.exists(chemin):
+            os.remove(chemin)
+
+        self._fichier = open(chemin, "a", encoding="utf-8")
+
+    def _tronquer_ligne_incomplete(self) -> None:
+        """
+        Coupe le journal après son dernier saut de ligne : sans cela, le
+        premier ajout serait collé à la ligne tronquée par un arrêt brutal
+        et deviendrait illisible à son tour
+        """
+        with open(self.chemin, "rb+") as f:
+            taille = f.seek(0, os.SEEK_END)
+            position = taille
+            while position > 0:
+                bloc = min(position, 4096)
+                f.seek(position - bloc)
+                fin = f.read(bloc).rfind(b"\n")
+                if fin >= 0:
+                    position = position - bloc + fin + 1
+                    break
+                position -= bloc
+            if position < taille:
+                f.truncate(position)
+
+    def _charger(self) -> Dict[str, Optional[Dict]]:
+        entrees = {}
+        with open(self.chemin, encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    entree = json.loads(ligne)
+                except json.JSONDecodeError:
+                    # Dernière ligne tronquée par un arrêt brutal : on l'ignore
+                    continue
+                entrees[entree["cle"]] = entree["infos"]
+        return entrees
+
+    def __contains__(self, cle: str) -> bool:
+        return cle in self.entrees
+
+    def __len__(self):
+        return len(self.entrees)
+
+    def enregistrer(self, cle: str, infos: Optional[Dict]) -> None:
+        """
+        Ajoute un résultat (None = joueur introuvable) et le force sur disque
+        """
+        self.entrees[cle] = infos
+        self._fichier.write(json.dumps({"cle": cle, "infos": infos}, ensure_ascii=False) + "\n")
+        self._fichier.flush()
+        os.fsync(self._fichier.fileno())
+
+    def enregistrer_lot(self, resultats: Dict[str, Optional[Dict]]) -> None:
+        """
+        Ajoute plusieurs résultats avec une seule synchronisation disque
+        """
+        for cle, infos in resultats.items():
+            self.entrees[cle] = infos
+            self._fichier.write(json.dumps({"cle": cle, "infos": infos}, ensure_ascii=False) + "\n")
+        self._fichier.flush()
+        os.fsync(self._fichier.fileno())
+
+    def terminer(self) -> None:
+        """
+        Ferme et supprime le journal (à appeler après l'écriture du fichier final)
+        """
+        self._fichier.close()
+        if os.path.exists(self.chemin):
+            os.remove(self.chemin)
@@ -0,0 +1,253 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from SPARQLWrapper.SPARQLExceptions import (SPARQLWrapperException, EndPointInternalError, EndPointNotFound,
+                                            QueryBadFormed, Unauthorized, URITooLong)
+
+from util.metriques import get_metriques
+
+# Réglages par hôte : débit de départ, plafond et plancher (requêtes / seconde)
+CONFIG_HOTES = {
+    "query.wikidata.org": {"debit": 1.0, "debit_max": 5.0, "debit_min": 0.1, "capacite": 2},
+    "geo.api.gouv.fr": {"debit": 20.0, "debit_max": 50.0, "debit_min": 1.0, "capacite": 10},
+    # Rafale de 20 pages : une récupération multi-équipes part en une fois
+    "fr.wikipedia.org": {"debit": 5.0, "debit_max": 20.0, "debit_min": 0.2, "capacite": 20},
+    "en.wikipedia.org": {"debit": 5.0, "debit_max": 20.0, "debit_min": 0.2, "capacite": 20},
+}
+CONFIG_DEFAUT = {"debit": 2.0, "debit_max": 10.0, "debit_min": 0.1, "capacite": 2}
+
+# Codes HTTP qui justifient une nouvelle tentative
+CODES_A_RETENTER = {429, 500, 502, 503, 504}
+# Codes qui signalent une surcharge : on divise le débit
+CODES_SURCHARGE = {429, 503}
+
+SEUIL_DISJONCTEUR = 5          # Échecs consécutifs avant ouverture du circuit
+DUREE_DISJONCTEUR = 30.0       # Secondes pendant lesquelles le circuit reste ouvert
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+MAX_TENTATIVES_DEFAUT = 4
+
+# Erreurs SPARQLWrapper (sans attribut .code) et code HTTP correspondant :
+# seul EndPointInternalError (500) est retenté
+CODES_SPARQLWRAPPER = {
+    QueryBadFormed: 400,
+    Unauthorized: 401,
+    EndPointNotFound: 404,
+    URITooLong: 414,
+    EndPointInternalError: 500,
+}
+
+
+class DisjoncteurOuvert(Exception):
+    """
+    Levée quand un hôte a échoué trop de fois d'affilée : les appels sont
+    refusés immédiatement jusqu'à la fin de la période de refroidissement.
+    """
+
+
+class SeauJetons:
+    """
+    Seau à jetons à débit adaptatif (AIMD) : le débit augmente doucement
+    à chaque succès et est divisé par deux à chaque signal de surcharge.
+    """
+
+    def __init__(self, debit: float, capacite: int, debit_min: float, debit_max: float):
+        self.debit = debit
+        self.capacite = capacite
+        self.debit_min = debit_min
+        self.debit_max = debit_max
+        self.jetons = float(capacite)
+        self._derniere_maj = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _recharger(self, maintenant: float) -> None:
+        self.jetons = min(self.capacite, self.jetons + (maintenant - self._derniere_maj) * self.debit)
+        self._derniere_maj = maintenant
+
+    def acquerir(self) -> None:
+        """
+        Prend un jeton, en dormant le temps nécessaire s'il n'y en a pas
+        """
+        while True:
+            with self._lock:
+                maintenant = time.monotonic()
+                self._recharger(maintenant)
+                if self.jetons >= 1:
+                    self.jetons -= 1
+                    return
+                attente = (1 - self.jetons) / self.debit
+            time.sleep(attente)
+
+    def augmenter(self) -> None:
+        with self._lock:
+            self.debit = min(self.debit_max, self.debit + self.debit_max * 0.05)
+
+    def reduire(self) -> None:
+        with self._lock:
+            self.debit = max(self.debit_min, self.debit / 2)
+            self.jetons = min(self.jetons, 0.0)
+
+
+class LimiteurHote:
+    """
+    Limiteur d'un hôte : seau à jetons, pause imposée par Retry-After
+    et disjoncteur après échecs répétés.
+    """
+
+    def __init__(self, hote: str, debit: float, capacite: int, debit_min: float, debit_max: float):
+        self.hote = hote
+        self.seau = SeauJetons(debit, capacite, debit_min, debit_max)
+        self.echecs_consecutifs = 0
+        self.pause_jusqua = 0.0
+        self.ouvert_jusqua = 0.0
+        self._lock = threading.Lock()
+
+    def avant_requete(self) -> None:
+        """
+        À appeler avant chaque appel réseau : refuse si le circuit est ouvert,
+        attend la fin d'un Retry-After, puis consomme un jeton
+        """
+        with self._lock:
+            maintenant = time.monotonic()
+            if self.ouvert_jusqua > maintenant:
+                raise DisjoncteurOuvert(
+                    f"Circuit ouvert pour {self.hote} (encore {self.ouvert_jusqua - maintenant:.0f}s)")
+            pause = self.pause_jusqua - maintenant
+        if pause > 0:
+            time.sleep(pause)
+        self.seau.acquerir()
+
+    def succes(self) -> None:
+        with self._lock:
+            self.echecs_consecutifs = 0
+        self.seau.augmenter()
+
+    def echec(self, code: Optional[int] = None, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.echecs_consecutifs += 1
+            maintenant = time.monotonic()
+            if retry_after:
+                self.pause_jusqua = max(self.pause_jusqua, maintenant + retry_after)
+            if self.echecs_consecutifs >= SEUIL_DISJONCTEUR:
+                # Après refroidissement, la requête suivante sert de test (semi-ouvert)
+                self.ouvert_jusqua = maintenant + DUREE_DISJONCTEUR
+                self.echecs_consecutifs = SEUIL_DISJONCTEUR - 1
+                print(f"      [DISJONCTEUR] {self.hote} : circuit ouvert pour {DUREE_DISJONCTEUR:.0f}s")
+        if code in CODES_SURCHARGE:
+            self.seau.reduire()
+
+
+_limiteurs: Dict[str, LimiteurHote] = {}
+_lock_registre = threading.Lock()
+
+
+def hote_de(url: str) -> str:
+    return urlparse(url).netloc or url
+
+
+def limiteur_pour(url: str) -> LimiteurHote:
+    """
+    Retourne le limiteur partagé de l'hôte de `url` (créé au premier appel)
+    """
+    hote = hote_de(url)
+    with _lock_registre:
+        if hote not in _limiteurs:
+            config = CONFIG_HOTES.get(hote, CONFIG_DEFAUT)
+            _limiteurs[hote] = LimiteurHote(hote, **config)
+        return _limiteurs[hote]
+
+
+def configurer_hote(url: str, debit_max: float) -> None:
+    """
+    Ajuste le plafond de débit d'un hôte (ex: option --rps)
+    """
+    seau = limiteur_pour(url).seau
+    seau.debit_max = debit_max
+    seau.debit = min(seau.debit, debit_max)
+
+
+def lire_retry_after(valeur: Optional[str]) -> Optional[float]:
+    """
+    Retry-After en secondes ("120") ou en date HTTP ("Wed, 21 Oct 2026 07:28:00 GMT")
+    """
+    if not valeur:
+        return None
+    try:
+        return max(0.0, float(valeur))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valeur).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def analyser_erreur(erreur: Exception) -> Tuple[Optional[int], Optional[float]]:
+    """
+    Extrait (code HTTP, Retry-After) d'une erreur requests, urllib ou SPARQLWrapper
+    """
+    for classe, code in CODES_SPARQLWRAPPER.items():
+        if isinstance(erreur, classe):
+            return code, None
+    reponse = getattr(erreur, "response", None)
+    code = getattr(reponse, "status_code", None) or getattr(erreur, "code", None)
+    entetes = getattr(reponse, "headers", None) or getattr(erreur, "headers", None) or {}
+    retry_after = lire_retry_after(entetes.get("Retry-After")) if hasattr(entetes, "get") else None
+    return (code if isinstance(code, int) else None), retry_after
+
+
+def delai_backoff(tentative: int) -> float:
+    """
+    Backoff exponentiel avec gigue complète : uniforme dans [0, base * 2^tentative]
+    """
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** tentative)))
+
+
+def executer_avec_limite(url: str, appel: Callable, max_tentatives: int = MAX_TENTATIVES_DEFAUT):
+    """
+    Exécute `appel()` (une requête vers `url`) sous le contrôle du limiteur de l'hôte.
+
+    Les erreurs réseau et les codes 429 / 5xx sont retentées avec backoff
+    exponentiel, ou après le délai Retry-After s'il est fourni (appliqué une
+    seule fois, par la pause du limiteur de l'hôte). Les autres erreurs HTTP
+    et les erreurs SPARQLWrapper définitives (requête mal formée, accès
+    refusé...) remontent immédiatement. DisjoncteurOuvert est levée si l'hôte
+    est en refroidissement.
+    """
+    limiteur = limiteur_pour(url)
+    metriques = get_metriques()
+    for tentative in range(max_tentatives):
+        try:
+            limiteur.avant_requete()
+        except DisjoncteurOuvert:
+            metriques.incrementer("requetes_refusees_disjoncteur", hote=limiteur.hote)
+            raise
+        debut = time.perf_counter()
+        try:
+            resultat = appel()
+        except Exception as e:
+            code, retry_after = analyser_erreur(e)
+            metriques.observer("requete_duree_secondes", time.perf_counter() - debut, hote=limiteur.hote)
+            metriques.incrementer("requetes_http", hote=limiteur.hote, resultat=code or type(e).__name__)
+            if code is not None and code not in CODES_A_RETENTER:
+                raise
+            if code is None and isinstance(e, SPARQLWrapperException):
+                raise
+            limiteur.echec(code, retry_after)
+            if tentative == max_tentatives - 1:
+                raise
+            # Avec Retry-After, la pause est portée par le limiteur (avant_requete) : pas de second sommeil
+            attente = retry_after if retry_after is not None else delai_backoff(tentative)
+            metriques.incrementer("retries", hote=limiteur.hote, code=code or type(e).__name__)
+            print(f"      [RETRY] {limiteur.hote} ({code or type(e).__name__}) : nouvelle tentative dans {attente:.1f}s")
+            if retry_after is None:
+                time.sleep(attente)
+            continue
+        metriques.observer("requete_duree_secondes", time.perf_counter() - debut, hote=limiteur.hote)
+        metriques.incrementer("requetes_http", hote=limiteur.hote, resultat="ok")
+        limiteur.succes()
+        return resultat
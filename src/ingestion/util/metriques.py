@@ -0,0 +1,267 @@
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+# Rapports de métriques (un fichier JSON par exécution)
+DOSSIER_METRIQUES = os.path.join("data", "metriques")
+
+# Préfixe des métriques dans l'export Prometheus
+PREFIXE_PROMETHEUS = "joueurs_edf_"
+
+# Bornes des seaux des histogrammes de latence (secondes)
+SEAUX_SECONDES = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def cle_metrique(nom: str, etiquettes: Dict) -> tuple:
+    return nom, tuple(sorted((k, str(v)) for k, v in etiquettes.items()))
+
+
+def borne_json(valeur: Optional[float]):
+    # JSON strict : pas d'Infinity
+    return "+Inf" if valeur == float("inf") else valeur
+
+
+class Histogramme:
+    """
+    Histogramme à seaux fixes (cumulables, format Prometheus) avec somme et nombre
+    """
+
+    def __init__(self, seaux=SEAUX_SECONDES):
+        self.seaux = seaux
+        self.effectifs = [0] * (len(seaux) + 1)  # Dernier seau : +Inf
+        self.somme = 0.0
+        self.nombre = 0
+
+    def observer(self, valeur: float) -> None:
+        position = next((i for i, borne in enumerate(self.seaux) if valeur <= borne), len(self.seaux))
+        self.effectifs[position] += 1
+        self.somme += valeur
+        self.nombre += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Borne supérieure du seau contenant le quantile q (None si vide, inf au-delà du dernier seau)
+        """
+        if not self.nombre:
+            return None
+        cumul = 0
+        for position, effectif in enumerate(self.effectifs):
+            cumul += effectif
+            if cumul >= q * self.nombre:
+                return self.seaux[position] if position < len(self.seaux) else float("inf")
+
+    def cumuls(self):
+        cumul = 0
+        for borne, effectif in zip(list(self.seaux) + ["+Inf"], self.effectifs):
+            cumul += effectif
+            yield borne, cumul
+
+
+class Metriques:
+    """
+    Registre des métriques d'une exécution, partagé par les modules d'ingestion.
+
+    - compteurs : requêtes, retries, hits/misses du cache, niveau de résolution...
+    - jauges : dernières valeurs mesurées (complétude d'une colonne, lignes écrites...)
+    - histogrammes : latences par hôte
+    - étapes : durée (horloge murale) de chaque étape du pipeline
+
+    Chaque métrique porte des étiquettes (hote="query.wikidata.org", source="geo_api"...).
+    """
+
+    def __init__(self):
+        self.compteurs = {}
+        self.jauges = {}
+        self.histogrammes = {}
+        self.etapes = {}
+        self.debut = datetime.now()
+        self._lock = threading.Lock()
+
+    def incrementer(self, nom: str, valeur: float = 1, **etiquettes) -> None:
+        cle = cle_metrique(nom, etiquettes)
+        with self._lock:
+            self.compteurs[cle] = self.compteurs.get(cle, 0) + valeur
+
+    def fixer(self, nom: str, valeur: float, **etiquettes) -> None:
+        with self._lock:
+            self.jauges[cle_metrique(nom, etiquettes)] = valeur
+
+    def observer(self, nom: str, valeur: float, **etiquettes) -> None:
+        cle = cle_metrique(nom, etiquettes)
+        with self._lock:
+            if cle not in self.histogrammes:
+                self.histogrammes[cle] = Histogramme()
+            self.histogrammes[cle].observer(valeur)
+
+    def enregistrer_etape(self, nom: str, duree: float, succes: bool = True) -> None:
+        with self._lock:
+            self.etapes[nom] = {"duree_s": round(duree, 3), "succes": succes}
+
+    def valeur(self, nom: str, **etiquettes) -> float:
+        return self.compteurs.get(cle_metrique(nom, etiquettes), 0)
+
+    def vers_dict(self) -> Dict:
+        """
+        Rapport JSON : exécution, étapes, compteurs, jauges et histogrammes (avec p50 / p95 estimés)
+        """
+        def lignes(table):
+            return [{"nom": nom, "etiquettes": dict(etiquettes), "valeur": valeur}
+                    for (nom, etiquettes), valeur in sorted(table.items())]
+
+        with self._lock:
+            fin = datetime.now()
+            return {
+                "execution": {
+                    "script": os.path.basename(sys.argv[0]),
+                    "arguments": sys.argv[1:],
+                    "debut": self.debut.isoformat(timespec="seconds"),
+                    "fin": fin.isoformat(timespec="seconds"),
+                    "duree_s": round((fin - self.debut).total_seconds(), 3),
+                },
+                "etapes": dict(self.etapes),
+                "compteurs": lignes(self.compteurs),
+                "jauges": lignes(self.jauges),
+                "histogrammes": [
+                    {
+                        "nom": nom,
+                        "etiquettes": dict(etiquettes),
+                        "nombre": h.nombre,
+                        "somme": round(h.somme, 6),
+                        "p50": borne_json(h.quantile(0.5)),
+                        "p95": borne_json(h.quantile(0.95)),
+                        "seaux": {str(borne): cumul for borne, cumul in h.cumuls()},
+                    }
+                    for (nom, etiquettes), h in sorted(self.histogrammes.items())
+                ],
+            }
+
+    def vers_prometheus(self) -> str:
+        """
+        Export au format texte Prometheus (exposition 0.0.4)
+        """
+        def nom_prom(nom):
+            return PREFIXE_PROMETHEUS + re.sub(r"[^a-zA-Z0-9_]", "_", nom)
+
+        def etiquettes_prom(etiquettes, **autres):
+            paires = list(etiquettes) + list(autres.items())
+            if not paires:
+                return ""
+            echapper = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            return "{" + ",".join(f'{k}="{echapper(v)}"' for k, v in paires) + "}"
+
+        lignes_prom = []
+        with self._lock:
+            for table, type_prom, suffixe in ((self.compteurs, "counter", "_total"), (self.jauges, "gauge", "")):
+                deja_types = set()
+                for (nom, etiquettes), valeur in sorted(table.items()):
+                    if nom not in deja_types:
+                        lignes_prom.append(f"# TYPE {nom_prom(nom)}{suffixe} {type_prom}")
+                        deja_types.add(nom)
+                    lignes_prom.append(f"{nom_prom(nom)}{suffixe}{etiquettes_prom(etiquettes)} {valeur}")
+
+            deja_types = set()
+            for (nom, etiquettes), h in sorted(self.histogrammes.items()):
+                if nom not in deja_types:
+                    lignes_prom.append(f"# TYPE {nom_prom(nom)} histogram")
+                    deja_types.add(nom)
+                for borne, cumul in h.cumuls():
+                    lignes_prom.append(f"{nom_prom(nom)}_bucket{etiquettes_prom(etiquettes, le=borne)} {cumul}")
+                lignes_prom.append(f"{nom_prom(nom)}_sum{etiquettes_prom(etiquettes)} {h.somme}")
+                lignes_prom.append(f"{nom_prom(nom)}_count{etiquettes_prom(etiquettes)} {h.nombre}")
+
+            if self.etapes:
+                lignes_prom.append(f"# TYPE {nom_prom('etape_duree_secondes')} gauge")
+                for etape, infos in sorted(self.etapes.items()):
+                    lignes_prom.append(f"{nom_prom('etape_duree_secondes')}"
+                                       f"{etiquettes_prom((), etape=etape)} {infos['duree_s']}")
+        return "\n".join(lignes_prom) + "\n"
+
+
+_metriques_partagees = None
+_lock_registre = threading.Lock()
+
+
+def get_metriques() -> Metriques:
+    """
+    Retourne le registre de métriques partagé par les modules d'ingestion
+    """
+    global _metriques_partagees
+    with _lock_registre:
+        if _metriques_partagees is None:
+            _metriques_partagees = Metriques()
+        return _metriques_partagees
+
+
+def mesurer_etape(nom: str):
+    """
+    Décorateur : enregistre la durée (horloge murale) de la fonction comme étape `nom`
+    """
+    def decorateur(fonction):
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            debut = time.perf_counter()
+            succes = False
+            try:
+                resultat = fonction(*args, **kwargs)
+                succes = True
+                return resultat
+            finally:
+                get_metriques().enregistrer_etape(nom, time.perf_counter() - debut, succes)
+        return enveloppe
+    return decorateur
+
+
+def enregistrer_completude(df, etape: str, colonnes=None) -> None:
+    """
+    Jauges du nombre de lignes et du taux de remplissage (%) de chaque colonne d'un DataFrame
+    """
+    metriques = get_metriques()
+    metriques.fixer("lignes", len(df), etape=etape)
+    if not len(df):
+        return
+    remplissage = df[list(colonnes) if colonnes is not None else df.columns].notna().mean() * 100
+    for colonne, pct in remplissage.items():
+        metriques.fixer("completude_pourcent", round(float(pct), 2), etape=etape, colonne=colonne)
+
+
+def ajouter_options_metriques(parser) -> None:
+    """
+    Options communes des scripts : emplacement du rapport JSON et export Prometheus
+    """
+    parser.add_argument("--metriques",
+                        help=f"Rapport JSON des metriques (defaut: {DOSSIER_METRIQUES}/<etape>_<date>.json)")
+    parser.add_argument("--prometheus", help="Ecrit aussi les metriques au format texte Prometheus dans ce fichier")
+
+
+def ecrire_rapport(etape: str, chemin_json: Optional[str] = None, chemin_prometheus: Optional[str] = None) -> str:
+    """
+    Écrit le rapport JSON de l'exécution (et l'export Prometheus si demandé)
+
+    Returns:
+        str: Chemin du rapport JSON
+    """
+    metriques = get_metriques()
+    if chemin_json is None:
+        horodatage = metriques.debut.strftime("%Y%m%d_%H%M%S")
+        chemin_json = os.path.join(DOSSIER_METRIQUES, f"{etape}_{horodatage}.json")
+
+    for chemin in (chemin_json, chemin_prometheus):
+        dossier = os.path.dirname(chemin) if chemin else ""
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+
+    with open(chemin_json, "w", encoding="utf-8") as f:
+        json.dump(dict(metriques.vers_dict(), etape=etape), f, ensure_ascii=False, indent=2)
+    print(f"[METRIQUES] Rapport : {chemin_json}")
+
+    if chemin_prometheus:
+        with open(chemin_prometheus, "w", encoding="utf-8") as f:
+            f.write(metriques.vers_prometheus())
+        print(f"[METRIQUES] Export Prometheus : {chemin_prometheus}")
+    return chemin_json
@@ -0,0 +1,267 @@
+import contextlib
+import cProfile
+import json
+import linecache
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict
+
+# Profils d'exécution (pstats, piles repliées, instantanés mémoire, résumé)
+DOSSIER_PROFILS = os.path.join("data", "profils")
+
+# Période d'échantillonnage des piles (secondes)
+INTERVALLE_ECHANTILLONNAGE = 0.005
+
+# Profondeur des piles enregistrées par tracemalloc
+PROFONDEUR_TRACEMALLOC = 10
+
+# Nouvel instantané mémoire quand l'allocation dépasse de 25 % celle du précédent
+CROISSANCE_INSTANTANE = 1.25
+
+# Fonctions natives où le temps est passé à attendre (cProfile : "<built-in method ...>")
+PATTERN_SOMMEIL = re.compile(r"time\.sleep")
+PATTERN_RESEAU = re.compile(r"_socket|_ssl|getaddrinfo|select\.|poll")
+PATTERN_ATTENTE = re.compile(r"_thread\.(lock|RLock)|acquire|_queue\.")
+
+# Fichiers où un thread bloqué a sa dernière frame Python
+FICHIERS_RESEAU = ("socket.py", "ssl.py", "selectors.py")
+FICHIERS_ATTENTE = ("threading.py", "queue.py", os.path.join("concurrent", "futures", "thread.py"),
+                    os.path.join("concurrent", "futures", "_base.py"))
+
+
+def nom_frame(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+
+def categorie_native(cle) -> str:
+    """
+    Catégorie d'attente d'une fonction native de cProfile ("sommeil", "reseau",
+    "attente") ou None pour du calcul
+    """
+    fichier, _, fonction = cle
+    if fichier != "~":
+        return None
+    if PATTERN_SOMMEIL.search(fonction):
+        return "sommeil"
+    if PATTERN_RESEAU.search(fonction):
+        return "reseau"
+    if PATTERN_ATTENTE.search(fonction):
+        return "attente"
+    return None
+
+
+def etat_frame(frame) -> str:
+    """
+    Ce que fait un thread d'après sa frame la plus profonde : "sommeil"
+    (ligne en cours contenant sleep), "reseau" (socket / ssl), "attente"
+    (verrou, file, future) ou "cpu"
+    """
+    fichier = frame.f_code.co_filename
+    if fichier.endswith(FICHIERS_RESEAU):
+        return "reseau"
+    if fichier.endswith(FICHIERS_ATTENTE):
+        return "attente"
+    if "sleep(" in linecache.getline(fichier, frame.f_lineno):
+        return "sommeil"
+    return "cpu"
+
+
+class Profilage:
+    """
+    Profil complet d'une étape, activé par --profile :
+
+    - profil CPU déterministe (cProfile) des threads, fusionné en un
+      seul fichier .pstats (snakeviz, `python -m pstats`) ;
+    - piles échantillonnées à l'horloge murale, au format replié
+      ("a;b;c nombre") attendu par flamegraph.pl et speedscope : chaque pile
+      se termine par [cpu], [reseau], [sommeil] ou [attente], ce qui sépare le
+      parsing et les manipulations de DataFrame des temps d'attente ;
+    - instantané tracemalloc pris au pic d'allocation (.tracemalloc, relu par
+      `tracemalloc.Snapshot.load`) ;
+    - résumé JSON : durée murale, temps CPU, temps (thread-secondes) passé
+      en sommeil, sur le réseau et en attente de verrous, principales lignes
+      allocatrices.
+
+    Avant Python 3.12, les threads du pool (ThreadPoolExecutor) démarrés
+    pendant le profilage ont chacun leur cProfile. Depuis 3.12, cProfile
+    repose sur sys.monitoring qui n'admet qu'un profileur actif : seul le
+    thread principal est profilé, les threads du pool restent visibles dans
+    les piles échantillonnées.
+    """
+
+    def __init__(self, etape: str, dossier: str = DOSSIER_PROFILS,
+                 intervalle: float = INTERVALLE_ECHANTILLONNAGE):
+        self.etape = etape
+        self.dossier = dossier
+        self.intervalle = intervalle
+        self.prefixe = os.path.join(dossier, f"{etape}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.piles = Counter()
+        self.etats = Counter()
+        self._profils = []
+        self._lock = threading.Lock()
+        self._arret = threading.Event()
+        self._echantillonneur = None
+        self._instantane = None
+        self._taille_instantane = 0
+
+    def _profiler_thread(self, frame, evenement, arg):
+        # Premier événement d'un nouveau thread : il reçoit son propre profileur
+        profil = cProfile.Profile()
+        try:
+            profil.enable()
+        except ValueError:
+            return  # Un autre profileur est déjà actif
+        with self._lock:
+            self._profils.append(profil)
+
+    def _echantillonner(self):
+        moi = threading.get_ident()
+        noms = {}
+        while not self._arret.wait(self.intervalle):
+            if len(noms) != threading.active_count():
+                noms = {t.ident: re.sub(r"_\d+$", "", t.name) for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == moi:
+                    continue
+                etat = etat_frame(frame)
+                pile = []
+                while frame is not None:
+                    pile.append(nom_frame(frame))
+                    frame = frame.f_back
+                pile.append(noms.get(ident, "thread"))
+                self.piles[";".join(reversed(pile)) + f";[{etat}]"] += 1
+                self.etats[etat] += 1
+
+            actuelle, _ = tracemalloc.get_traced_memory()
+            if actuelle > self._taille_instantane * CROISSANCE_INSTANTANE:
+                self._instantane = tracemalloc.take_snapshot()
+                self._taille_instantane = actuelle
+
+    def __enter__(self):
+        os.makedirs(self.dossier, exist_ok=True)
+        tracemalloc.start(PROFONDEUR_TRACEMALLOC)
+        self._echantillonneur = threading.Thread(target=self._echantillonner, name="profilage", daemon=True)
+        self._echantillonneur.start()
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._profiler_thread)
+
+        self._profil_principal = cProfile.Profile()
+        self._debut = time.perf_counter()
+        self._debut_cpu = time.process_time()
+        try:
+            self._profil_principal.enable()
+        except ValueError:
+            # Profileur déjà actif (débogueur, couverture) : piles et mémoire seulement
+            self._profil_principal = None
+        return self
+
+    def __exit__(self, *exc):
+        if self._profil_principal is not None:
+            self._profil_principal.disable()
+        duree = time.perf_counter() - self._debut
+        duree_cpu = time.process_time() - self._debut_cpu
+        if sys.version_info < (3, 12):
+            threading.setprofile(None)
+        self._arret.set()
+        self._echantillonneur.join()
+
+        _, pic = tracemalloc.get_traced_memory()
+        instantane = self._instantane or tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        instantane = instantane.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                               tracemalloc.Filter(False, __file__)])
+
+        stats = None
+        for profil in [self._profil_principal] + self._profils:
+            if profil is None:
+                continue
+            profil.disable()
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profil)
+                else:
+                    stats.add(profil)
+            except TypeError:
+                pass  # Thread sans aucun appel profilé
+        if stats is None:
+            stats = pstats.Stats()
+        stats.dump_stats(f"{self.prefixe}.pstats")
+
+        with open(f"{self.prefixe}.collapsed", "w", encoding="utf-8") as f:
+            for pile, nombre in sorted(self.piles.items()):
+                f.write(f"{pile} {nombre}\n")
+        instantane.dump(f"{self.prefixe}.tracemalloc")
+
+        resume = self._resumer(stats, duree, duree_cpu, pic, instantane)
+        with open(f"{self.prefixe}_resume.json", "w", encoding="utf-8") as f:
+            json.dump(resume, f, ensure_ascii=False, indent=2)
+        self._afficher(resume, stats)
+        return False
+
+    def _resumer(self, stats, duree, duree_cpu, pic, instantane) -> Dict:
+        attentes = Counter()
+        for cle, (_, _, propre, _, _) in stats.stats.items():
+            categorie = categorie_native(cle)
+            if categorie:
+                attentes[categorie] += propre
+
+        total_echantillons = sum(self.etats.values()) or 1
+        return {
+            "etape": self.etape,
+            "duree_murale_s": round(duree, 3),
+            "cpu_s": round(duree_cpu, 3),
+            # Somme sur tous les threads : peut dépasser la durée murale
+            "thread_secondes": {categorie: round(attentes[categorie], 3)
+                                for categorie in ("sommeil", "reseau", "attente")},
+            "echantillons": {etat: round(nombre / total_echantillons, 3) for etat, nombre in self.etats.most_common()},
+            "pic_memoire_mo": round(pic / 1024 ** 2, 2),
+            "allocations_principales": [
+                {"ligne": str(s.traceback[0]), "taille_ko": round(s.size / 1024, 1), "nombre": s.count}
+                for s in instantane.statistics("lineno")[:15]
+            ],
+            "fichiers": {extension: f"{self.prefixe}{extension}"
+                         for extension in (".pstats", ".collapsed", ".tracemalloc", "_resume.json")},
+        }
+
+    def _afficher(self, resume, stats):
+        print("\n" + "="*70)
+        print(f"PROFIL - {self.etape}")
+        print("="*70)
+        print(f"   Duree murale : {resume['duree_murale_s']:.2f}s, CPU : {resume['cpu_s']:.2f}s, "
+              f"pic memoire : {resume['pic_memoire_mo']:.1f} Mo")
+        attentes = resume["thread_secondes"]
+        print(f"   Attentes (thread-secondes) : sommeil {attentes['sommeil']:.2f}s, "
+              f"reseau {attentes['reseau']:.2f}s, verrous {attentes['attente']:.2f}s")
+        print("   Echantillons : " + ", ".join(f"{etat} {part:.0%}" for etat, part in resume["echantillons"].items()))
+        print("\n   Fonctions les plus couteuses (temps propre, hors attentes) :")
+        couteuses = sorted(((propre, cle) for cle, (_, _, propre, _, _) in stats.stats.items()
+                            if not categorie_native(cle)), reverse=True)
+        for propre, (fichier, ligne, fonction) in couteuses[:10]:
+            print(f"   {propre:8.3f}s  {fonction} ({os.path.basename(fichier)}:{ligne})")
+        for extension, chemin in resume["fichiers"].items():
+            print(f"   [PROFIL] {chemin}")
+
+
+def profiler(etape: str, actif: bool = True, dossier: str = DOSSIER_PROFILS):
+    """
+    Contexte de profilage de l'étape `etape` (sans effet si `actif` est faux)
+    """
+    return Profilage(etape, dossier) if actif else contextlib.nullcontext()
+
+
+def ajouter_options_profilage(parser) -> None:
+    """
+    Options communes des scripts : --profile et dossier des profils
+    """
+    parser.add_argument("--profile", action="store_true",
+                        help="Profil CPU (pstats), piles repliees pour flamegraph et pic memoire (tracemalloc)")
+    parser.add_argument("--profile-dossier", default=DOSSIER_PROFILS,
+                        help=f"Dossier des fichiers de profil (defaut: {DOSSIER_PROFILS})")
@@ -0,0 +1,117 @@
+import numpy as np
+
+RAYON_TERRE_KM = 6371.0
+
+# Décalage des indices de cellule pour les ranger dans un entier positif : chaque
+# indice doit rester dans [-DECALAGE_CELLULE, DECALAGE_CELLULE[ (cellules >= ~0.1 km)
+DECALAGE_CELLULE = 1 << 16
+BASE_CELLULE = 1 << 17
+
+# Points candidats (avant filtrage par distance) examinés au plus par lot de centres
+MAX_CANDIDATS_LOT = 2_000_000
+
+# Les 27 cellules voisines (dont la cellule elle-même) d'une grille 3D
+VOISINS = np.array([(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)],
+                   dtype=np.int64)
+
+
+def vers_cartesien(latitudes, longitudes) -> np.ndarray:
+    """
+    Coordonnées (lat, lon en degrés) -> points 3D en km sur la sphère terrestre.
+    La distance en ligne droite (corde) entre deux points est inférieure à la
+    distance réelle : un point à moins de r km est donc à moins de r km sur
+    chaque axe, ce qui garantit qu'il se trouve dans une cellule voisine.
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return RAYON_TERRE_KM * np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+class GrilleSpatiale:
+    """
+    Index spatial en grille régulière de cellules de `taille_km` de côté.
+
+    Les points sont triés par cellule : les points d'une cellule sont
+    contigus, et une recherche dichotomique sur les identifiants de cellule
+    donne la plage de chaque cellule voisine. Le comptage des points à moins
+    de `taille_km` d'un ensemble de centres se fait en une passe vectorisée
+    (pas de boucle Python par centre ni par point).
+    """
+
+    def __init__(self, latitudes, longitudes, taille_km: float):
+        if not np.isfinite(taille_km) or taille_km <= 0:
+            raise ValueError(f"Taille de cellule invalide : {taille_km} km (doit etre > 0)")
+        self.taille_km = float(taille_km)
+        points = vers_cartesien(latitudes, longitudes)
+        cles = self._cles(self._cellules(points))
+
+        ordre = np.argsort(cles, kind="stable")
+        self.points = points[ordre]
+        self.cles, self.debuts, self.effectifs = np.unique(cles[ordre], return_index=True, return_counts=True)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cellules(self, points: np.ndarray) -> np.ndarray:
+        return np.floor(points / self.taille_km).astype(np.int64)
+
+    def _cles(self, cellules: np.ndarray) -> np.ndarray:
+        if cellules.size and (cellules.min() < -DECALAGE_CELLULE or cellules.max() >= DECALAGE_CELLULE):
+            raise ValueError(f"Cellules de {self.taille_km:g} km trop petites pour l'index "
+                             f"(indices hors de +/-{DECALAGE_CELLULE})")
+        c = cellules + DECALAGE_CELLULE
+        return (c[..., 0] * BASE_CELLULE + c[..., 1]) * BASE_CELLULE + c[..., 2]
+
+    def compter_dans_rayon(self, latitudes, longitudes, max_candidats: int = MAX_CANDIDATS_LOT) -> np.ndarray:
+        """
+        Nombre de points à moins de `taille_km` (distance sur la sphère) de chaque centre.
+        Les centres sans coordonnées (NaN) obtiennent 0.
+
+        Les centres identiques (joueurs nés dans la même commune) ne sont
+        comptés qu'une fois. Les lots sont découpés sur le nombre de points
+        candidats des cellules voisines, et non sur le nombre de centres :
+        la mémoire reste bornée même au cœur d'une grande ville.
+        """
+        centres = vers_cartesien(latitudes, longitudes)
+        resultat = np.zeros(len(centres), dtype=np.int64)
+        valides = np.flatnonzero(~np.isnan(centres).any(axis=1))
+        if not len(self.cles) or not len(valides):
+            return resultat
+
+        uniques, inverse = np.unique(centres[valides], axis=0, return_inverse=True)
+        comptes = np.zeros(len(uniques), dtype=np.int64)
+
+        # Plages (début, effectif) des 27 cellules voisines de chaque centre unique
+        voisines = self._cles(self._cellules(uniques)[:, None, :] + VOISINS[None, :, :])
+        pos = np.clip(np.searchsorted(self.cles, voisines), 0, len(self.cles) - 1)
+        trouvees = self.cles[pos] == voisines
+        debuts = np.where(trouvees, self.debuts[pos], 0)
+        effectifs = np.where(trouvees, self.effectifs[pos], 0)
+        cumul = np.cumsum(effectifs.sum(axis=1))
+
+        # Corde correspondant à l'arc de taille_km
+        corde_max = 2 * RAYON_TERRE_KM * np.sin(self.taille_km / (2 * RAYON_TERRE_KM))
+
+        debut = 0
+        while debut < len(uniques):
+            # Plus grand lot sous max_candidats (au moins un centre)
+            deja = cumul[debut - 1] if debut else 0
+            fin = max(debut + 1, int(np.searchsorted(cumul, deja + max_candidats, side="right")))
+            lot_debuts = debuts[debut:fin].ravel()
+            lot_effectifs = effectifs[debut:fin].ravel()
+            total = int(cumul[fin - 1] - deja)
+
+            if total:
+                # Concaténation de toutes les plages : indices des points candidats
+                centre_de = np.repeat(np.repeat(np.arange(fin - debut), len(VOISINS)), lot_effectifs)
+                decalages = np.repeat(lot_debuts - (np.cumsum(lot_effectifs) - lot_effectifs), lot_effectifs)
+                candidats = decalages + np.arange(total)
+
+                distances2 = ((self.points[candidats] - uniques[debut:fin][centre_de]) ** 2).sum(axis=1)
+                dans_rayon = distances2 <= corde_max ** 2
+                comptes[debut:fin] = np.bincount(centre_de[dans_rayon], minlength=fin - debut)
+            debut = fin
+
+        resultat[valides] = comptes[inverse.ravel()]
+        return resultat
@@ -1,95 +1,181 @@
 import pandas as pd
 import os
 import sys
+import argparse
 
 # --- GESTION DES IMPORTS ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)  # Remonte à /src
-sys.path.append(parent_dir)
+# Même chemin d'import que les scripts d'ingestion ("util.*") : un module importé
+# sous deux noms aurait deux registres de métriques distincts
+sys.path.append(os.path.join(parent_dir, "ingestion"))
 
+from util.get_schemas import lire_csv, lire_entete, ecrire_csv, ecrire_parquet, CHAMPS_JOUEURS
+from util.metriques import (get_metriques, mesurer_etape, enregistrer_completude, ajouter_options_metriques,
+                             ecrire_rapport)
+from util.profilage import profiler, ajouter_options_profilage
 
-def main():
+# Colonnes de partitionnement possibles pour l'export Parquet
+PARTITIONS = {
+    "region": ["commune_region"],
+    "departement": ["commune_departement"],
+}
+
+
+# Déclaration des sources : clé de jointure joueur et colonnes apportées par chacune.
+# "colonnes": None signifie "toutes les colonnes pas encore possédées par une source précédente".
+SOURCES = [
+    {
+        "nom": "Wikipedia",
+        "description": "Wikipedia (liste des joueurs)",
+        "chemin": ("data", "raw", "joueurs_base.csv"),
+        "cle": ["nom", "date_naissance"],
+        "colonnes": ["numero", "date_naissance_iso", "age", "club", "equipe"],
+        "commande": "python src/ingestion/get_players.py",
+    },
+    {
+        "nom": "Wikidata",
+        "description": "Wikidata (taille, ville de naissance)",
+        "chemin": ("data", "processed", "joueurs_enrichis.csv"),
+        "cle": ["nom", "date_naissance"],
+        "colonnes": ["wikidata_id", "taille_m", "ville_naissance"],
+        "commande": "python src/ingestion/get_wikidata_data.py",
+    },
+    {
+        "nom": "INSEE",
+        "description": "INSEE (demographie, geographie)",
+        "chemin": ("data", "processed", "joueurs_avec_insee.csv"),
+        "cle": ["nom", "date_naissance"],
+        "colonnes": [
+            "commune_nom", "commune_population", "commune_surface_km2", "commune_densite",
+            "commune_departement", "commune_region", "commune_code_postal",
+        ],
+        "commande": "python src/ingestion/get_insee_data.py",
+    },
+    {
+        "nom": "Equipements",
+        "description": "Equipements Sportifs (infrastructures)",
+        "chemin": ("data", "final", "joueurs_complet.csv"),
+        "cle": ["nom", "date_naissance"],
+        "colonnes": ["equipements_commune", "equipements_rayon", "equipements_par_1000_hab"],
+        "commande": "python src/ingestion/get_equipements_data.py",
+    },
+]
+
+
+def chemin_source(source):
+    return os.path.join(parent_dir, "..", *source["chemin"])
+
+
+def charger_source(source, colonnes_possedees):
+    """
+    Charge une source une seule fois, en ne lisant que sa clé et les colonnes
+    qu'elle apporte (les colonnes déjà possédées par une autre source sont ignorées).
+
+    Returns:
+        pd.DataFrame ou None si le fichier est absent
+    """
+    path = chemin_source(source)
+    if not os.path.exists(path):
+        return None
+
+    entete = lire_entete(path)
+    manquantes = [c for c in source["cle"] if c not in entete]
+    if manquantes:
+        print(f"      [ATTENTION] Cle de jointure absente de {path}: {manquantes}")
+        return None
+
+    if source["colonnes"] is None:
+        apportees = [c for c in entete if c not in colonnes_possedees and c not in source["cle"]]
+    else:
+        apportees = [c for c in source["colonnes"] if c in entete and c not in colonnes_possedees]
+
+    usecols = list(dict.fromkeys(source["cle"] + apportees))
+    df = lire_csv(path, usecols=usecols)
+    return df[usecols]
+
+
+def fusionner_sources(df_gauche, df_droite, source):
+    """
+    Jointure par hachage (merge gauche) sur la clé déclarée de la source.
+    Les doublons de clé côté source sont écartés pour ne jamais dupliquer un joueur.
+    """
+    cle = source["cle"]
+    doublons = df_droite.duplicated(subset=cle, keep="first")
+    if doublons.any():
+        print(f"      [ATTENTION] {int(doublons.sum())} doublon(s) de cle ignore(s) dans {source['nom']}")
+        df_droite = df_droite[~doublons]
+
+    fusion = df_gauche.merge(df_droite, on=cle, how="left", validate="many_to_one", indicator="_jointure")
+    nb_apparies = int((fusion["_jointure"] == "both").sum())
+    return fusion.drop(columns="_jointure"), nb_apparies
+
+
+@mesurer_etape("fusion")
+def main(parquet=True, partition=None):
+    """
+    Fusionne les sources disponibles et écrit le dataset final.
+
+    Chaque source est jointe à la liste de base sur sa clé joueur déclarée
+    (voir SOURCES) et n'apporte que ses propres colonnes : l'ordre des lignes
+    des fichiers n'a pas d'importance et chaque étape peut tourner séparément.
+
+    Args:
+        parquet (bool): Écrire aussi dataset_final.parquet (typé, compressé)
+        partition (str): "region" ou "departement" pour un export Parquet partitionné
+
+    Returns:
+        bool: False si la liste de base manque (rien n'est écrit)
+    """
     print("="*70)
     print("PIPELINE DE FUSION - Dataset Equipe de France")
     print("="*70)
 
     # A. Chargement de toutes les sources de données disponibles
-    
-    # 1. Données de base (Wikipedia)
-    path_base = os.path.join(parent_dir, "..", "data", "raw", "joueurs_base.csv")
+    base = SOURCES[0]
+    path_base = chemin_source(base)
     if not os.path.exists(path_base):
         print(f"[ERREUR] Le fichier {path_base} n'existe pas.")
-        print("-> Lance d'abord 'python src/ingestion/get_players.py'")
-        return
-
-    df_base = pd.read_csv(path_base)
-    print(f"\n[1/4] OK Donnees Wikipedia chargees : {len(df_base)} joueurs")
-    print(f"      Colonnes: {', '.join(df_base.columns)}")
-
-    # 2. Données Wikidata
-    path_wikidata = os.path.join(parent_dir, "..", "data", "processed", "joueurs_enrichis.csv")
-    if os.path.exists(path_wikidata):
-        df_wikidata = pd.read_csv(path_wikidata)
-        print(f"\n[2/4] OK Donnees Wikidata chargees : {len(df_wikidata)} joueurs")
-        print(f"      Colonnes ajoutees: {', '.join([c for c in df_wikidata.columns if c not in df_base.columns])}")
-    else:
-        print(f"\n[2/4] ATTENTION Donnees Wikidata non trouvees (fichier: {path_wikidata})")
-        print("      -> Lance 'python src/ingestion/get_wikidata_data.py'")
-        df_wikidata = None
-
-    # 3. Données INSEE
-    path_insee = os.path.join(parent_dir, "..", "data", "processed", "joueurs_avec_insee.csv")
-    if os.path.exists(path_insee):
-        df_insee = pd.read_csv(path_insee)
-        print(f"\n[3/4] OK Donnees INSEE chargees : {len(df_insee)} joueurs")
-        
-        # Compter les colonnes INSEE ajoutées
-        if df_wikidata is not None:
-            nouvelles_cols = [c for c in df_insee.columns if c not in df_wikidata.columns]
-        else:
-            nouvelles_cols = [c for c in df_insee.columns if c not in df_base.columns]
-        print(f"      Colonnes ajoutees: {', '.join(nouvelles_cols)}")
-    else:
-        print(f"\n[3/4] ATTENTION Donnees INSEE non trouvees (fichier: {path_insee})")
-        print("      -> Lance 'python src/ingestion/get_insee_data.py'")
-        df_insee = None
-
-    # 4. Données Équipements sportifs
-    path_equipements = os.path.join(parent_dir, "..", "data", "final", "joueurs_complet.csv")
-    if os.path.exists(path_equipements):
-        df_equipements = pd.read_csv(path_equipements)
-        print(f"\n[4/4] OK Donnees Equipements chargees : {len(df_equipements)} joueurs")
-        
-        # Compter les colonnes Équipements ajoutées
-        if df_insee is not None:
-            nouvelles_cols = [c for c in df_equipements.columns if c not in df_insee.columns]
-        else:
-            nouvelles_cols = []
-        if nouvelles_cols:
-            print(f"      Colonnes ajoutees: {', '.join(nouvelles_cols)}")
-    else:
-        print(f"\n[4/4] ATTENTION Donnees Equipements non trouvees (fichier: {path_equipements})")
-        print("      -> Lance 'python src/ingestion/get_equipements_data.py'")
-        df_equipements = None
+        print(f"-> Lance d'abord '{base['commande']}'")
+        print("   (ou tout le pipeline : 'python src/processing/pipeline.py')")
+        return False
 
-    # B. Fusion progressive des données
+    colonnes_possedees = set()
+    donnees = {}
+    for i, source in enumerate(SOURCES, 1):
+        df_source = charger_source(source, colonnes_possedees)
+        donnees[source["nom"]] = df_source
+
+        if df_source is None:
+            print(f"\n[{i}/{len(SOURCES)}] ATTENTION Donnees {source['nom']} non trouvees (fichier: {chemin_source(source)})")
+            print(f"      -> Lance '{source['commande']}'")
+            continue
+
+        apportees = [c for c in df_source.columns if c not in source["cle"]]
+        colonnes_possedees.update(source["cle"] + apportees)
+        print(f"\n[{i}/{len(SOURCES)}] OK Donnees {source['nom']} chargees : {len(df_source)} joueurs")
+        print(f"      Cle: {', '.join(source['cle'])}")
+        if apportees:
+            print(f"      Colonnes ajoutees: {', '.join(apportees)}")
+
+    # B. Fusion des données par clé joueur
     print("\n" + "="*70)
     print("FUSION DES DONNEES")
     print("="*70)
 
-    # Commencer avec la source la plus complète disponible
-    if df_equipements is not None:
-        df_final = df_equipements
-        print("[OK] Utilisation du dataset complet (avec equipements)")
-    elif df_insee is not None:
-        df_final = df_insee
-        print("[OK] Utilisation du dataset avec INSEE")
-    elif df_wikidata is not None:
-        df_final = df_wikidata
-        print("[OK] Utilisation du dataset avec Wikidata")
-    else:
-        df_final = df_base
-        print("[ATTENTION] Utilisation des donnees de base uniquement (Wikipedia)")
+    df_final = donnees[base["nom"]]
+    print(f"[OK] Base {base['nom']} : {len(df_final)} joueurs")
+    for source in SOURCES[1:]:
+        df_source = donnees[source["nom"]]
+        if df_source is None or len(df_source.columns) == len(source["cle"]):
+            continue
+        df_final, nb_apparies = fusionner_sources(df_final, df_source, source)
+        get_metriques().fixer("joueurs_apparies", nb_apparies, source=source["nom"])
+        print(f"[OK] {source['nom']:12s}: {nb_apparies}/{len(df_final)} joueurs apparies sur ({', '.join(source['cle'])})")
+
+    # Ordre des colonnes : celui du schéma quand il est connu
+    ordre = [c["name"] for c in CHAMPS_JOUEURS if c["name"] in df_final.columns]
+    df_final = df_final[ordre + [c for c in df_final.columns if c not in ordre]]
 
     # C. Statistiques du dataset final
     print("\n" + "="*70)
@@ -130,12 +216,28 @@ def main():
     output_path = os.path.join(parent_dir, "..", "data", "final", "dataset_final.csv")
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    df_final.to_csv(output_path, index=False, encoding='utf-8-sig')
+    ecrire_csv(df_final, output_path, encoding='utf-8-sig')
+    enregistrer_completude(df_final, "fusion")
+    
+    # Export colonnaire : lecture de quelques colonnes seulement, types conservés
+    parquet_path = None
+    if parquet:
+        colonnes_partition = [c for c in PARTITIONS.get(partition, []) if c in df_final.columns]
+        if partition and not colonnes_partition:
+            print(f"[ATTENTION] Colonnes de partition '{partition}' absentes : export Parquet non partitionne")
+        if colonnes_partition:
+            parquet_path = os.path.join(parent_dir, "..", "data", "final", "dataset_final_parquet")
+        else:
+            parquet_path = os.path.join(parent_dir, "..", "data", "final", "dataset_final.parquet")
+        if not ecrire_parquet(df_final, parquet_path, partition=colonnes_partition or None):
+            parquet_path = None
     
     print("\n" + "="*70)
     print("SUCCES !")
     print("="*70)
     print(f"Fichier genere: {output_path}")
+    if parquet_path:
+        print(f"Fichier genere: {parquet_path}")
     print(f"\nApercu des donnees:")
     print("-" * 70)
     print(df_final.head(5).to_string())
@@ -144,15 +246,7 @@ def main():
     print("\n" + "="*70)
     print("SOURCES DE DONNEES UTILISEES")
     print("="*70)
-    sources = []
-    if df_base is not None:
-        sources.append("[OK] Wikipedia (liste des joueurs)")
-    if df_wikidata is not None:
-        sources.append("[OK] Wikidata (taille, ville de naissance)")
-    if df_insee is not None:
-        sources.append("[OK] INSEE (demographie, geographie)")
-    if df_equipements is not None:
-        sources.append("[OK] Equipements Sportifs (infrastructures)")
+    sources = [f"[OK] {source['description']}" for source in SOURCES if donnees[source["nom"]] is not None]
     
     for source in sources:
         print(f"  {source}")
@@ -160,7 +254,20 @@ def main():
     print("\n" + "="*70)
     print("PIPELINE TERMINE")
     print("="*70)
+    return True
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Fusion des sources en un dataset final")
+    parser.add_argument("--sans-parquet", action="store_true",
+                        help="N'ecrit que le CSV (pas d'export Parquet)")
+    parser.add_argument("--partition", choices=sorted(PARTITIONS),
+                        help="Partitionne l'export Parquet par region ou departement")
+    ajouter_options_metriques(parser)
+    ajouter_options_profilage(parser)
+    args = parser.parse_args()
+
+    with profiler("fusion", args.profile, args.profile_dossier):
+        succes = main(parquet=not args.sans_parquet, partition=args.partition)
+    ecrire_rapport("fusion", args.metriques, args.prometheus)
+    sys.exit(0 if succes else 1)
\ No newline at end of file
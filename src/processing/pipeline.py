@@ -0,0 +1,335 @@
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+# --- GESTION DES IMPORTS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)  # Remonte à /src
+racine_projet = os.path.dirname(parent_dir)
+sys.path.append(os.path.join(parent_dir, "ingestion"))
+sys.path.append(current_dir)
+
+from get_players import signature_effectif, EQUIPES_WIKIPEDIA
+from util.metriques import get_metriques, ajouter_options_metriques, ecrire_rapport
+from fusion import SOURCES
+
+# État de la dernière exécution : signatures des sources (exécution complète réussie)
+# et empreinte de chaque étape lors de sa dernière exécution réussie
+ETAT_PATH = os.path.join(racine_projet, "data", "cache", "derniere_execution.json")
+SORTIE_FINALE = os.path.join(racine_projet, "data", "final", "dataset_final.csv")
+
+# Code partagé par toutes les étapes : une modification invalide toutes les empreintes
+CODE_COMMUN = os.path.join("src", "ingestion", "util", "*.py")
+
+# Étapes du pipeline et fichiers qu'elles lisent / écrivent (chemins relatifs à la racine).
+# Les dépendances se déduisent des fichiers : une étape dépend de celles qui produisent ses entrées.
+# "arguments" (optionnel) : arguments fixes passés au script.
+# "source_optionnelle" (optionnel) : fichier externe sans lequel l'étape n'a rien à produire ;
+# s'il est absent, l'étape est ignorée (et non relancée à chaque exécution).
+ETAPES = [
+    {
+        "nom": "Wikipedia",
+        "script": os.path.join("src", "ingestion", "get_players.py"),
+        "entrees": [],
+        "sorties": [os.path.join("data", "raw", "joueurs_base.csv")],
+    },
+    {
+        "nom": "Wikidata",
+        "script": os.path.join("src", "ingestion", "get_wikidata_data.py"),
+        "entrees": [os.path.join("data", "raw", "joueurs_base.csv"),
+                    os.path.join("data", "overrides", "corrections_wikidata.json")],
+        "sorties": [os.path.join("data", "processed", "joueurs_enrichis.csv")],
+    },
+    {
+        "nom": "INSEE",
+        "script": os.path.join("src", "ingestion", "get_insee_data.py"),
+        "entrees": [os.path.join("data", "processed", "joueurs_enrichis.csv")],
+        "sorties": [os.path.join("data", "processed", "joueurs_avec_insee.csv")],
+    },
+    {
+        "nom": "Equipements (index)",
+        "script": os.path.join("src", "ingestion", "get_equipements_data.py"),
+        "arguments": ["--index-seulement"],
+        "source_optionnelle": os.path.join("data", "raw", "equipements_sportifs.csv"),
+        "entrees": [os.path.join("data", "raw", "equipements_sportifs.csv")],
+        "sorties": [os.path.join("data", "cache", "equipements_index.npz")],
+    },
+    {
+        "nom": "Equipements",
+        "script": os.path.join("src", "ingestion", "get_equipements_data.py"),
+        "source_optionnelle": os.path.join("data", "raw", "equipements_sportifs.csv"),
+        "entrees": [os.path.join("data", "cache", "equipements_index.npz"),
+                    os.path.join("data", "processed", "joueurs_avec_insee.csv")],
+        "sorties": [os.path.join("data", "final", "joueurs_complet.csv")],
+    },
+    {
+        "nom": "Fusion",
+        "script": os.path.join("src", "processing", "fusion.py"),
+        "entrees": [os.path.join(*source["chemin"]) for source in SOURCES],
+        "sorties": [os.path.join("data", "final", "dataset_final.csv")],
+    },
+]
+
+NB_ETAPES_SIMULTANEES_DEFAUT = 2
+
+# Une sortie doit avoir été écrite après le lancement de son étape ; marge pour les
+# systèmes de fichiers dont les dates de modification sont arrondies (secondes)
+MARGE_DATE_SORTIE = 2.0
+
+
+def dependances(etape, etapes=ETAPES):
+    """
+    Noms des étapes qui produisent au moins une entrée de `etape`
+    """
+    return {autre["nom"] for autre in etapes
+            if autre is not etape and set(autre["sorties"]) & set(etape["entrees"])}
+
+
+def empreinte_fichier(chemin):
+    chemin = os.path.join(racine_projet, chemin)
+    if not os.path.exists(chemin):
+        return "absent"
+    empreinte = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(1 << 20), b""):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def signatures_sources(equipes):
+    """
+    Signature de chaque page d'effectif ({equipe: "revision:..." ou "sha256:..."})
+    """
+    return {
+        equipe: signature_effectif(EQUIPES_WIKIPEDIA[equipe]["url"], EQUIPES_WIKIPEDIA[equipe]["classe"])
+        for equipe in equipes
+    }
+
+
+def empreinte_etape(etape, arguments, externes=None):
+    """
+    Empreinte d'une étape : contenu de son script, du code partagé, de ses
+    fichiers d'entrée, ses arguments et éventuelles signatures externes
+    (révision des pages sources pour l'étape Wikipedia)
+    """
+    code_commun = sorted(os.path.relpath(p, racine_projet)
+                         for p in glob.glob(os.path.join(racine_projet, CODE_COMMUN)))
+    contenu = {
+        "script": empreinte_fichier(etape["script"]),
+        "code_commun": {p: empreinte_fichier(p) for p in code_commun},
+        "entrees": {p: empreinte_fichier(p) for p in etape["entrees"]},
+        "arguments": arguments,
+        "externes": externes or {},
+    }
+    return hashlib.sha256(json.dumps(contenu, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def charger_etat():
+    if not os.path.exists(ETAT_PATH):
+        return None
+    with open(ETAT_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def enregistrer_etat(etat):
+    os.makedirs(os.path.dirname(ETAT_PATH), exist_ok=True)
+    with open(ETAT_PATH, "w", encoding="utf-8") as f:
+        json.dump(etat, f, ensure_ascii=False, indent=2)
+
+
+def verifier_changements(etat, signatures):
+    """
+    Compare les signatures actuelles à celles de la dernière exécution complète réussie.
+
+    Returns:
+        Tuple: (quelque chose a changé ?, raison lisible)
+    """
+    if etat is None or "signatures" not in etat:
+        return True, "premiere execution (aucun etat enregistre)"
+    if not os.path.exists(SORTIE_FINALE):
+        return True, f"sortie absente ({SORTIE_FINALE})"
+
+    precedentes = etat["signatures"]
+    if set(precedentes) != set(signatures):
+        return True, f"selections differentes ({sorted(precedentes)} -> {sorted(signatures)})"
+
+    modifiees = [f"{equipe}: {precedentes[equipe]} -> {signature}"
+                 for equipe, signature in signatures.items() if precedentes[equipe] != signature]
+    if modifiees:
+        return True, "source modifiee (" + "; ".join(modifiees) + ")"
+
+    return False, (f"aucune source modifiee depuis la derniere execution reussie du {etat.get('date')} "
+                   f"({', '.join(f'{e}: {s}' for e, s in signatures.items())})")
+
+
+def lancer_etape(etape, arguments):
+    """
+    Exécute le script d'une étape dans un sous-processus (sortie capturée
+    pour ne pas entremêler les journaux des étapes simultanées)
+
+    Returns:
+        Tuple: (code de retour, sortie, durée en secondes)
+    """
+    debut = time.perf_counter()
+    resultat = subprocess.run([sys.executable, etape["script"]] + arguments, cwd=racine_projet,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return resultat.returncode, resultat.stdout, time.perf_counter() - debut
+
+
+def sorties_non_ecrites(etape, lancement):
+    """
+    Sorties déclarées de l'étape absentes ou plus anciennes que son lancement
+    (un script peut se terminer avec le code 0 sans rien écrire)
+    """
+    manquantes = []
+    for sortie in etape["sorties"]:
+        chemin = os.path.join(racine_projet, sortie)
+        if not os.path.exists(chemin) or os.path.getmtime(chemin) < lancement - MARGE_DATE_SORTIE:
+            manquantes.append(sortie)
+    return manquantes
+
+
+def executer_dag(equipes=("france",), forcer=False, nb_simultanees=NB_ETAPES_SIMULTANEES_DEFAUT,
+                 etapes=ETAPES):
+    """
+    Exécute les étapes dans l'ordre de leurs dépendances de fichiers.
+
+    Les signatures des pages sources sont relevées une seule fois et
+    comparées à celles de la dernière exécution complète réussie (raison
+    affichée). Une étape est ignorée si son empreinte (code, entrées,
+    arguments, signatures pour l'étape Wikipedia) est identique à celle de
+    sa dernière exécution réussie et que ses sorties existent. Une étape
+    qui retourne un fichier identique laisse donc ses dépendantes ignorées.
+    Les étapes indépendantes tournent en parallèle (au plus
+    `nb_simultanees`). Une étape en échec (code non nul, ou sorties
+    déclarées non écrites) annule ses dépendantes.
+
+    Returns:
+        bool: True si toutes les étapes sont à jour
+    """
+    etat = charger_etat() or {}
+    etats_etapes = etat.setdefault("etapes", {})
+    signatures = signatures_sources(equipes)
+    change, raison = verifier_changements(etat, signatures)
+    print(f"[{'CHANGEMENT' if change else 'INCHANGE'}] Sources : {raison}")
+
+    arguments = {etape["nom"]: list(etape.get("arguments", [])) for etape in etapes}
+    arguments["Wikipedia"] = ["--equipes"] + list(equipes)
+
+    restantes = list(etapes)
+    terminees, echouees, executees, ignorees = set(), set(), [], []
+    en_cours = {}
+
+    with ThreadPoolExecutor(max_workers=nb_simultanees) as executor:
+        while restantes or en_cours:
+            for etape in list(restantes):
+                deps = dependances(etape, etapes)
+                if deps & echouees:
+                    print(f"[ANNULEE] {etape['nom']} : depend de {', '.join(sorted(deps & echouees))} (en echec)")
+                    echouees.add(etape["nom"])
+                    restantes.remove(etape)
+                    continue
+                if not deps <= terminees:
+                    continue
+
+                restantes.remove(etape)
+                source = etape.get("source_optionnelle")
+                if source and not os.path.exists(os.path.join(racine_projet, source)):
+                    print(f"[IGNOREE] {etape['nom']} : source optionnelle absente ({source})")
+                    terminees.add(etape["nom"])
+                    ignorees.append(etape["nom"])
+                    get_metriques().incrementer("etapes_pipeline", statut="ignoree")
+                    continue
+
+                externes = signatures if etape["nom"] == "Wikipedia" else None
+                empreinte = empreinte_etape(etape, arguments[etape["nom"]], externes)
+                sorties_presentes = all(os.path.exists(os.path.join(racine_projet, s)) for s in etape["sorties"])
+
+                if not forcer and sorties_presentes and etats_etapes.get(etape["nom"], {}).get("empreinte") == empreinte:
+                    print(f"[INCHANGE] {etape['nom']} : empreinte identique a l'execution du "
+                          f"{etats_etapes[etape['nom']].get('date')}")
+                    terminees.add(etape["nom"])
+                    get_metriques().incrementer("etapes_pipeline", statut="inchangee")
+                    continue
+
+                raison = "execution forcee" if forcer else (
+                    "sortie absente" if not sorties_presentes else "code ou entrees modifies")
+                print(f"[LANCEMENT] {etape['nom']} ({raison})")
+                future = executor.submit(lancer_etape, etape, arguments[etape["nom"]])
+                en_cours[future] = (etape, empreinte, time.time())
+
+            if not en_cours:
+                if restantes:
+                    # Dépendances introuvables (cycle ou étape manquante)
+                    for etape in restantes:
+                        print(f"[ERREUR] {etape['nom']} : dependances non satisfaites")
+                    return False
+                break
+
+            finies, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+            for future in finies:
+                etape, empreinte, lancement = en_cours.pop(future)
+                code, sortie, duree = future.result()
+                manquantes = sorties_non_ecrites(etape, lancement) if code == 0 else []
+                succes = code == 0 and not manquantes
+                get_metriques().enregistrer_etape(etape["nom"], duree, succes=succes)
+                get_metriques().incrementer("etapes_pipeline", statut="executee" if succes else "echec")
+                print(f"\n----- {etape['nom']} ({duree:.1f}s) -----")
+                print(sortie.rstrip())
+                print("-" * 40)
+                if code != 0:
+                    print(f"[ERREUR] Etape {etape['nom']} en echec (code {code})")
+                    echouees.add(etape["nom"])
+                    continue
+                if manquantes:
+                    print(f"[ERREUR] Etape {etape['nom']} terminee sans ecrire ses sorties : {', '.join(manquantes)}")
+                    echouees.add(etape["nom"])
+                    continue
+                terminees.add(etape["nom"])
+                executees.append(etape["nom"])
+                etats_etapes[etape["nom"]] = {"empreinte": empreinte,
+                                              "date": datetime.now().isoformat(timespec="seconds")}
+                enregistrer_etat(etat)
+
+    print("\n" + "="*70)
+    if echouees:
+        print(f"[ECHEC] Etapes en echec ou annulees : {', '.join(sorted(echouees))}")
+        return False
+
+    # Signatures enregistrées seulement quand toutes les étapes sont à jour
+    if change or executees:
+        etat.update(signatures=signatures, date=datetime.now().isoformat(timespec="seconds"))
+        enregistrer_etat(etat)
+    if ignorees:
+        print(f"[IGNOREE] Etapes sans leur source optionnelle : {', '.join(ignorees)}")
+    if not executees:
+        print("[INCHANGE] Aucune source ni aucun code modifie : rien a executer")
+    else:
+        print(f"[OK] Etapes executees : {', '.join(executees)}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Execute le pipeline (DAG d'etapes avec cache par empreinte)")
+    parser.add_argument("--equipes", nargs="+", default=["france"], choices=sorted(EQUIPES_WIKIPEDIA),
+                        help="Selections a surveiller et recuperer (defaut: france)")
+    parser.add_argument("--forcer", action="store_true",
+                        help="Execute toutes les etapes meme si leur empreinte est inchangee")
+    parser.add_argument("--paralleles", type=int, default=NB_ETAPES_SIMULTANEES_DEFAUT,
+                        help=f"Etapes independantes executees simultanement (defaut: {NB_ETAPES_SIMULTANEES_DEFAUT})")
+    ajouter_options_metriques(parser)
+    args = parser.parse_args()
+
+    print("="*70)
+    print("PIPELINE - Execution des etapes")
+    print("="*70)
+    succes = executer_dag(args.equipes, args.forcer, args.paralleles)
+    ecrire_rapport("pipeline", args.metriques, args.prometheus)
+    sys.exit(0 if succes else 1)
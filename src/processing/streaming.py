@@ -0,0 +1,309 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+
+import pandas as pd
+
+# --- GESTION DES IMPORTS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)  # Remonte à /src
+sys.path.append(os.path.join(parent_dir, "ingestion"))
+
+from get_players import iter_current_squad_wikipedia
+from get_internationaux import iter_internationaux_wikidata
+from get_wikidata_data import get_wikidata_info_batch, creer_client_sparql, taille_chunk, TAILLE_CHUNK_DEFAUT
+from get_insee_data import resoudre_communes, NB_WORKERS_DEFAUT, REQUETES_PAR_SECONDE_DEFAUT
+from util.communes import charger_index_communes
+from util.get_schemas import lire_csv, typer_dataframe
+from util.joueur import CHAMPS, joueurs_depuis_dataframe
+
+# Marqueur de fin de flux transmis d'une étape à la suivante
+FIN = object()
+
+TAILLE_BUFFER_DEFAUT = 200      # Enregistrements en attente au maximum entre deux étapes
+DELAI_LOT_DEFAUT = 0.5          # Secondes d'attente max pour compléter un lot partiel
+TAILLE_ECRITURE_DEFAUT = 1000   # Lignes écrites par ajout dans le CSV final
+
+
+def envoyer(file, element, arret):
+    """
+    Dépose un élément dans une file bornée, sans rester bloqué si le pipeline s'arrête
+    """
+    while not arret.is_set():
+        try:
+            file.put(element, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def lire_lot(file, taille_lot, delai_max, arret):
+    """
+    Lit jusqu'à `taille_lot` éléments : attend le premier, puis complète
+    le lot pendant au plus `delai_max` secondes (un lot partiel part quand
+    l'amont est lent, pour que les étapes se chevauchent).
+
+    Returns:
+        Tuple: (lot, fin_atteinte)
+    """
+    lot = []
+    limite = None
+    while len(lot) < taille_lot and not arret.is_set():
+        attente = 0.2 if limite is None else max(0.0, min(0.2, limite - time.monotonic()))
+        try:
+            element = file.get(timeout=attente)
+        except queue.Empty:
+            if limite is not None and time.monotonic() >= limite:
+                break
+            continue
+        if element is FIN:
+            return lot, True
+        lot.append(element)
+        if limite is None:
+            limite = time.monotonic() + delai_max
+    return lot, arret.is_set()
+
+
+class Etape(threading.Thread):
+    """
+    Étape du pipeline : lit des lots de Joueur dans `entree`, applique
+    `traiter_lot` puis transmet les enregistrements à `sortie`.
+    """
+
+    def __init__(self, nom, entree, sortie, traiter_lot, arret, erreurs,
+                 taille_lot=TAILLE_CHUNK_DEFAUT, delai_max=DELAI_LOT_DEFAUT):
+        super().__init__(name=nom, daemon=True)
+        self.nom = nom
+        self.entree = entree
+        self.sortie = sortie
+        self.traiter_lot = traiter_lot
+        self.arret = arret
+        self.erreurs = erreurs
+        self.taille_lot = taille_lot
+        self.delai_max = delai_max
+        self.nb_traites = 0
+        self.duree_traitement = 0.0
+
+    def run(self):
+        try:
+            fin = False
+            while not fin:
+                lot, fin = lire_lot(self.entree, self.taille_lot, self.delai_max, self.arret)
+                if lot:
+                    debut = time.perf_counter()
+                    self.traiter_lot(lot)
+                    self.duree_traitement += time.perf_counter() - debut
+                    self.nb_traites += len(lot)
+                    for joueur in lot:
+                        if not envoyer(self.sortie, joueur, self.arret):
+                            return
+        except Exception as e:
+            self.erreurs.append((self.nom, e))
+            self.arret.set()
+        finally:
+            if self.sortie is not None:
+                envoyer(self.sortie, FIN, self.arret)
+
+
+def creer_traitement_wikidata(chunk_size):
+    """
+    Étape Wikidata : chaque lot est résolu par les requêtes VALUES groupées
+    (les joueurs déjà enrichis par la source, ex: ingestion en masse, sont laissés tels quels)
+    """
+    sparql = creer_client_sparql()
+
+    def traiter(lot):
+        a_resoudre = [j for j in lot if j.nom and not j.wikidata_id]
+        if not a_resoudre:
+            return
+        # Position dans le lot comme clé : les homonymes gardent chacun leur date
+        joueurs = {i: (j.nom, j.date_naissance) for i, j in enumerate(a_resoudre)}
+        resultats = get_wikidata_info_batch(joueurs, sparql, chunk_size=chunk_size)
+        for i, joueur in enumerate(a_resoudre):
+            info = resultats.get(i)
+            if info:
+                joueur.maj(info)
+
+    return traiter
+
+
+def creer_traitement_insee(nb_workers, requetes_par_seconde, hors_ligne):
+    """
+    Étape INSEE : les villes de chaque lot sont résolues (index local puis API),
+    avec mémorisation des villes déjà vues pendant l'exécution
+    """
+    index_communes = charger_index_communes()
+    memo = {}
+
+    def traiter(lot):
+        villes = {j.ville_naissance for j in lot if j.ville_naissance and j.ville_naissance not in memo}
+        francaises = [v for v in villes if "etranger" not in str(v).lower()]
+        memo.update({v: {} for v in villes if v not in francaises})
+        if francaises:
+            memo.update(resoudre_communes(francaises, nb_workers=nb_workers,
+                                          requetes_par_seconde=requetes_par_seconde,
+                                          index=index_communes, hors_ligne=hors_ligne))
+        for joueur in lot:
+            if joueur.ville_naissance:
+                joueur.maj(memo.get(joueur.ville_naissance, {}))
+
+    return traiter
+
+
+def ecrire_flux(entree, chemin_sortie, arret, erreurs, compteur, taille_ecriture=TAILLE_ECRITURE_DEFAUT):
+    """
+    Dernière étape (fusion) : ajoute les enregistrements au CSV final par blocs,
+    sans jamais garder tout le dataset en mémoire
+    """
+    try:
+        os.makedirs(os.path.dirname(chemin_sortie) or ".", exist_ok=True)
+        premier_bloc = True
+        fin = False
+        while not fin:
+            lot, fin = lire_lot(entree, taille_ecriture, DELAI_LOT_DEFAUT, arret)
+            if not lot and not premier_bloc:
+                continue
+            bloc = typer_dataframe(pd.DataFrame([j.en_dict() for j in lot], columns=list(CHAMPS)))
+            bloc.to_csv(chemin_sortie, index=False, encoding="utf-8-sig" if premier_bloc else "utf-8",
+                        mode="w" if premier_bloc else "a", header=premier_bloc)
+            premier_bloc = False
+            compteur["ecrits"] += len(lot)
+    except Exception as e:
+        erreurs.append(("fusion", e))
+        arret.set()
+
+
+def produire(source, sortie, arret, erreurs, compteur):
+    """
+    Source du flux : liste Wikipedia (générateur) ou CSV existant lu par morceaux
+    """
+    try:
+        if source == "wikipedia":
+            joueurs = iter_current_squad_wikipedia()
+        elif source == "wikidata":
+            joueurs = iter_internationaux_wikidata()
+        else:
+            joueurs = (j for morceau in lire_csv(source, chunksize=TAILLE_ECRITURE_DEFAUT)
+                       for j in joueurs_depuis_dataframe(morceau))
+        for joueur in joueurs:
+            if not envoyer(sortie, joueur, arret):
+                return
+            compteur["lus"] += 1
+    except Exception as e:
+        erreurs.append(("source", e))
+        arret.set()
+    finally:
+        envoyer(sortie, FIN, arret)
+
+
+def executer_pipeline_streaming(source="wikipedia", chemin_sortie=None,
+                                taille_buffer=TAILLE_BUFFER_DEFAUT, chunk_size=TAILLE_CHUNK_DEFAUT,
+                                nb_workers=NB_WORKERS_DEFAUT,
+                                requetes_par_seconde=REQUETES_PAR_SECONDE_DEFAUT,
+                                hors_ligne=False):
+    """
+    Pipeline complet en flux : Wikipedia -> Wikidata -> INSEE -> dataset final.
+
+    Chaque étape tourne dans son propre thread et communique par une file
+    bornée de `taille_buffer` enregistrements : les attentes réseau d'une étape
+    recouvrent le travail des autres, et la mémoire reste constante quel que
+    soit le nombre de joueurs (sauf la source "wikipedia", matérialisée : voir
+    `iter_current_squad_wikipedia`). Aucun fichier intermédiaire n'est écrit.
+
+    Args:
+        source (str): "wikipedia", "wikidata" (tous les internationaux) ou chemin d'un CSV de base (colonnes nom, date_naissance, ...)
+        chemin_sortie (str): CSV final (par défaut data/final/dataset_final.csv)
+        taille_buffer (int): Taille maximale de chaque file entre étapes
+        chunk_size (int): Taille des lots envoyés à Wikidata
+        nb_workers (int): Requêtes API Geo simultanées
+        requetes_par_seconde (float): Plafond de débit vers l'API Geo
+        hors_ligne (bool): INSEE uniquement via l'index local des communes
+
+    Returns:
+        bool: True si le pipeline s'est terminé sans erreur
+    """
+    if chemin_sortie is None:
+        chemin_sortie = os.path.join(parent_dir, "..", "data", "final", "dataset_final.csv")
+
+    print("="*70)
+    print("PIPELINE EN STREAMING - Wikipedia -> Wikidata -> INSEE -> Fusion")
+    print("="*70)
+    print(f"[INFO] Source: {source} | Buffer: {taille_buffer} | Lots Wikidata: {chunk_size}")
+
+    debut = time.perf_counter()
+    arret = threading.Event()
+    erreurs = []
+    compteur = {"lus": 0, "ecrits": 0}
+
+    vers_wikidata = queue.Queue(maxsize=taille_buffer)
+    vers_insee = queue.Queue(maxsize=taille_buffer)
+    vers_fusion = queue.Queue(maxsize=taille_buffer)
+
+    producteur = threading.Thread(target=produire, name="source", daemon=True,
+                                  args=(source, vers_wikidata, arret, erreurs, compteur))
+    wikidata = Etape("wikidata", vers_wikidata, vers_insee, creer_traitement_wikidata(chunk_size),
+                     arret, erreurs, taille_lot=chunk_size)
+    insee = Etape("insee", vers_insee, vers_fusion,
+                  creer_traitement_insee(nb_workers, requetes_par_seconde, hors_ligne),
+                  arret, erreurs, taille_lot=chunk_size)
+    ecrivain = threading.Thread(target=ecrire_flux, name="fusion", daemon=True,
+                                args=(vers_fusion, chemin_sortie, arret, erreurs, compteur))
+
+    threads = [producteur, wikidata, insee, ecrivain]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+        print("\n[ARRET] Interruption demandee, arret des etapes...")
+        arret.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        return False
+
+    duree = time.perf_counter() - debut
+    print("\n" + "="*70)
+    print("BILAN DU STREAMING")
+    print("="*70)
+    print(f"   Joueurs lus:      {compteur['lus']}")
+    print(f"   Wikidata:         {wikidata.nb_traites} joueurs ({wikidata.duree_traitement:.1f}s de traitement)")
+    print(f"   INSEE:            {insee.nb_traites} joueurs ({insee.duree_traitement:.1f}s de traitement)")
+    print(f"   Lignes ecrites:   {compteur['ecrits']} -> {chemin_sortie}")
+    print(f"   Duree totale:     {duree:.1f}s")
+
+    if erreurs:
+        for etape, erreur in erreurs:
+            print(f"[ERREUR] Etape '{etape}': {erreur}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline complet en streaming (sans CSV intermediaires)")
+    parser.add_argument("--source", default="wikipedia",
+                        help="'wikipedia' (defaut), 'wikidata' (tous les internationaux) "
+                             "ou chemin d'un CSV de joueurs de base")
+    parser.add_argument("--sortie", default=None, help="CSV final (defaut: data/final/dataset_final.csv)")
+    parser.add_argument("--buffer", type=int, default=TAILLE_BUFFER_DEFAUT,
+                        help=f"Taille des files entre etapes (defaut: {TAILLE_BUFFER_DEFAUT})")
+    parser.add_argument("--chunk-size", type=taille_chunk, default=TAILLE_CHUNK_DEFAUT,
+                        help=f"Taille des lots Wikidata (defaut: {TAILLE_CHUNK_DEFAUT})")
+    parser.add_argument("--workers", type=int, default=NB_WORKERS_DEFAUT,
+                        help=f"Requetes API Geo simultanees (defaut: {NB_WORKERS_DEFAUT})")
+    parser.add_argument("--rps", type=float, default=REQUETES_PAR_SECONDE_DEFAUT,
+                        help=f"Plafond de requetes API Geo par seconde (defaut: {REQUETES_PAR_SECONDE_DEFAUT})")
+    parser.add_argument("--hors-ligne", action="store_true",
+                        help="INSEE uniquement via l'index local des communes")
+    args = parser.parse_args()
+
+    ok = executer_pipeline_streaming(source=args.source, chemin_sortie=args.sortie,
+                                     taille_buffer=args.buffer, chunk_size=args.chunk_size,
+                                     nb_workers=args.workers, requetes_par_seconde=args.rps,
+                                     hors_ligne=args.hors_ligne)
+    sys.exit(0 if ok else 1)
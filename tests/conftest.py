@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Même résolution des imports que les scripts : "util.*" depuis src/ingestion,
+# modules de traitement depuis src/processing
+racine_projet = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(racine_projet, "src", "ingestion"))
+sys.path.insert(0, os.path.join(racine_projet, "src", "processing"))
@@ -0,0 +1,146 @@
+import sqlite3
+
+import pytest
+
+from util import cache as module_cache
+from util.cache import CacheHTTP, construire_cle
+
+
+class Horloge:
+    def __init__(self, debut=1_000_000.0):
+        self.maintenant = debut
+
+    def __call__(self):
+        return self.maintenant
+
+
+@pytest.fixture
+def horloge(monkeypatch):
+    horloge = Horloge()
+    monkeypatch.setattr(module_cache.time, "time", horloge)
+    return horloge
+
+
+@pytest.fixture
+def cache(tmp_path, horloge):
+    cache = CacheHTTP(str(tmp_path / "cache.sqlite"), max_entrees=3, ttl_par_source={"test": 100})
+    yield cache
+    cache.fermer()
+
+
+def test_cle_independante_des_espaces_et_de_l_ordre_des_params():
+    assert construire_cle("s", "SELECT  ?x\n  WHERE {}", {"a": 1, "b": 2}) == \
+        construire_cle("s", "SELECT ?x WHERE {}", {"b": 2, "a": 1})
+    assert construire_cle("s", "q") != construire_cle("autre", "q")
+
+
+def test_hit_puis_expiration_apres_ttl(cache, horloge):
+    cache.set("test", "q", {"valeur": 1})
+    assert cache.get("test", "q") == {"valeur": 1}
+
+    horloge.maintenant += 101
+    assert cache.get("test", "q") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+    # L'entrée expirée a été supprimée : elle ne revient pas si l'horloge recule
+    horloge.maintenant -= 101
+    assert cache.get("test", "q") is None
+
+
+def test_none_jamais_mis_en_cache(cache):
+    cache.set("test", "q", None)
+    assert cache.get("test", "q") is None
+
+
+def test_eviction_lru(cache, horloge):
+    for i in range(3):
+        horloge.maintenant += 1
+        cache.set("test", f"q{i}", i)
+
+    # q0 est relue : q1 devient la moins récemment utilisée
+    horloge.maintenant += 1
+    assert cache.get("test", "q0") == 0
+
+    horloge.maintenant += 1
+    cache.set("test", "q3", 3)
+
+    assert cache.get("test", "q1") is None
+    assert [cache.get("test", f"q{i}") for i in (0, 2, 3)] == [0, 2, 3]
+
+
+def test_cache_negatif_jusqu_a_la_date_de_nouvelle_tentative(cache, horloge):
+    assert cache.echec_connu("test", "Inconnu") is None
+
+    cache.marquer_echec("test", "Inconnu", raison="introuvable", duree=50)
+    assert cache.echec_connu("test", "Inconnu") == "introuvable"
+    assert cache.stats()["echecs_connus"] == 1
+
+    horloge.maintenant += 50
+    assert cache.echec_connu("test", "Inconnu") is None
+
+
+def test_vider_echecs_par_source(cache):
+    cache.marquer_echec("test", "a", duree=1000)
+    cache.marquer_echec("autre", "b", duree=1000)
+    cache.set("test", "q", 1)
+
+    cache.vider_echecs("test")
+
+    assert cache.echec_connu("test", "a") is None
+    assert cache.echec_connu("autre", "b") == "introuvable"
+    assert cache.get("test", "q") == 1
+
+
+def dates_acces(chemin):
+    with sqlite3.connect(chemin) as conn:
+        return dict(conn.execute("SELECT cle, dernier_acces FROM reponses"))
+
+
+def test_hits_sans_ecriture_jusqu_au_prochain_set(cache, horloge):
+    cache.set("test", "q0", 0)
+    avant = dates_acces(cache.chemin)
+
+    horloge.maintenant += 10
+    for _ in range(5):
+        assert cache.get("test", "q0") == 0
+    assert dates_acces(cache.chemin) == avant
+    assert cache.stats()["hits"] == 5
+
+    cache.set("test", "q1", 1)
+    assert horloge.maintenant in dates_acces(cache.chemin).values()
+    assert len(set(dates_acces(cache.chemin).values())) == 1
+
+
+def test_dates_d_acces_ecrites_par_lots_et_a_la_fermeture(tmp_path, horloge, monkeypatch):
+    monkeypatch.setattr(module_cache, "MAX_ACCES_EN_ATTENTE", 3)
+    chemin = str(tmp_path / "cache.sqlite")
+    cache = CacheHTTP(chemin)
+    for i in range(4):
+        cache.set("test", f"q{i}", i)
+
+    horloge.maintenant += 10
+    for i in range(3):
+        cache.get("test", f"q{i}")
+    # Troisième accès en attente : le lot est écrit
+    assert sorted(dates_acces(chemin).values()) == [horloge.maintenant - 10] + [horloge.maintenant] * 3
+
+    horloge.maintenant += 10
+    cache.get("test", "q3")
+    cache.fermer()
+    assert max(dates_acces(chemin).values()) == horloge.maintenant
+
+
+def test_persistance_entre_deux_ouvertures(tmp_path, horloge):
+    chemin = str(tmp_path / "cache.sqlite")
+    premier = CacheHTTP(chemin)
+    premier.set("wikidata", "q", [1, 2])
+    premier.marquer_echec("wikidata", "x")
+    premier.fermer()
+
+    second = CacheHTTP(chemin)
+    try:
+        assert second.get("wikidata", "q") == [1, 2]
+        assert second.echec_connu("wikidata", "x") == "introuvable"
+    finally:
+        second.fermer()
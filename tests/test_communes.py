@@ -0,0 +1,125 @@
+import os
+
+import pytest
+import requests
+
+from util import communes as module_communes
+from util.communes import IndexCommunes, normaliser_nom, construire_index_communes, charger_index_communes
+
+
+def commune(nom, code, departement, population, codes_postaux):
+    return {"nom": nom, "code": code, "population": population, "surface": 1000,
+            "codeDepartement": departement, "codeRegion": "00", "codesPostaux": codes_postaux}
+
+
+COMMUNES = [
+    commune("Paris", "75056", "75", 2_100_000, ["75001", "75013", "75116"]),
+    commune("Lyon", "69123", "69", 520_000, ["69001", "69008"]),
+    commune("Saint-Denis", "97411", "974", 150_000, ["97400", "97490"]),
+    commune("Saint-Denis", "93066", "93", 113_000, ["93200", "93210"]),
+    commune("Saint-Denis", "11339", "11", 500, ["11310"]),
+    commune("Saint-Étienne", "42218", "42", 173_000, ["42000", "42100"]),
+    commune("L'Haÿ-les-Roses", "94038", "94", 31_000, ["94240"]),
+]
+ARRONDISSEMENTS = [
+    {**commune("Paris 13e Arrondissement", "75113", "75", 180_000, ["75013"]), "codeParent": "75056"},
+    {**commune("Lyon 8e Arrondissement", "69388", "69", 85_000, ["69008"]), "codeParent": "69123"},
+]
+
+
+@pytest.fixture
+def index():
+    return IndexCommunes(COMMUNES, ARRONDISSEMENTS)
+
+
+def test_normaliser_nom_accents_tirets_apostrophes():
+    assert normaliser_nom("Saint-Étienne") == "saint etienne"
+    assert normaliser_nom("L'Haÿ-les-Roses") == normaliser_nom("l’hay les  roses") == "l hay les roses"
+    assert normaliser_nom(None) == ""
+
+
+@pytest.mark.parametrize("ville", ["Saint-Étienne", "saint etienne", "SAINT-ETIENNE", "Saint Étienne"])
+def test_accents_casse_et_tirets_ignores(index, ville):
+    assert index.rechercher(ville)["commune_nom"] == "Saint-Étienne"
+
+
+def test_apostrophe_et_trema(index):
+    assert index.rechercher("L'Hay-les-Roses")["commune_code_postal"] == "94240"
+
+
+def test_homonymes_le_plus_peuple_par_defaut(index):
+    assert index.rechercher("Saint-Denis")["commune_departement"] == "974"
+
+
+@pytest.mark.parametrize("ville, departement, attendu", [
+    ("Saint-Denis (93)", None, "93"),
+    ("Saint-Denis (11)", None, "11"),
+    ("Saint-Denis", "93", "93"),
+    ("Saint-Denis (99)", None, "974"),  # Département inconnu : choix par défaut
+])
+def test_homonymes_departages_par_departement(index, ville, departement, attendu):
+    assert index.rechercher(ville, departement)["commune_departement"] == attendu
+
+
+def test_homonymes_departages_par_code_postal(index):
+    resultat = index.rechercher("Saint-Denis (93210)")
+    assert (resultat["commune_departement"], resultat["commune_code_postal"]) == ("93", "93210")
+    assert index.rechercher("Saint-Denis", code_postal="11310")["commune_departement"] == "11"
+    # Code postal sans homonyme correspondant : choix par défaut, son propre code postal
+    resultat = index.rechercher("Saint-Denis", code_postal="75013")
+    assert (resultat["commune_departement"], resultat["commune_code_postal"]) == ("974", "97400")
+
+
+@pytest.mark.parametrize("ville, code_postal", [
+    ("13e arrondissement de Paris", "75013"),
+    ("Paris 13e", "75013"),
+    ("Paris 13", "75013"),
+    ("8e arrondissement de Lyon", "69008"),
+])
+def test_arrondissements_rattaches_a_la_commune(index, ville, code_postal):
+    resultat = index.rechercher(ville)
+    assert resultat["commune_nom"] in ("Paris", "Lyon")
+    assert resultat["commune_code_postal"] == code_postal
+
+
+def test_arrondissement_inconnu_garde_la_commune(index):
+    resultat = index.rechercher("20e arrondissement de Paris")
+    assert (resultat["commune_nom"], resultat["commune_code_postal"]) == ("Paris", "75001")
+
+
+@pytest.mark.parametrize("ville", ["Etranger (Dakar)", "", None, "Ville inexistante"])
+def test_introuvable_ou_etranger(index, ville):
+    assert index.rechercher(ville) == {}
+
+
+def reponse(code, contenu):
+    resultat = requests.Response()
+    resultat.status_code = code
+    resultat._content = contenu.encode()
+    resultat.url = module_communes.URL_COMMUNES
+    resultat.reason = "Erreur"
+    return resultat
+
+
+def test_construction_de_l_index(tmp_path, monkeypatch):
+    reponses = iter([reponse(200, '[{"nom": "Lyon", "code": "69123", "codesPostaux": ["69001"]}]'),
+                     reponse(200, '[{"nom": "Lyon 1er Arrondissement", "code": "69381", "codeParent": "69123"}]')])
+    monkeypatch.setattr(module_communes.requests, "get", lambda *args, **kwargs: next(reponses))
+
+    chemin = construire_index_communes(str(tmp_path / "index.json.gz"))
+    index = charger_index_communes(chemin)
+    assert len(index) == 1
+    assert index.rechercher("Lyon")["commune_code_postal"] == "69001"
+
+
+@pytest.mark.parametrize("code, contenu, erreur", [
+    (404, '{"message": "introuvable"}', requests.HTTPError),
+    (200, "[]", ValueError),
+    (200, '{"message": "quota"}', ValueError),
+])
+def test_reponse_invalide_n_enregistre_pas_d_index(tmp_path, monkeypatch, code, contenu, erreur):
+    monkeypatch.setattr(module_communes.requests, "get", lambda *args, **kwargs: reponse(code, contenu))
+    chemin = str(tmp_path / "index.json.gz")
+    with pytest.raises(erreur):
+        construire_index_communes(chemin)
+    assert not os.path.exists(chemin)
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from util.get_schemas import ecrire_csv
+from util.incremental import cle_joueur, reprendre_lignes_inchangees
+
+SORTIE = ["wikidata_id", "taille_m", "ville_naissance"]
+
+
+def entree(*joueurs):
+    return pd.DataFrame(joueurs, columns=["nom", "date_naissance", "club"])
+
+
+@pytest.fixture
+def precedent(tmp_path):
+    df = entree(("Mbappé", "20 décembre 1998", "Real Madrid"),
+                ("Camara", "1 janvier 2000", "Lyon"),
+                ("Camara", "5 mai 1995", "Nice"),
+                ("Inconnu", "1 mars 2001", "Metz"))
+    df["wikidata_id"] = ["Q21621995", "Q1", "Q2", None]
+    df["taille_m"] = [1.78, 1.80, 1.85, None]
+    df["ville_naissance"] = ["Paris", "Lyon", "Nice", None]
+    chemin = str(tmp_path / "joueurs_enrichis.csv")
+    ecrire_csv(df, chemin)
+    return chemin
+
+
+def test_cle_nom_et_date_puis_wikidata_id():
+    df = entree(("Camara", "1 janvier 2000", "Lyon"), ("Camara", "5 mai 1995", "Nice"))
+    assert cle_joueur(df).tolist() == ["Camara|1 janvier 2000", "Camara|5 mai 1995"]
+    df["wikidata_id"] = ["Q1", None]
+    assert cle_joueur(df).tolist() == ["Q1", "Camara|5 mai 1995"]
+
+
+def test_joueurs_inchanges_reutilises(precedent):
+    df = entree(("Mbappé", "20 décembre 1998", "Real Madrid"),
+                ("Camara", "5 mai 1995", "Nice"),
+                ("Camara", "1 janvier 2000", "Lyon"))
+    df, a_traiter = reprendre_lignes_inchangees(df, precedent, SORTIE)
+    assert not a_traiter.any()
+    # Homonymes : chacun récupère ses propres valeurs, quel que soit l'ordre des lignes
+    assert df["wikidata_id"].tolist() == ["Q21621995", "Q2", "Q1"]
+
+
+def test_entree_modifiee_ou_nouveau_joueur_a_enrichir(precedent):
+    df = entree(("Mbappé", "20 décembre 1998", "PSG"),
+                ("Camara", "1 janvier 2000", "Lyon"),
+                ("Nouveau", "2 février 2002", "Lens"))
+    df, a_traiter = reprendre_lignes_inchangees(df, precedent, SORTIE)
+    assert a_traiter.tolist() == [True, False, True]
+    assert df.loc[0, "wikidata_id"] is None
+    assert df.loc[1, "wikidata_id"] == "Q1"
+
+
+def test_introuvables_retentes(precedent):
+    df = entree(("Inconnu", "1 mars 2001", "Metz"))
+    assert reprendre_lignes_inchangees(df, precedent, SORTIE)[1].all()
+    assert not reprendre_lignes_inchangees(df, precedent, SORTIE, retenter_vides=False)[1].any()
+
+
+def test_sans_fichier_precedent_ou_incompatible(tmp_path):
+    df = entree(("Mbappé", "20 décembre 1998", "Real Madrid"))
+    assert reprendre_lignes_inchangees(df, str(tmp_path / "absent.csv"), SORTIE)[1].all()
+
+    chemin = str(tmp_path / "ancien.csv")
+    ecrire_csv(df.assign(wikidata_id="Q21621995"), chemin)
+    assert reprendre_lignes_inchangees(df, chemin, SORTIE)[1].all()
@@ -0,0 +1,39 @@
+import pytest
+
+from util.index_joueurs import IndexJoueurs
+
+
+def joueur(qid, libelles, date):
+    return {"wikidata_id": qid, "libelles": libelles, "date_naissance": date,
+            "taille_m": None, "ville_naissance": None}
+
+
+@pytest.fixture
+def index():
+    # Sept homonymes exacts "Camara" devant le joueur cherché, au libellé plus éloigné
+    homonymes = [joueur(f"Q{i}", ["Camara"], f"19{80 + i}-01-01") for i in range(7)]
+    return IndexJoueurs(homonymes + [
+        joueur("Q100", ["Mohamed Camara"], "2000-01-06"),
+        joueur("Q200", ["Kylian Mbappé"], "1998-12-20"),
+        joueur("Q300", ["Lucas Hernández", "Lucas Hernandez"], "1996-02-14"),
+        joueur("Q301", ["Théo Hernández"], "1997-10-06"),
+    ])
+
+
+def test_date_filtree_avant_la_troncature(index):
+    assert index.rechercher("Camara", "6 janvier 2000")["wikidata_id"] == "Q100"
+    assert all(j["date_naissance"] == "2000-01-06" for _, j in index.candidats("Camara", date="2000-01-06"))
+
+
+def test_homonymes_sans_date_ambigus(index):
+    assert index.rechercher("Camara") is None
+
+
+def test_nom_sans_accents_ou_mal_orthographie(index):
+    assert index.rechercher("Kylian Mbappe")["wikidata_id"] == "Q200"
+    assert index.rechercher("Kilian Mbape", "1998-12-20T00:00:00Z")["wikidata_id"] == "Q200"
+
+
+def test_date_differente_ecarte_le_candidat(index):
+    assert index.rechercher("Kylian Mbappé", "1 janvier 1990") is None
+    assert index.rechercher("Hernandez", "6 octobre 1997")["wikidata_id"] == "Q301"
@@ -0,0 +1,28 @@
+import re
+
+import get_internationaux
+
+PATTERN_CURSEUR = re.compile(r'FILTER\(STR\(\?item\) > "(.*?)"\)')
+PATTERN_LIMITE = re.compile(r"LIMIT (\d+)")
+
+
+def test_pagination_par_curseur_sans_cache(monkeypatch):
+    # Ordre des chaînes différent de l'ordre numérique (Q10 < Q9)
+    iris = sorted(f"http://www.wikidata.org/entity/Q{n}" for n in (9, 10, 123, 45, 7))
+    appels = []
+
+    def executer_requete(sparql, requete, avec_cache=True):
+        appels.append(avec_cache)
+        curseur = PATTERN_CURSEUR.search(requete)
+        limite = int(PATTERN_LIMITE.search(requete).group(1))
+        suivants = [iri for iri in iris if not curseur or iri > curseur.group(1)][:limite]
+        return {"results": {"bindings": [
+            {"item": {"value": iri}, "nomFr": {"value": iri.rsplit("/", 1)[-1]}} for iri in suivants
+        ]}}
+
+    monkeypatch.setattr(get_internationaux, "executer_requete", executer_requete)
+    pages = list(get_internationaux.iter_pages_internationaux(None, "france", taille_page=2))
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [joueur["wikidata_id"] for page in pages for joueur in page] == [iri.rsplit("/", 1)[-1] for iri in iris]
+    assert appels == [False, False, False]
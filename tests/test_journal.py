@@ -0,0 +1,56 @@
+import json
+
+from util.journal import JournalProgression
+
+
+def lire_lignes(chemin):
+    with open(chemin, encoding="utf-8") as f:
+        return [json.loads(ligne) for ligne in f]
+
+
+def test_reprise_apres_ligne_tronquee(tmp_path):
+    chemin = str(tmp_path / "journal.jsonl")
+    journal = JournalProgression(chemin)
+    journal.enregistrer("Mbappe", {"taille_m": 1.78})
+    journal.enregistrer("Inconnu", None)
+    journal._fichier.close()
+
+    # Arrêt brutal au milieu de l'écriture d'une troisième ligne
+    with open(chemin, "a", encoding="utf-8") as f:
+        f.write('{"cle": "Griezmann", "inf')
+
+    reprise = JournalProgression(chemin, reprendre=True)
+    assert "Mbappe" in reprise and "Inconnu" in reprise
+    assert "Griezmann" not in reprise
+
+    reprise.enregistrer("Griezmann", {"taille_m": 1.76})
+    reprise.enregistrer_lot({"Kante": {"taille_m": 1.68}})
+    reprise._fichier.close()
+
+    # Toutes les lignes sont lisibles : aucune n'est collée au fragment tronqué
+    assert [entree["cle"] for entree in lire_lignes(chemin)] == ["Mbappe", "Inconnu", "Griezmann", "Kante"]
+    assert len(JournalProgression(chemin, reprendre=True)) == 4
+
+
+def test_journal_entierement_tronque(tmp_path):
+    chemin = str(tmp_path / "journal.jsonl")
+    with open(chemin, "w", encoding="utf-8") as f:
+        f.write('{"cle": "Mbap')
+
+    journal = JournalProgression(chemin, reprendre=True)
+    assert len(journal) == 0
+    journal.enregistrer("Mbappe", None)
+    journal._fichier.close()
+    assert lire_lignes(chemin) == [{"cle": "Mbappe", "infos": None}]
+
+
+def test_sans_reprise_le_journal_repart_de_zero(tmp_path):
+    chemin = str(tmp_path / "journal.jsonl")
+    precedent = JournalProgression(chemin)
+    precedent.enregistrer("Mbappe", None)
+    precedent._fichier.close()
+
+    journal = JournalProgression(chemin)
+    assert len(journal) == 0
+    journal.terminer()
+    assert not (tmp_path / "journal.jsonl").exists()
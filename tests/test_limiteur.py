@@ -0,0 +1,153 @@
+from types import SimpleNamespace
+
+import pytest
+from SPARQLWrapper.SPARQLExceptions import EndPointInternalError, QueryBadFormed
+
+from util import limiteur
+from util.limiteur import (SeauJetons, DisjoncteurOuvert, executer_avec_limite, delai_backoff,
+                           lire_retry_after, SEUIL_DISJONCTEUR, BACKOFF_BASE, BACKOFF_MAX)
+
+URL = "https://service.test/api"
+
+
+class Horloge:
+    """
+    Horloge simulée : time.sleep avance time.monotonic sans attendre
+    """
+
+    def __init__(self):
+        self.maintenant = 1000.0
+        self.sommeils = []
+
+    def monotonic(self):
+        return self.maintenant
+
+    def sleep(self, duree):
+        self.sommeils.append(duree)
+        # Comme une vraie horloge, avance toujours un peu (sinon un reste de
+        # jeton de l'ordre de 1e-15 ne serait jamais rattrapé par l'addition)
+        self.maintenant += max(duree, 1e-6)
+
+
+class ErreurHTTP(Exception):
+    def __init__(self, code, retry_after=None):
+        super().__init__(f"HTTP {code}")
+        entetes = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=code, headers=entetes)
+
+
+@pytest.fixture
+def horloge(monkeypatch):
+    horloge = Horloge()
+    monkeypatch.setattr(limiteur.time, "monotonic", horloge.monotonic)
+    monkeypatch.setattr(limiteur.time, "sleep", horloge.sleep)
+    monkeypatch.setattr(limiteur, "_limiteurs", {})
+    monkeypatch.setitem(limiteur.CONFIG_HOTES, "service.test",
+                        {"debit": 10.0, "debit_max": 20.0, "debit_min": 1.0, "capacite": 2})
+    return horloge
+
+
+def appels_scenarises(*reponses):
+    """
+    Appel qui lève ou retourne successivement chaque élément de `reponses`
+    """
+    restantes = list(reponses)
+    compteur = {"appels": 0}
+
+    def appel():
+        compteur["appels"] += 1
+        reponse = restantes.pop(0)
+        if isinstance(reponse, Exception):
+            raise reponse
+        return reponse
+    return appel, compteur
+
+
+def test_seau_rafale_puis_debit(horloge):
+    seau = SeauJetons(debit=10.0, capacite=2, debit_min=1.0, debit_max=20.0)
+    seau.acquerir()
+    seau.acquerir()
+    assert horloge.sommeils == []
+
+    seau.acquerir()
+    assert sum(horloge.sommeils) == pytest.approx(0.1)
+
+
+def test_seau_aimd(horloge):
+    seau = SeauJetons(debit=10.0, capacite=2, debit_min=4.0, debit_max=11.0)
+    seau.augmenter()
+    assert seau.debit == pytest.approx(10.55)
+    seau.augmenter()
+    assert seau.debit == 11.0
+
+    seau.reduire()
+    assert seau.debit == 5.5
+    seau.reduire()
+    assert seau.debit == 4.0
+    assert seau.jetons <= 0
+
+
+def test_delai_backoff_borne(monkeypatch):
+    monkeypatch.setattr(limiteur.random, "uniform", lambda bas, haut: haut)
+    assert delai_backoff(0) == BACKOFF_BASE
+    assert delai_backoff(3) == BACKOFF_BASE * 8
+    assert delai_backoff(30) == BACKOFF_MAX
+
+
+def test_lire_retry_after():
+    assert lire_retry_after("2.5") == 2.5
+    assert lire_retry_after("-3") == 0.0
+    assert lire_retry_after(None) is None
+    assert lire_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert lire_retry_after("n'importe quoi") is None
+
+
+def test_erreur_transitoire_retentee(horloge):
+    appel, compteur = appels_scenarises(ErreurHTTP(503), ConnectionError("reset"), "ok")
+    assert executer_avec_limite(URL, appel) == "ok"
+    assert compteur["appels"] == 3
+
+
+def test_erreur_client_non_retentee(horloge):
+    appel, compteur = appels_scenarises(ErreurHTTP(404), "ok")
+    with pytest.raises(ErreurHTTP):
+        executer_avec_limite(URL, appel)
+    assert compteur["appels"] == 1
+
+
+def test_erreurs_sparqlwrapper(horloge):
+    appel, compteur = appels_scenarises(QueryBadFormed(), "ok")
+    with pytest.raises(QueryBadFormed):
+        executer_avec_limite(URL, appel)
+    assert compteur["appels"] == 1
+    assert limiteur.limiteur_pour(URL).echecs_consecutifs == 0
+
+    appel, compteur = appels_scenarises(EndPointInternalError(), "ok")
+    assert executer_avec_limite(URL, appel) == "ok"
+    assert compteur["appels"] == 2
+
+
+def test_retry_after_applique_une_seule_fois(horloge):
+    appel, _ = appels_scenarises(ErreurHTTP(429, retry_after=3), "ok")
+    debut = horloge.maintenant
+    assert executer_avec_limite(URL, appel) == "ok"
+
+    # 3 s de Retry-After, plus au plus un jeton après la réduction de débit du 429
+    assert [duree for duree in horloge.sommeils if duree >= 1] == [3.0]
+    attente = horloge.maintenant - debut
+    assert 3 <= attente < 3 + 1 / limiteur.limiteur_pour(URL).seau.debit + 1e-9
+
+
+def test_disjoncteur(horloge, monkeypatch):
+    monkeypatch.setattr(limiteur.random, "uniform", lambda bas, haut: 0.0)
+    appel, compteur = appels_scenarises(*[ErreurHTTP(500)] * SEUIL_DISJONCTEUR)
+    with pytest.raises((ErreurHTTP, DisjoncteurOuvert)):
+        executer_avec_limite(URL, appel, max_tentatives=SEUIL_DISJONCTEUR)
+    assert compteur["appels"] == SEUIL_DISJONCTEUR
+
+    with pytest.raises(DisjoncteurOuvert):
+        executer_avec_limite(URL, lambda: "ok")
+
+    # Après refroidissement, une requête de test est de nouveau autorisée
+    horloge.maintenant += limiteur.DUREE_DISJONCTEUR
+    assert executer_avec_limite(URL, lambda: "ok") == "ok"
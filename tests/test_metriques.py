@@ -0,0 +1,56 @@
+import json
+import sys
+
+from util import metriques
+from util.cache import CacheHTTP
+from util.metriques import Metriques, Histogramme
+
+
+def test_un_seul_registre_pour_cache_et_etapes(tmp_path, monkeypatch):
+    import fusion
+
+    monkeypatch.setattr(metriques, "_metriques_partagees", None)
+    assert "ingestion.util.metriques" not in sys.modules
+
+    cache = CacheHTTP(str(tmp_path / "cache.sqlite"))
+    try:
+        cache.get("wikidata", "SELECT 1")
+    finally:
+        cache.fermer()
+
+    # Sans fichier de base, main() s'arrête tout de suite mais l'étape est mesurée
+    monkeypatch.setattr(fusion, "parent_dir", str(tmp_path / "src"))
+    fusion.main(parquet=False)
+
+    chemin = metriques.ecrire_rapport("fusion", str(tmp_path / "rapport.json"))
+    with open(chemin, encoding="utf-8") as f:
+        rapport = json.load(f)
+
+    assert "fusion" in rapport["etapes"]
+    assert {"nom": "cache_http", "etiquettes": {"resultat": "miss", "source": "wikidata"}, "valeur": 1} \
+        in rapport["compteurs"]
+
+
+def test_histogramme_quantiles():
+    histogramme = Histogramme(seaux=(0.1, 1.0))
+    for valeur in (0.05, 0.05, 0.5, 5.0):
+        histogramme.observer(valeur)
+    assert histogramme.quantile(0.5) == 0.1
+    assert histogramme.quantile(0.75) == 1.0
+    assert histogramme.quantile(1.0) == float("inf")
+    assert list(histogramme.cumuls()) == [(0.1, 2), (1.0, 3), ("+Inf", 4)]
+
+
+def test_export_prometheus():
+    registre = Metriques()
+    registre.incrementer("retries", hote="geo.api.gouv.fr", code=429)
+    registre.incrementer("retries", hote="geo.api.gouv.fr", code=429)
+    registre.fixer("lignes", 24, etape="insee")
+    registre.observer("requete_duree_secondes", 0.2, hote="geo.api.gouv.fr")
+
+    texte = registre.vers_prometheus()
+    assert '# TYPE joueurs_edf_retries_total counter' in texte
+    assert 'joueurs_edf_retries_total{code="429",hote="geo.api.gouv.fr"} 2' in texte
+    assert 'joueurs_edf_lignes{etape="insee"} 24' in texte
+    assert 'joueurs_edf_requete_duree_secondes_bucket{hote="geo.api.gouv.fr",le="+Inf"} 1' in texte
+    assert 'joueurs_edf_requete_duree_secondes_count{hote="geo.api.gouv.fr"} 1' in texte
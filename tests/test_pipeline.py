@@ -0,0 +1,182 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import pipeline
+
+
+def etape(nom, entrees, sorties):
+    return {"nom": nom, "script": f"{nom}.py", "entrees": entrees, "sorties": sorties}
+
+
+@pytest.fixture
+def projet(tmp_path, monkeypatch):
+    """
+    Projet minimal : trois étapes en chaîne (a -> b -> c) plus une étape
+    indépendante, des scripts factices et un lanceur qui écrit les sorties
+    """
+    monkeypatch.setattr(pipeline, "racine_projet", str(tmp_path))
+    monkeypatch.setattr(pipeline, "ETAT_PATH", str(tmp_path / "etat.json"))
+    monkeypatch.setattr(pipeline, "SORTIE_FINALE", str(tmp_path / "c.csv"))
+    monkeypatch.setattr(pipeline, "signatures_sources", lambda equipes: {e: "revision:1" for e in equipes})
+
+    etapes = [
+        etape("Wikipedia", [], ["a.csv"]),
+        etape("B", ["a.csv"], ["b.csv"]),
+        etape("C", ["b.csv"], ["c.csv"]),
+        etape("Seule", ["source.csv"], ["seule.csv"]),
+    ]
+    for e in etapes:
+        (tmp_path / e["script"]).write_text("# v1\n")
+    (tmp_path / "source.csv").write_text("x\n")
+
+    lancees = []
+    contenus = {"a.csv": "a1"}
+
+    def lancer_etape(e, arguments):
+        # Sortie déterminée par les entrées : même entrées, même fichier
+        lancees.append(e["nom"])
+        lues = "".join((tmp_path / entree).read_text() for entree in e["entrees"])
+        for sortie in e["sorties"]:
+            (tmp_path / sortie).write_text(contenus.get(sortie, e["nom"] + lues))
+        return 0, "", 0.0
+
+    monkeypatch.setattr(pipeline, "lancer_etape", lancer_etape)
+    return tmp_path, etapes, lancees, contenus
+
+
+def test_premiere_execution_puis_rien_a_faire(projet):
+    racine, etapes, lancees, _ = projet
+    assert pipeline.executer_dag(etapes=etapes)
+    assert sorted(lancees) == ["B", "C", "Seule", "Wikipedia"]
+    assert lancees.index("Wikipedia") < lancees.index("B") < lancees.index("C")
+
+    etat = json.loads((racine / "etat.json").read_text())
+    assert etat["signatures"] == {"france": "revision:1"}
+    assert set(etat["etapes"]) == {"Wikipedia", "B", "C", "Seule"}
+
+    lancees.clear()
+    assert pipeline.executer_dag(etapes=etapes)
+    assert lancees == []
+
+
+def test_script_modifie_sortie_identique(projet):
+    racine, etapes, lancees, _ = projet
+    pipeline.executer_dag(etapes=etapes)
+    lancees.clear()
+
+    (racine / "B.py").write_text("# v2\n")
+    pipeline.executer_dag(etapes=etapes)
+    # B réécrit un b.csv identique : C reste ignorée
+    assert lancees == ["B"]
+
+
+def test_sortie_modifiee_propage(projet):
+    racine, etapes, lancees, contenus = projet
+    pipeline.executer_dag(etapes=etapes)
+    lancees.clear()
+
+    (racine / "Wikipedia.py").write_text("# v2\n")
+    contenus["a.csv"] = "a2"
+    pipeline.executer_dag(etapes=etapes)
+    assert lancees == ["Wikipedia", "B", "C"]
+
+
+def test_sortie_supprimee_relance_l_etape(projet):
+    racine, etapes, lancees, _ = projet
+    pipeline.executer_dag(etapes=etapes)
+    lancees.clear()
+
+    os.remove(racine / "seule.csv")
+    pipeline.executer_dag(etapes=etapes)
+    assert lancees == ["Seule"]
+
+
+def test_echec_annule_les_dependantes(projet, monkeypatch):
+    racine, etapes, lancees, _ = projet
+
+    def lancer_etape(e, arguments):
+        lancees.append(e["nom"])
+        if e["nom"] == "B":
+            return 1, "erreur", 0.0
+        for sortie in e["sorties"]:
+            (racine / sortie).write_text(e["nom"])
+        return 0, "", 0.0
+
+    monkeypatch.setattr(pipeline, "lancer_etape", lancer_etape)
+    assert not pipeline.executer_dag(etapes=etapes)
+    assert "C" not in lancees
+    assert "signatures" not in json.loads((racine / "etat.json").read_text())
+
+
+def test_source_optionnelle_absente(projet):
+    racine, etapes, lancees, _ = projet
+    etapes = etapes + [
+        dict(etape("Index", ["bpe.csv"], ["index.npz"]), source_optionnelle="bpe.csv"),
+        dict(etape("Enrichi", ["index.npz", "c.csv"], ["enrichi.csv"]), source_optionnelle="bpe.csv"),
+    ]
+    for e in etapes[-2:]:
+        (racine / e["script"]).write_text("# v1\n")
+
+    assert pipeline.executer_dag(etapes=etapes)
+    assert "Index" not in lancees and "Enrichi" not in lancees
+
+    # Exécution suivante sans changement : rien n'est relancé, pas même les étapes sans source
+    lancees.clear()
+    assert pipeline.executer_dag(etapes=etapes)
+    assert lancees == []
+
+    (racine / "bpe.csv").write_text("equipements\n")
+    pipeline.executer_dag(etapes=etapes)
+    assert lancees == ["Index", "Enrichi"]
+
+
+def test_code_zero_sans_sortie_est_un_echec(projet, monkeypatch):
+    racine, etapes, lancees, _ = projet
+
+    def lancer_etape(e, arguments):
+        # B se termine avec le code 0 sans rien écrire (entrée manquante côté script)
+        lancees.append(e["nom"])
+        if e["nom"] != "B":
+            for sortie in e["sorties"]:
+                (racine / sortie).write_text(e["nom"])
+        return 0, "", 0.0
+
+    monkeypatch.setattr(pipeline, "lancer_etape", lancer_etape)
+    assert not pipeline.executer_dag(etapes=etapes)
+    assert "C" not in lancees
+    etat = json.loads((racine / "etat.json").read_text())
+    assert "B" not in etat["etapes"]
+    assert "signatures" not in etat
+
+
+def test_sortie_perimee_non_reecrite_est_un_echec(projet, monkeypatch):
+    racine, etapes, lancees, _ = projet
+    pipeline.executer_dag(etapes=etapes)
+    lancees.clear()
+
+    # b.csv date de l'exécution précédente et B ne la réécrit pas
+    ancienne = os.path.getmtime(racine / "b.csv") - 3600
+    os.utime(racine / "b.csv", (ancienne, ancienne))
+    (racine / "B.py").write_text("# v2\n")
+
+    def lancer_etape(e, arguments):
+        lancees.append(e["nom"])
+        return 0, "", 0.0
+
+    monkeypatch.setattr(pipeline, "lancer_etape", lancer_etape)
+
+    assert not pipeline.executer_dag(etapes=etapes)
+    assert lancees == ["B"]
+
+
+@pytest.mark.parametrize("script", ["get_wikidata_data.py", "get_insee_data.py"])
+def test_script_sans_entree_sort_en_erreur(tmp_path, script):
+    chemin = os.path.join(os.path.dirname(pipeline.parent_dir), "src", "ingestion", script)
+    resultat = subprocess.run([sys.executable, chemin], cwd=tmp_path,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    assert resultat.returncode == 1, resultat.stdout
+    assert "introuvable" in resultat.stdout
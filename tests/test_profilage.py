@@ -0,0 +1,37 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from util.profilage import Profilage, nom_frame
+
+
+def _travail(n):
+    time.sleep(0.01)
+    return sum(i * i for i in range(n))
+
+
+def test_profilage_pool_de_threads(tmp_path):
+    fini = threading.Event()
+
+    def executer():
+        with Profilage("test", dossier=str(tmp_path), intervalle=0.001) as profil:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                assert len(list(pool.map(_travail, [20_000] * 16))) == 16
+        executer.profil = profil
+        fini.set()
+
+    threading.Thread(target=executer, daemon=True).start()
+    assert fini.wait(60), "le profilage d'un pool de threads ne se termine pas"
+
+    fichiers = sorted(os.listdir(tmp_path))
+    assert len(fichiers) == 4
+    for extension in (".pstats", ".collapsed", ".tracemalloc", "_resume.json"):
+        assert os.path.exists(executer.profil.prefixe + extension)
+    assert any("_travail" in pile for pile in executer.profil.piles)
+
+
+def test_nom_frame_sans_numero_de_ligne():
+    frame = sys._getframe()
+    assert nom_frame(frame) == "test_nom_frame_sans_numero_de_ligne (test_profilage.py)"
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from util.spatial import GrilleSpatiale, RAYON_TERRE_KM
+
+
+def distances_km(lat, lon, lat_c, lon_c):
+    """
+    Distance orthodromique (haversine) entre chaque centre et chaque point
+    """
+    lat, lon, lat_c, lon_c = map(np.radians, (lat, lon, lat_c, lon_c))
+    dlat = lat[None, :] - lat_c[:, None]
+    dlon = lon[None, :] - lon_c[:, None]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat_c)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * RAYON_TERRE_KM * np.arcsin(np.sqrt(a))
+
+
+def compter_force_brute(lat, lon, lat_c, lon_c, rayon_km):
+    resultat = (distances_km(lat, lon, lat_c, lon_c) <= rayon_km).sum(axis=1)
+    resultat[np.isnan(lat_c) | np.isnan(lon_c)] = 0
+    return resultat
+
+
+@pytest.fixture
+def points():
+    hasard = np.random.default_rng(0)
+    # Quelques agglomérations denses et un semis diffus sur la France métropolitaine
+    villes = np.array([[48.86, 2.35], [45.76, 4.84], [43.30, 5.37], [50.63, 3.06]])
+    denses = villes[hasard.integers(0, len(villes), 3000)] + hasard.normal(0, 0.05, (3000, 2))
+    diffus = np.column_stack((hasard.uniform(42, 51, 2000), hasard.uniform(-4.5, 8, 2000)))
+    return np.vstack((denses, diffus))
+
+
+@pytest.mark.parametrize("rayon_km", [0.5, 5.0, 25.0])
+@pytest.mark.parametrize("max_candidats", [50, 2_000_000])
+def test_comptage_identique_a_la_force_brute(points, rayon_km, max_candidats):
+    hasard = np.random.default_rng(1)
+    # Centres répétés (même commune de naissance), dont certains sans coordonnées
+    centres = np.vstack((points[hasard.integers(0, len(points), 40)], [[np.nan, np.nan], [48.86, 2.35]]))
+    centres = centres[hasard.integers(0, len(centres), 300)]
+
+    grille = GrilleSpatiale(points[:, 0], points[:, 1], rayon_km)
+    obtenu = grille.compter_dans_rayon(centres[:, 0], centres[:, 1], max_candidats=max_candidats)
+    attendu = compter_force_brute(points[:, 0], points[:, 1], centres[:, 0], centres[:, 1], rayon_km)
+
+    np.testing.assert_array_equal(obtenu, attendu)
+
+
+def test_grille_vide_et_centres_vides(points):
+    vide = GrilleSpatiale(np.array([]), np.array([]), 5.0)
+    assert vide.compter_dans_rayon(np.array([48.0]), np.array([2.0])).tolist() == [0]
+
+    grille = GrilleSpatiale(points[:, 0], points[:, 1], 5.0)
+    assert grille.compter_dans_rayon(np.array([np.nan]), np.array([np.nan])).tolist() == [0]
+    assert grille.compter_dans_rayon(np.array([]), np.array([])).tolist() == []
+
+
+@pytest.mark.parametrize("rayon_km", [0, -1, float("nan")])
+def test_rayon_invalide(rayon_km):
+    with pytest.raises(ValueError):
+        GrilleSpatiale(np.array([48.0]), np.array([2.0]), rayon_km)
+
+
+def test_cellules_trop_petites():
+    # 6371 km / 0.01 km dépasse la plage des indices de cellule : erreur plutôt que collisions
+    with pytest.raises(ValueError):
+        GrilleSpatiale(np.array([48.0, 0.0]), np.array([2.0, 0.0]), 0.01)
@@ -0,0 +1,97 @@
+import argparse
+import re
+
+import pandas as pd
+import pytest
+
+import get_wikidata_data
+from util.cache import CacheHTTP
+
+PATTERN_LIBELLE = re.compile(r'"[^"]*"@(?:fr|en)')
+
+
+@pytest.fixture
+def wikidata(tmp_path, monkeypatch):
+    """
+    Point d'accès factice : aucun libellé trouvé, chaque requête est consignée
+    """
+    cache = CacheHTTP(str(tmp_path / "cache.sqlite"))
+    requetes = []
+
+    def executer_requete(sparql, requete, avec_cache=True):
+        requetes.append(PATTERN_LIBELLE.findall(requete))
+        return {"results": {"bindings": []}}
+
+    monkeypatch.setattr(get_wikidata_data, "get_cache", lambda: cache)
+    monkeypatch.setattr(get_wikidata_data, "CORRECTIONS_MANUELLES", {})
+    monkeypatch.setattr(get_wikidata_data, "executer_requete", executer_requete)
+    monkeypatch.setattr(get_wikidata_data, "get_wikidata_info", lambda nom, sparql, date=None: None)
+    monkeypatch.setattr(get_wikidata_data, "JOURNAL_PATH", str(tmp_path / "journal.jsonl"))
+    yield requetes
+    cache.fermer()
+
+
+def parser_chunk():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-size", type=get_wikidata_data.taille_chunk)
+    return parser
+
+
+@pytest.mark.parametrize("valeur", ["0", "-5", "dix"])
+def test_chunk_size_invalide_refusee(valeur):
+    with pytest.raises(SystemExit):
+        parser_chunk().parse_args(["--chunk-size", valeur])
+
+
+def test_chunk_size_plafonnee():
+    assert parser_chunk().parse_args(["--chunk-size", "7"]).chunk_size == 7
+    assert parser_chunk().parse_args(["--chunk-size", "100000"]).chunk_size == get_wikidata_data.TAILLE_CHUNK_MAX
+
+
+def test_batch_respecte_la_taille_maximale(wikidata):
+    noms = [f"Joueur {i}" for i in range(get_wikidata_data.TAILLE_CHUNK_MAX + 30)]
+    get_wikidata_data.get_wikidata_info_batch({nom: (nom, None) for nom in noms}, None, chunk_size=10_000)
+    assert wikidata and max(len(libelles) for libelles in wikidata) == get_wikidata_data.TAILLE_CHUNK_MAX
+    # FR puis EN : chaque libellé est envoyé une fois par langue
+    assert sum(len(libelles) for libelles in wikidata) == 2 * len(noms)
+
+
+def test_batch_chunk_size_nulle(wikidata):
+    with pytest.raises(ValueError):
+        get_wikidata_data.get_wikidata_info_batch({"Joueur|": ("Joueur", None)}, None, chunk_size=0)
+    assert wikidata == []
+
+
+def homonymes():
+    return pd.DataFrame({"nom": ["Camara", "Camara", "Mbappé"],
+                         "date_naissance": ["1 janvier 2000", "5 mai 1995", "20 décembre 1998"],
+                         "wikidata_id": None, "taille_m": None, "ville_naissance": None})
+
+
+def infos(qid):
+    return {"wikidata_id": qid, "taille_m": None, "ville_naissance": None}
+
+
+def test_homonymes_resolus_et_journalises_separement(wikidata, monkeypatch):
+    # Aucun libellé exact trouvé : chaque homonyme passe par la recherche avec sa date
+    par_date = {"1 janvier 2000": infos("Q1"), "5 mai 1995": infos("Q2")}
+    monkeypatch.setattr(get_wikidata_data, "get_wikidata_info",
+                        lambda nom, sparql, date=None: par_date.get(date))
+
+    df = homonymes()
+    a_traiter = pd.Series(True, index=df.index)
+    journal, a_traiter = get_wikidata_data.ouvrir_journal(df, a_traiter, reprendre=False)
+    lignes = df.loc[a_traiter, ["nom", "date_naissance"]]
+    joueurs = dict(zip(get_wikidata_data.cles_joueurs(lignes), zip(lignes["nom"], lignes["date_naissance"])))
+    resultats = get_wikidata_data.get_wikidata_info_batch(joueurs, None, journal=journal)
+    journal._fichier.close()
+
+    assert resultats == {"Camara|1 janvier 2000": infos("Q1"), "Camara|5 mai 1995": infos("Q2")}
+    assert set(journal.entrees) == set(joueurs)
+
+    # Reprise : chaque homonyme récupère sa propre entrée du journal
+    df = homonymes()
+    journal, a_traiter = get_wikidata_data.ouvrir_journal(df, pd.Series(True, index=df.index), reprendre=True)
+    journal._fichier.close()
+    assert df["wikidata_id"].tolist() == ["Q1", "Q2", None]
+    assert not a_traiter.any()